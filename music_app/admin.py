@@ -1,6 +1,35 @@
 from django.contrib import admin
-from .models import Artist,Song
+from .models import Artist, ArtistSimilarity, CatalogCount, DuplicateGroup, Song
 
-# Register your models here.
-admin.site.register(Artist)
-admin.site.register(Song)
\ No newline at end of file
+
+@admin.register(Artist)
+class ArtistAdmin(admin.ModelAdmin):
+    list_display = ('name', 'nationality', 'label')
+    search_fields = ('name',)
+
+
+@admin.register(Song)
+class SongAdmin(admin.ModelAdmin):
+    list_display = ('title', 'artist', 'genre', 'album', 'release_year')
+    list_select_related = ('artist',)
+    list_filter = ('genre',)
+    raw_id_fields = ('artist',)
+
+
+@admin.register(CatalogCount)
+class CatalogCountAdmin(admin.ModelAdmin):
+    list_display = ('dimension', 'key', 'count')
+    list_filter = ('dimension',)
+
+
+@admin.register(ArtistSimilarity)
+class ArtistSimilarityAdmin(admin.ModelAdmin):
+    list_display = ('artist', 'rank', 'similar', 'score')
+    list_select_related = ('artist', 'similar')
+    raw_id_fields = ('artist', 'similar')
+
+
+@admin.register(DuplicateGroup)
+class DuplicateGroupAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'kind')
+    list_filter = ('kind',)
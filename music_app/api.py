@@ -0,0 +1,366 @@
+import hashlib
+import json
+import secrets
+
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
+
+from music_app.forms import SongBulkForm, artist_choice
+from music_app.models import Artist, Song
+from music_app.pagination import InvalidCursor, KeysetPaginator
+from music_app.playlists import MAX_PLAYLIST, playlist
+from music_app.search import artists_by_prefix
+
+GENRES = {value for value, _ in Song.GENRE_CHOICES}
+
+
+class ApiError(Exception):
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def int_param(request, name):
+    value = request.GET.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError('%s must be a whole number.' % name)
+
+
+def version_etag(versions):
+    """Strong ETag over the (id, updated_at, ...) tuples a response is built from."""
+    digest = hashlib.sha1(usedforsecurity=False)
+    for version in versions:
+        digest.update(('|'.join(str(v) for v in version) + ';').encode())
+    return '"%s"' % digest.hexdigest()
+
+
+class ArtistResource:
+    model = Artist
+
+    def get_queryset(self):
+        return Artist.objects.all()
+
+    def get_version_queryset(self):
+        return Artist.objects.only('id', 'updated_at')
+
+    def version(self, artist):
+        return (artist.pk, artist.updated_at.isoformat())
+
+    def last_modified(self, artist):
+        return artist.updated_at
+
+    def filter_queryset(self, queryset):
+        return queryset
+
+    def serialize(self, artist):
+        request = self.request
+        return {
+            'id': artist.pk,
+            'url': request.build_absolute_uri(reverse('api_artist', args=[artist.pk])),
+            'name': artist.name,
+            'age': artist.age,
+            'nationality': artist.nationality,
+            'website': artist.website,
+            'label': artist.label,
+            'image': request.build_absolute_uri(artist.image.url) if artist.image else None,
+            'songs': request.build_absolute_uri(reverse('api_songs') + '?artist=%d' % artist.pk),
+            'updated_at': artist.updated_at,
+        }
+
+
+class SongResource:
+    model = Song
+
+    def get_queryset(self):
+        return Song.objects.with_artist()
+
+    def get_version_queryset(self):
+        # Song payloads embed the artist name, so the artist's version counts too.
+        return Song.objects.select_related('artist').only('id', 'updated_at', 'artist__id', 'artist__updated_at')
+
+    def version(self, song):
+        return (song.pk, song.updated_at.isoformat(), song.artist.updated_at.isoformat())
+
+    def last_modified(self, song):
+        return max(song.updated_at, song.artist.updated_at)
+
+    def filter_queryset(self, queryset):
+        genre = self.request.GET.get('genre')
+        if genre:
+            if genre not in GENRES:
+                raise ApiError('Unknown genre %r.' % genre)
+            queryset = queryset.filter(genre=genre)
+        year = int_param(self.request, 'year')
+        if year is not None:
+            queryset = queryset.filter(release_year=year)
+        artist = int_param(self.request, 'artist')
+        if artist is not None:
+            queryset = queryset.filter(artist_id=artist)
+        return queryset
+
+    def serialize(self, song):
+        request = self.request
+        return {
+            'id': song.pk,
+            'url': request.build_absolute_uri(reverse('api_song', args=[song.pk])),
+            'title': song.title,
+            'genre': song.genre,
+            'album': song.album,
+            'release_year': song.release_year,
+            'artist': {
+                'id': song.artist_id,
+                'name': song.artist.name,
+                'url': request.build_absolute_uri(reverse('api_artist', args=[song.artist_id])),
+            },
+            'updated_at': song.updated_at,
+        }
+
+
+class ApiView(View):
+    """
+    Read-only JSON endpoint answering conditional GETs from row versions.
+
+    The ETag is computed from a narrow (id, updated_at) query first; the
+    full rows are only loaded and serialized when the client's copy is stale.
+    """
+    http_method_names = ['get', 'head', 'options']
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as exc:
+            return JsonResponse({'error': str(exc)}, status=exc.status)
+
+    def not_modified(self, etag, last_modified):
+        """Return a 304 response if the client's copy is current, else None."""
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return get_conditional_response(self.request, etag=etag, last_modified=timestamp)
+
+    def finish(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(int(last_modified.timestamp()))
+        return response
+
+    def respond(self, etag, last_modified, build):
+        response = self.not_modified(etag, last_modified)
+        if response is None:
+            response = JsonResponse(build())
+        return self.finish(response, etag, last_modified)
+
+
+class AsyncApiMixin:
+    """Runs the ApiView flow with the async ORM; payloads are identical."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except ApiError as exc:
+            return JsonResponse({'error': str(exc)}, status=exc.status)
+
+
+class ApiListView(ApiView):
+    ordering = ('id',)
+    paginate_by = 50
+    max_paginate_by = 200
+
+    def get_page_size(self):
+        size = int_param(self.request, 'page_size') or self.paginate_by
+        return max(1, min(size, self.max_paginate_by))
+
+    def _page_url(self, param, cursor):
+        query = self.request.GET.copy()
+        query.pop('after', None)
+        query.pop('before', None)
+        query[param] = cursor
+        return self.request.build_absolute_uri('?' + query.urlencode())
+
+    def get_paginator(self):
+        versions = self.filter_queryset(self.get_version_queryset())
+        return KeysetPaginator(versions, self.ordering, self.get_page_size())
+
+    def cursors(self):
+        return {'after': self.request.GET.get('after'), 'before': self.request.GET.get('before')}
+
+    def page_etag(self, page):
+        # Lists send no Last-Modified: a deleted row would not move it.
+        return version_etag([self.version(obj) for obj in page] + [(page.has_next, page.has_previous)])
+
+    def page_payload(self, page, objects):
+        return {
+            'results': [self.serialize(objects[obj.pk]) for obj in page if obj.pk in objects],
+            'next': self._page_url('after', page.next_cursor) if page.has_next else None,
+            'previous': self._page_url('before', page.previous_cursor) if page.has_previous else None,
+        }
+
+    def get(self, request):
+        try:
+            page = self.get_paginator().page(**self.cursors())
+        except InvalidCursor:
+            raise ApiError('Invalid page cursor.')
+        return self.respond(self.page_etag(page), None, lambda: self.page_payload(
+            page, self.get_queryset().in_bulk([obj.pk for obj in page])))
+
+
+class AsyncApiListView(AsyncApiMixin, ApiListView):
+
+    async def get(self, request):
+        try:
+            page = await self.get_paginator().apage(**self.cursors())
+        except InvalidCursor:
+            raise ApiError('Invalid page cursor.')
+        etag = self.page_etag(page)
+        response = self.not_modified(etag, None)
+        if response is None:
+            objects = await self.get_queryset().ain_bulk([obj.pk for obj in page])
+            response = JsonResponse(self.page_payload(page, objects))
+        return self.finish(response, etag, None)
+
+
+class ApiDetailView(ApiView):
+
+    def get(self, request, pk):
+        current = self.get_version_queryset().filter(pk=pk).first()
+        if current is None:
+            raise ApiError('Not found.', status=404)
+        etag = version_etag([self.version(current)])
+        return self.respond(etag, self.last_modified(current), lambda: self.serialize(self.get_object(pk)))
+
+    def get_object(self, pk):
+        obj = self.get_queryset().filter(pk=pk).first()
+        if obj is None:
+            raise ApiError('Not found.', status=404)
+        return obj
+
+
+class AsyncApiDetailView(AsyncApiMixin, ApiDetailView):
+
+    async def get(self, request, pk):
+        current = await self.get_version_queryset().filter(pk=pk).afirst()
+        if current is None:
+            raise ApiError('Not found.', status=404)
+        etag = version_etag([self.version(current)])
+        last_modified = self.last_modified(current)
+        response = self.not_modified(etag, last_modified)
+        if response is None:
+            obj = await self.get_queryset().filter(pk=pk).afirst()
+            if obj is None:
+                raise ApiError('Not found.', status=404)
+            response = JsonResponse(self.serialize(obj))
+        return self.finish(response, etag, last_modified)
+
+
+class ArtistLookupApiView(View):
+    """
+    Artists whose name starts with ``q``, for the song form's artist field.
+
+    Answers from the lower(name) index with a handful of rows, so it costs
+    the same whatever the number of artists.
+    """
+    http_method_names = ['get', 'head', 'options']
+    limit = 20
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = max(1, min(int_param(request, 'limit') or self.limit, self.max_limit))
+        except ApiError as exc:
+            return JsonResponse({'error': str(exc)}, status=exc.status)
+        matches = artists_by_prefix(request.GET.get('q', ''), limit)
+        return JsonResponse({'results': [
+            {'id': pk, 'name': name, 'label': label, 'choice': artist_choice(pk, name, label)}
+            for pk, name, label in matches
+        ]})
+
+
+class GenieApiView(SongResource, View):
+    """
+    A random playlist, e.g. ``?genre=Jazz&genre=Soul&from=1960&to=1979&size=20``.
+
+    Songs are drawn without repeats from the cached genre indexes in
+    music_app.playlists rather than with ORDER BY RANDOM(). The response
+    carries the seed used; passing it back as ``seed`` replays the playlist.
+    """
+    http_method_names = ['get', 'head', 'options']
+    size = 20
+
+    def get(self, request):
+        try:
+            genres = request.GET.getlist('genre')
+            for genre in genres:
+                if genre not in GENRES:
+                    raise ApiError('Unknown genre %r.' % genre)
+            year_from, year_to = int_param(request, 'from'), int_param(request, 'to')
+            size = max(1, min(int_param(request, 'size') or self.size, MAX_PLAYLIST))
+            seed = int_param(request, 'seed')
+            if seed is not None and seed < 0:
+                raise ApiError('seed must not be negative.')
+        except ApiError as exc:
+            return JsonResponse({'error': str(exc)}, status=exc.status)
+        if seed is None:
+            seed = secrets.randbits(32)
+        songs = playlist(size, genres, year_from, year_to, seed)
+        return JsonResponse({'seed': seed, 'results': [self.serialize(song) for song in songs]})
+
+
+class SongBulkApiView(View):
+    """
+    Edit or delete many songs in one request, e.g.
+    ``{"action": "update", "ids": [1, 2], "genre": "Jazz"}``.
+
+    The whole change runs in one transaction; the response reports how many
+    of the selected songs it touched.
+    """
+    http_method_names = ['post', 'options']
+
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'error': 'The body must be a JSON object.'}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({'error': 'The body must be a JSON object.'}, status=400)
+        form = SongBulkForm(data)
+        if not form.is_valid():
+            return JsonResponse({'error': 'Invalid bulk request.', 'fields': form.errors.get_json_data()}, status=400)
+        return JsonResponse(form.apply())
+
+
+class ArtistListApiView(ArtistResource, ApiListView):
+    pass
+
+
+class ArtistDetailApiView(ArtistResource, ApiDetailView):
+    pass
+
+
+class SongListApiView(SongResource, ApiListView):
+    pass
+
+
+class SongDetailApiView(SongResource, ApiDetailView):
+    pass
+
+
+class AsyncArtistListApiView(ArtistResource, AsyncApiListView):
+    pass
+
+
+class AsyncArtistDetailApiView(ArtistResource, AsyncApiDetailView):
+    pass
+
+
+class AsyncSongListApiView(SongResource, AsyncApiListView):
+    pass
+
+
+class AsyncSongDetailApiView(SongResource, AsyncApiDetailView):
+    pass
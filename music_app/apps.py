@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MusicAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'music_app'
+
+    def ready(self):
+        from music_app import signals  # noqa: F401
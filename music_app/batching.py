@@ -0,0 +1,12 @@
+# Ids or keys bound into one IN (...) or bulk statement. SQLite builds
+# before 3.32 allow only 999 bound parameters per statement, so every list
+# of ids or keys is sent this many at a time, leaving room for the
+# statement's other parameters.
+KEY_CHUNK = 500
+
+
+def chunks(items, size=KEY_CHUNK):
+    """``items`` as lists of at most ``size``."""
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -0,0 +1,296 @@
+import math
+import random
+import time
+import tracemalloc
+from contextlib import contextmanager
+from itertools import count
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.client import MULTIPART_CONTENT
+from django.urls import reverse
+
+from music_app.importer import CatalogImporter
+from music_app.models import Artist, DuplicateGroup, Song
+
+SCALE_SUFFIXES = {'k': 1000, 'm': 1000000}
+SONGS_PER_ARTIST = 20
+GENRES = [value for value, _ in Song.GENRE_CHOICES]
+WORDS = [
+    'love', 'night', 'river', 'golden', 'fire', 'heart', 'dance', 'summer',
+    'blue', 'home', 'rain', 'city', 'dream', 'wild', 'road', 'light',
+]
+
+# A 1x1 GIF for the forms that require an image.
+TINY_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def parse_scale(value):
+    """'1000', '100k' or '1m' -> number of songs."""
+    value = str(value).strip().lower()
+    multiplier = SCALE_SUFFIXES.get(value[-1:], 1)
+    if value[-1:] in SCALE_SUFFIXES:
+        value = value[:-1]
+    try:
+        songs = int(float(value) * multiplier)
+    except ValueError:
+        raise BenchmarkError('Invalid scale %r.' % value)
+    if songs < 1:
+        raise BenchmarkError('A scale needs at least one song.')
+    return songs
+
+
+def synthetic_rows(songs, seed=0):
+    """Deterministic importer rows: ``songs`` songs, SONGS_PER_ARTIST per artist."""
+    rng = random.Random(seed)
+    for i in range(songs):
+        yield {
+            'artist': 'Artist %06d' % (i // SONGS_PER_ARTIST),
+            'artist_nationality': rng.choice(['Ghanaian', 'British', 'American', 'Nigerian']),
+            'artist_label': 'Label %d' % rng.randrange(50),
+            'title': ' '.join(rng.choice(WORDS) for _ in range(3)).title(),
+            'genre': rng.choice(GENRES),
+            'release_year': rng.randrange(1950, 2025),
+            'album': 'Album %d' % rng.randrange(songs // 10 + 1),
+        }
+
+
+def seed_catalog(songs, seed=0, batch_size=5000):
+    return CatalogImporter(batch_size=batch_size).run(synthetic_rows(songs, seed))
+
+
+@contextmanager
+def scratch_database(path, keep=False):
+    """
+    Point the default connection at a fresh database, as the test runner
+    does, so seeding never touches real data. With ``keep`` the file is
+    reused by the next run instead of being rebuilt.
+    """
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_name, old_test_name = connection.settings_dict['NAME'], test_settings.get('NAME')
+    test_settings['NAME'] = path
+    try:
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=keep)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keep)
+    finally:
+        test_settings['NAME'] = old_test_name
+
+
+def middle(model):
+    """A row from the middle of the table, away from any cache-friendly edge."""
+    bounds = model.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        raise BenchmarkError('The catalog has no %s rows.' % model._meta.model_name)
+    return model.objects.filter(pk__gte=(bounds['low'] + bounds['high']) // 2).order_by('pk').first()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class Route:
+    """
+    One request shape to time. ``prepare`` runs untimed before each request
+    and returns (url, data); data is only sent for POSTs, encoded as
+    ``content_type``.
+    """
+
+    def __init__(self, name, url_name, prepare, method='get', expect=200, content_type=MULTIPART_CONTENT):
+        self.name = name
+        self.url_name = url_name
+        self.prepare = prepare
+        self.method = method
+        self.expect = expect
+        self.content_type = content_type
+
+
+def catalog_routes(artist, song):
+    """Routes covering every URL in music_genie/urls.py except the admin."""
+    serial = count()
+
+    def image():
+        return SimpleUploadedFile('bench.gif', TINY_GIF, content_type='image/gif')
+
+    def artist_data(name):
+        return {'name': name, 'age': 40, 'nationality': 'Ghanaian', 'website': 'https://example.com',
+                'label': 'Bench', 'image': image()}
+
+    def song_data(title):
+        return {'genre': GENRES[0], 'title': title, 'release_year': 2001, 'album': 'Bench',
+                'artist': artist.pk}
+
+    def doomed_artist():
+        doomed = Artist.objects.create(name='Doomed %d' % next(serial), nationality='', website='', label='')
+        for i in range(3):
+            Song.objects.create(genre=GENRES[0], title='Doomed song %d' % i, artist=doomed)
+        return reverse('delete_artist', args=[doomed.pk]), None
+
+    def doomed_song():
+        doomed = Song.objects.create(genre=GENRES[0], title='Doomed %d' % next(serial), artist=artist)
+        return reverse('delete_song', args=[doomed.pk]), None
+
+    def duplicate_group():
+        # Stored as dedupe_catalog would, under the artist's current name.
+        name = Artist.objects.values_list('name', flat=True).get(pk=artist.pk)
+        title = 'Twice %d' % next(serial)
+        members = [
+            {'id': Song.objects.create(genre=GENRES[0], title=title, album='Bench', artist=artist).pk,
+             'title': title, 'album': 'Bench', 'artist_id': artist.pk, 'artist_name': name, 'score': 1.0}
+            for _ in range(2)
+        ]
+        group = DuplicateGroup.objects.create(kind=DuplicateGroup.SONG, members=members)
+        return reverse('merge_duplicates'), {'group': [group.pk]}
+
+    def fixed(url_name, *args, **query):
+        url = reverse(url_name, args=args)
+        if query:
+            url += '?' + '&'.join('%s=%s' % item for item in query.items())
+        return lambda: (url, None)
+
+    return [
+        Route('home', 'home', fixed('home')),
+        Route('artist list', 'artists', fixed('artists')),
+        Route('artist detail', 'artist_details', fixed('artist_details', artist.pk)),
+        Route('artist songs', 'artist_songs', fixed('artist_songs', artist.pk)),
+        Route('artist edit', 'artist_details', lambda: (
+            reverse('artist_details', args=[artist.pk]), artist_data('Edited %d' % next(serial))),
+            method='post', expect=302),
+        Route('artist add form', 'add_artist', fixed('add_artist')),
+        Route('artist add', 'add_artist', lambda: (
+            reverse('add_artist'), artist_data('Added %d' % next(serial))), method='post', expect=302),
+        Route('artist delete', 'delete_artist', doomed_artist, method='post', expect=302),
+        Route('song list', 'songs', fixed('songs')),
+        Route('song detail', 'song_details', fixed('song_details', song.pk)),
+        Route('song edit', 'song_details', lambda: (
+            reverse('song_details', args=[song.pk]), song_data('Edited %d' % next(serial))),
+            method='post', expect=302),
+        Route('song add form', 'add_song', fixed('add_song')),
+        Route('song add', 'add_song', lambda: (
+            reverse('add_song'), song_data('Added %d' % next(serial))), method='post', expect=302),
+        Route('song delete', 'delete_song', doomed_song, method='post', expect=302),
+        Route('song bulk update', 'bulk_songs', lambda: (
+            reverse('bulk_songs'), {'action': 'update', 'ids': [song.pk], 'album': 'Bulk %d' % next(serial)}),
+            method='post'),
+        Route('search', 'search', fixed('search', q='love')),
+        Route('stats', 'stats', fixed('stats')),
+        Route('duplicates', 'duplicates', fixed('duplicates')),
+        Route('duplicates merge', 'merge_duplicates', duplicate_group, method='post', expect=302),
+        Route('export songs', 'export', lambda: (reverse('export', args=['songs', 'csv']), None)),
+        Route('api artist list', 'api_artists', fixed('api_artists')),
+        Route('api artist', 'api_artist', fixed('api_artist', artist.pk)),
+        Route('api artist lookup', 'api_artist_lookup', fixed('api_artist_lookup', q='artist 00')),
+        Route('api song list', 'api_songs', fixed('api_songs')),
+        Route('api song', 'api_song', fixed('api_song', song.pk)),
+        Route('api song bulk update', 'api_songs_bulk', lambda: (
+            reverse('api_songs_bulk'), {'action': 'update', 'ids': [song.pk], 'album': 'Bulk %d' % next(serial)}),
+            method='post', content_type='application/json'),
+        Route('api genie', 'api_genie', fixed('api_genie', size=20)),
+    ]
+
+
+class RouteBenchmark:
+    """
+    Time a route through the full middleware stack with the test client.
+
+    Latency samples include reading a streamed body to the end. Peak memory
+    comes from one extra request under tracemalloc, which would otherwise
+    slow down every timed request.
+    """
+
+    def __init__(self, iterations=20, warmup=2):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.client = Client(raise_request_exception=True)
+
+    def request(self, route):
+        url, data = route.prepare()
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            started = time.perf_counter()
+            if route.method == 'post':
+                response = self.client.post(url, data, content_type=route.content_type)
+            else:
+                response = self.client.get(url)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            elapsed = time.perf_counter() - started
+        if response.status_code != route.expect:
+            raise BenchmarkError('%s %s returned %d, expected %d.' % (
+                route.method.upper(), url, response.status_code, route.expect))
+        return elapsed, len(queries), size
+
+    def peak_memory(self, route):
+        tracemalloc.start()
+        try:
+            self.request(route)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def run(self, route):
+        for _ in range(self.warmup):
+            self.request(route)
+        samples, query_counts, sizes = [], [], []
+        for _ in range(self.iterations):
+            elapsed, queries, size = self.request(route)
+            samples.append(elapsed * 1000)
+            query_counts.append(queries)
+            sizes.append(size)
+        return {
+            'route': route.name,
+            'url_name': route.url_name,
+            'method': route.method.upper(),
+            'iterations': self.iterations,
+            'p50_ms': round(percentile(samples, 50), 3),
+            'p95_ms': round(percentile(samples, 95), 3),
+            'max_ms': round(max(samples), 3),
+            'queries': max(query_counts),
+            'bytes': max(sizes),
+            'peak_memory_kb': round(self.peak_memory(route) / 1024, 1),
+        }
+
+
+def compare(baseline, current, threshold=1.25, min_delta_ms=1.0, min_delta_kb=256):
+    """
+    Regressions of ``current`` against ``baseline`` (both benchmark JSON
+    documents). More queries always count; latency and memory count when
+    they grow by more than ``threshold`` times and the absolute floor.
+    """
+    previous = {(r['scale'], r['route']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = previous.get((result['scale'], result['route']))
+        if before is None:
+            continue
+        label = '%s @ %d songs' % (result['route'], result['scale'])
+        if result['queries'] > before['queries']:
+            regressions.append('%s: %d queries, was %d' % (label, result['queries'], before['queries']))
+        if (result['p95_ms'] > before['p95_ms'] * threshold
+                and result['p95_ms'] - before['p95_ms'] > min_delta_ms):
+            regressions.append('%s: p95 %.1fms, was %.1fms' % (label, result['p95_ms'], before['p95_ms']))
+        if (result['peak_memory_kb'] > before['peak_memory_kb'] * threshold
+                and result['peak_memory_kb'] - before['peak_memory_kb'] > min_delta_kb):
+            regressions.append('%s: peak memory %.0fKB, was %.0fKB' % (
+                label, result['peak_memory_kb'], before['peak_memory_kb']))
+    return regressions
@@ -0,0 +1,59 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from music_app.batching import chunks
+from music_app.cache import artist_group, invalidate
+from music_app.deletion import delete_songs
+from music_app.models import Song
+from music_app.stats import COUNTED_FIELDS, apply_artist_deltas, apply_deltas, artist_deltas, song_keys
+
+# Fields a bulk edit may set.
+BULK_FIELDS = ('genre', 'album', 'release_year')
+
+# Most songs one bulk edit may select. The whole selection changes in one
+# transaction, its ids bound KEY_CHUNK at a time.
+MAX_BULK_SONGS = 5000
+
+
+def _count_deltas(groups, changes):
+    deltas = Counter()
+    for genre, release_year, artist_id, songs in groups:
+        for key in song_keys(genre, release_year):
+            deltas[key] -= songs
+        for key in song_keys(changes.get('genre', genre), changes.get('release_year', release_year)):
+            deltas[key] += songs
+    return deltas
+
+
+def update_songs(ids, changes):
+    """
+    Set ``changes`` (a dict over BULK_FIELDS) on the songs with ``ids``, one
+    UPDATE per KEY_CHUNK ids, and return how many rows changed.
+
+    QuerySet.update() sends no signals, so the catalog counts, updated_at
+    and cached pages are brought up to date here, in the same transaction.
+    """
+    groups, updated, now = [], 0, timezone.now()
+    with transaction.atomic():
+        for chunk in chunks(ids):
+            songs = Song.objects.filter(pk__in=chunk)
+            # One row per distinct (genre, year, artist) rather than per song.
+            groups.extend(songs.order_by().values_list(*COUNTED_FIELDS).annotate(songs=Count('id')))
+            updated += songs.update(updated_at=now, **changes)
+        apply_deltas(_count_deltas(groups, changes))
+        changed = [
+            (changes.get('genre', genre), changes.get('release_year', release_year), artist_id, songs)
+            for genre, release_year, artist_id, songs in groups
+        ]
+        apply_artist_deltas(artist_deltas(added=changed, removed=groups))
+        invalidate('songs', 'artists', *{artist_group(artist_id) for _, _, artist_id, _ in groups})
+    return updated
+
+
+def delete_songs_by_id(ids):
+    """Delete the songs with ``ids`` in one transaction and return how many went."""
+    with transaction.atomic():
+        return sum(delete_songs(Song.objects.filter(pk__in=chunk)) for chunk in chunks(ids))
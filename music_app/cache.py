@@ -0,0 +1,167 @@
+import hashlib
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+# Every cached page depends on the "catalog" group plus any narrower groups
+# its view names. Bumping a group swaps its version token, which makes every
+# key built from the old token unreachable; stale entries then age out.
+CATALOG_GROUP = 'catalog'
+VERSION_PREFIX = 'page-cache:version:'
+PAGE_PREFIX = 'page-cache:page:'
+
+# Backends that answer without network I/O, cheaply enough to call on the
+# event loop.
+LOCAL_BACKENDS = (FileBasedCache, LocMemCache, DummyCache)
+
+# Rendered in place of the per-request CSRF token so cached HTML can be
+# shared between visitors; swapped for a fresh token when served.
+CSRF_PLACEHOLDER = 'csrf-token-placeholder-6f1c2b'
+
+
+def get_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def artist_group(pk):
+    return 'artist:%s' % pk
+
+
+def template_pack_group():
+    """Kept apart per crispy template pack, as switching packs changes every form's markup."""
+    return 'crispy:%s' % settings.CRISPY_TEMPLATE_PACK
+
+
+def group_versions(groups):
+    cache = get_cache()
+    keys = [VERSION_PREFIX + group for group in groups]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            token = uuid.uuid4().hex
+            # add() keeps a token another process set in the meantime.
+            if not cache.add(key, token, None):
+                token = cache.get(key, token)
+            versions[key] = token
+    return [versions[key] for key in keys]
+
+
+def _bump(groups):
+    get_cache().set_many({VERSION_PREFIX + group: uuid.uuid4().hex for group in groups}, None)
+
+
+def invalidate(*groups):
+    """
+    Expire every cached page that depends on one of ``groups``.
+
+    Versions are bumped straight away and again once the surrounding
+    transaction commits, so a page re-cached by a concurrent reader before
+    the commit cannot outlive it.
+    """
+    _bump(groups)
+    transaction.on_commit(lambda: _bump(groups))
+
+
+def page_key(request, groups):
+    groups = (CATALOG_GROUP,) + tuple(groups)
+    digest = hashlib.md5(request.get_full_path().encode(), usedforsecurity=False)
+    for version in group_versions(groups):
+        digest.update(version.encode())
+    return PAGE_PREFIX + digest.hexdigest()
+
+
+def fill_csrf(content, request):
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    return content
+
+
+def call_here(func):
+    """Like sync_to_async, but calls ``func`` on the event loop itself."""
+    async def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+    return wrapper
+
+
+class BasePageCacheMixin:
+    cache_groups = ()
+
+    def get_cache_groups(self):
+        return self.cache_groups
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if getattr(self, '_caching_page', False):
+            context['csrf_token'] = CSRF_PLACEHOLDER
+        return context
+
+    def cache_lookup(self, request):
+        """Return the page key and the cached response, or None on a miss."""
+        key = page_key(request, self.get_cache_groups())
+        content = get_cache().get(key)
+        if content is None:
+            self._caching_page = True
+            return key, None
+        response = HttpResponse(fill_csrf(content, request))
+        response['X-Page-Cache'] = 'hit'
+        return key, response
+
+    def cache_store(self, key, response):
+        if hasattr(response, 'render') and not response.is_rendered:
+            # Rendered here rather than after the view returns, so record
+            # the time for ServerTimingMiddleware.
+            started = time.perf_counter()
+            response.render()
+            self.request.render_duration = time.perf_counter() - started
+        content = response.content.decode(response.charset)
+        if response.status_code == 200:
+            get_cache().set(key, content, settings.PAGE_CACHE_TIMEOUT)
+            response['X-Page-Cache'] = 'miss'
+        response.content = fill_csrf(content, self.request)
+        return response
+
+
+class CachedPageMixin(BasePageCacheMixin):
+    """
+    Serve GET requests for a TemplateResponse view from the page cache.
+
+    Subclasses list the invalidation groups their output depends on in
+    ``get_cache_groups()``; signal handlers bump those groups on writes.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not settings.PAGE_CACHE_ENABLED:
+            return super().get(request, *args, **kwargs)
+        key, response = self.cache_lookup(request)
+        if response is None:
+            response = self.cache_store(key, super().get(request, *args, **kwargs))
+        return response
+
+
+class AsyncCachedPageMixin(BasePageCacheMixin):
+    """
+    CachedPageMixin for views with an ``async def get()``.
+
+    Cache lookups stay synchronous for the file and locmem backends, which
+    answer without network I/O, so a thread hop would cost more than the
+    lookup. Other backends, such as redis, are called from a thread.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        if not settings.PAGE_CACHE_ENABLED:
+            return await super().get(request, *args, **kwargs)
+        call = call_here if isinstance(get_cache(), LOCAL_BACKENDS) else sync_to_async
+        key, response = await call(self.cache_lookup)(request)
+        if response is None:
+            response = await super().get(request, *args, **kwargs)
+            response = await call(self.cache_store)(key, response)
+        return response
@@ -0,0 +1,93 @@
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, pre_delete
+
+from music_app.batching import KEY_CHUNK
+from music_app.cache import artist_group, invalidate
+from music_app.models import Song
+from music_app.stats import COUNTED_FIELDS, apply_artist_deltas, apply_deltas, artist_deltas, count_songs
+
+# Songs removed per transaction, so each batch holds the write lock briefly.
+DELETE_BATCH = KEY_CHUNK
+
+
+def signals_handled():
+    """
+    True when a song can be deleted with a plain DELETE: nothing cascades
+    from Song and nothing needs pre_delete, which would have to run before
+    the row goes. post_delete receivers are still called, afterwards.
+    """
+    return not (Song._meta.related_objects or pre_delete.has_listeners(Song))
+
+
+def deleted_in_batch(instance):
+    """
+    True for a song delete_songs() sent post_delete for itself, after
+    updating the counts and expiring the pages the app's own receivers
+    would otherwise see to.
+    """
+    return getattr(instance, '_deleted_in_batch', False)
+
+
+def _raw_delete(ids):
+    # No signals and no cascade collection, only the FTS triggers.
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM %s WHERE %s IN (%s)' % (
+            quote(Song._meta.db_table), quote(Song._meta.pk.column), ', '.join(['%s'] * len(ids))), ids)
+
+
+def _delete_batch(queryset, batch_size, raw):
+    with transaction.atomic():
+        songs = None
+        if raw and post_delete.has_listeners(Song):
+            songs = list(queryset.order_by()[:batch_size])
+            rows = [(song.pk, *(getattr(song, field) for field in COUNTED_FIELDS)) for song in songs]
+        else:
+            rows = list(queryset.order_by().values_list('id', *COUNTED_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        ids = [row[0] for row in rows]
+        if not raw:
+            Song.objects.filter(pk__in=ids).delete()
+            return len(rows)
+        _raw_delete(ids)
+        # The raw delete sends no signals, so update counts and expire
+        # cached pages here, as the post_delete receivers would.
+        deltas = count_songs(row[1:] for row in rows)
+        apply_deltas({key: -count for key, count in deltas.items()})
+        apply_artist_deltas(artist_deltas(removed=[(*row[1:], 1) for row in rows]))
+        invalidate('songs', 'artists', *{artist_group(row[3]) for row in rows})
+        # Then tell the receivers, as QuerySet.delete() would.
+        for song in songs or ():
+            song._deleted_in_batch = True
+            post_delete.send(Song, instance=song, using=queryset.db, origin=queryset)
+            song.pk = None
+    return len(rows)
+
+
+def delete_songs(queryset, batch_size=DELETE_BATCH):
+    """
+    Delete the songs in ``queryset`` a batch at a time and return how many
+    went.
+
+    Unlike QuerySet.delete(), which deletes everything in one transaction
+    and updates counts and pages once per song, each batch commits on its
+    own with one DELETE and one set of count updates. post_delete is then
+    sent for each song, which the app's own receivers ignore. When a pre_delete receiver listens or something
+    cascades from Song, the batches go through QuerySet.delete() instead.
+    """
+    raw = signals_handled()
+    deleted = 0
+    while True:
+        removed = _delete_batch(queryset, batch_size, raw)
+        if not removed:
+            return deleted
+        deleted += removed
+
+
+def delete_artist(artist, batch_size=DELETE_BATCH):
+    """Delete ``artist``, clearing its songs out first in batches."""
+    deleted = delete_songs(Song.objects.filter(artist_id=artist.pk), batch_size)
+    # Only songs added since the last batch are left for the cascade.
+    artist.delete()
+    return deleted
@@ -0,0 +1,345 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from itertools import combinations
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from music_app.batching import KEY_CHUNK, chunks
+from music_app.cache import artist_group, invalidate
+from music_app.deletion import delete_songs
+from music_app.models import Artist, DuplicateGroup, Song
+from music_app.stats import COUNTED_FIELDS, apply_artist_deltas, artist_deltas
+
+# Normalized title characters in the blocking key. Songs are only compared
+# with others by the same (normalized) artist whose titles start alike.
+TITLE_PREFIX = 4
+
+# Lowest title similarity (difflib ratio of normalized titles) that counts
+# as the same song.
+SIMILARITY = 0.9
+
+# Buckets with more distinct titles than this are matched on exact
+# normalized titles only, so one crowded bucket cannot go quadratic.
+MAX_BUCKET = 200
+
+SONG_COLUMNS = ('id', 'title', 'album', 'release_year', 'genre', 'artist_id')
+
+# Details a merged artist's blanks are filled from its duplicates.
+ARTIST_DETAIL_FIELDS = ('age', 'nationality', 'website', 'label', 'image')
+
+# What a stored group keeps of each member: the fields it was matched on,
+# which must be unchanged for the member to be merged, then those it is
+# only shown with.
+MATCHED_FIELDS = {
+    DuplicateGroup.ARTIST: ('name',),
+    DuplicateGroup.SONG: ('title', 'album', 'artist_id', 'artist_name'),
+}
+SHOWN_FIELDS = {
+    DuplicateGroup.ARTIST: ('song_count',),
+    DuplicateGroup.SONG: ('score',),
+}
+
+_PUNCTUATION_RE = re.compile(r'[\W_]+')
+
+
+def normalize(text):
+    """
+    ``text`` folded for comparison: accents dropped, case folded, ``&`` read
+    as "and" and runs of punctuation and spaces collapsed to one space.
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(_PUNCTUATION_RE.sub(' ', text.casefold().replace('&', ' and ')).split())
+
+
+def normalize_artist(name):
+    """normalize() without a leading "the", so "The Band" matches "Band"."""
+    name = normalize(name)
+    return name[4:] if name.startswith('the ') else name
+
+
+def blocking_key(artist_name, title):
+    """The bucket a song is compared in: normalized artist and title prefix."""
+    return normalize_artist(artist_name), normalize(title).replace(' ', '')[:TITLE_PREFIX]
+
+
+def similarity(a, b):
+    return 1.0 if a == b else SequenceMatcher(None, a, b).ratio()
+
+
+def _artist_keeper_order(artist):
+    return -artist['song_count'], artist['id']
+
+
+def find_duplicate_artists():
+    """
+    Groups of artists whose names normalize the same, keeper first: the one
+    with the most songs, then the oldest.
+    """
+    buckets = {}
+    for artist in Artist.objects.order_by().values('id', 'name', 'song_count').iterator(chunk_size=KEY_CHUNK):
+        buckets.setdefault(normalize_artist(artist['name']), []).append(artist)
+    groups = [sorted(artists, key=_artist_keeper_order) for artists in buckets.values() if len(artists) > 1]
+    return sorted(groups, key=lambda group: group[0]['name'].casefold())
+
+
+def _song_keeper_order(song):
+    # The most complete copy wins, then the oldest.
+    return song['album'] in (None, ''), song['release_year'] is None, song['id']
+
+
+def _title_clusters(songs, threshold):
+    """Split one bucket's songs into runs of similar titles."""
+    by_title = {}
+    for song in songs:
+        by_title.setdefault(song['normalized'], []).append(song)
+    titles = list(by_title)
+    parent = list(range(len(titles)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    if 1 < len(titles) <= MAX_BUCKET:
+        for i, j in combinations(range(len(titles)), 2):
+            matcher = SequenceMatcher(None, titles[i], titles[j])
+            if matcher.real_quick_ratio() >= threshold and matcher.ratio() >= threshold:
+                parent[root(j)] = root(i)
+    clusters = {}
+    for i, title in enumerate(titles):
+        clusters.setdefault(root(i), []).extend(by_title[title])
+    return clusters.values()
+
+
+def _album_groups(songs):
+    """
+    Split similar-titled songs by normalized album. Songs without an album
+    join the only album there is, and stay apart when there are several.
+    """
+    albums = {}
+    for song in songs:
+        albums.setdefault(normalize(song['album']), []).append(song)
+    blank = albums.pop('', [])
+    if len(albums) == 1:
+        (only,) = albums.values()
+        only.extend(blank)
+    elif blank:
+        albums[''] = blank
+    return albums.values()
+
+
+def _artist_blocks(size):
+    """
+    ``{artist id: name}`` blocks covering every artist in normalized-name
+    order, about ``size`` artists each. Artists whose names normalize the
+    same always share a block.
+    """
+    clusters = {}
+    for artist_id, name in Artist.objects.order_by().values_list('id', 'name').iterator(chunk_size=KEY_CHUNK):
+        clusters.setdefault(normalize_artist(name), {})[artist_id] = name
+    block = {}
+    for key in sorted(clusters):
+        if block and len(block) + len(clusters[key]) > size:
+            yield block
+            block = {}
+        block.update(clusters.pop(key))
+    if block:
+        yield block
+
+
+def _song_groups(buckets, threshold):
+    groups = []
+    for songs in buckets.values():
+        if len(songs) < 2:
+            continue
+        for cluster in _title_clusters(songs, threshold):
+            for group in _album_groups(cluster):
+                if len(group) < 2:
+                    continue
+                group.sort(key=_song_keeper_order)
+                for song in group:
+                    song['score'] = similarity(group[0]['normalized'], song['normalized'])
+                groups.append(group)
+    return groups
+
+
+def find_duplicate_songs(threshold=SIMILARITY, block_size=KEY_CHUNK):
+    """
+    Groups of songs that look like copies of each other, keeper first, each
+    song carrying its ``artist_name`` and its title ``score`` against the
+    keeper.
+
+    Artists are split into blocks of about ``block_size`` by normalized
+    name, and each block's songs are read and bucketed by blocking_key()
+    on their own, so only one block's songs are held at a time and titles
+    are only compared within a bucket. Within a bucket, titles at least
+    ``threshold`` similar are the same song unless they are on different
+    albums. Songs under duplicate artists share a bucket, as their names
+    normalize the same.
+    """
+    groups = []
+    for names in _artist_blocks(block_size):
+        buckets = {}
+        for ids in chunks(names):
+            songs = Song.objects.filter(artist_id__in=ids).order_by().values(*SONG_COLUMNS)
+            for song in songs.iterator(chunk_size=KEY_CHUNK):
+                song['artist_name'] = names[song['artist_id']]
+                song['normalized'] = normalize(song['title'])
+                buckets.setdefault(blocking_key(song['artist_name'], song['title']), []).append(song)
+        groups.extend(_song_groups(buckets, threshold))
+    return sorted(groups, key=lambda group: (group[0]['normalized'], group[0]['id']))
+
+
+def _fill_blanks(keeper, duplicates):
+    changed = []
+    for field in ARTIST_DETAIL_FIELDS:
+        if getattr(keeper, field) in (None, ''):
+            value = next((getattr(d, field) for d in duplicates if getattr(d, field) not in (None, '')), None)
+            if value is not None:
+                setattr(keeper, field, value.name if field == 'image' else value)
+                changed.append(field)
+    if changed:
+        keeper.save(update_fields=changed + ['updated_at'])
+
+
+def _move_songs(keepers):
+    """
+    Point the songs of each duplicate artist in ``keepers`` (``{duplicate id:
+    keeper id}``) at its keeper, with one UPDATE per keeper, and carry the
+    artist summaries over. Genre and decade counts do not change.
+    """
+    rows = []
+    for chunk in chunks(keepers):
+        songs = Song.objects.filter(artist_id__in=chunk).order_by()
+        rows.extend(songs.values_list(*COUNTED_FIELDS).annotate(songs=Count('id')))
+    by_keeper = {}
+    for duplicate, keeper in keepers.items():
+        by_keeper.setdefault(keeper, []).append(duplicate)
+    now = timezone.now()
+    moved = 0
+    for keeper, duplicates in by_keeper.items():
+        for chunk in chunks(duplicates):
+            moved += Song.objects.filter(artist_id__in=chunk).update(artist_id=keeper, updated_at=now)
+
+    added = [(genre, release_year, keepers[artist_id], songs) for genre, release_year, artist_id, songs in rows]
+    apply_artist_deltas(artist_deltas(added=added, removed=rows))
+    invalidate('songs', 'artists', *{artist_group(pk) for pair in keepers.items() for pk in pair})
+    return moved
+
+
+def merge_artists(groups):
+    """
+    Merge each group of find_duplicate_artists() into its first artist and
+    return how many songs moved.
+
+    The keeper takes over the duplicates' songs and any details it lacks,
+    then the emptied duplicates are deleted, all in one transaction.
+    """
+    keepers = {artist['id']: group[0]['id'] for group in groups for artist in group[1:]}
+    if not keepers:
+        return 0
+    with transaction.atomic():
+        moved = _move_songs(keepers)
+        artists = Artist.objects.in_bulk(set(keepers) | set(keepers.values()))
+        for group in groups:
+            keeper = artists.get(group[0]['id'])
+            duplicates = [artists[a['id']] for a in group[1:] if a['id'] in artists]
+            if keeper is not None:
+                _fill_blanks(keeper, duplicates)
+            for duplicate in duplicates:
+                duplicate.delete()
+    return moved
+
+
+def merge_songs(groups):
+    """Delete every song but the first of each find_duplicate_songs() group and return how many went."""
+    ids = [song['id'] for group in groups for song in group[1:]]
+    if not ids:
+        return 0
+    with transaction.atomic():
+        return sum(delete_songs(Song.objects.filter(pk__in=chunk)) for chunk in chunks(ids))
+
+
+def merge_duplicates(artist_groups, song_groups):
+    """
+    Merge ``artist_groups`` and ``song_groups`` in one transaction and
+    return (songs moved, songs deleted). Duplicate songs go first, so fewer
+    are moved between artists.
+    """
+    with transaction.atomic():
+        deleted = merge_songs(song_groups)
+        moved = merge_artists(artist_groups)
+    return moved, deleted
+
+
+def _stored(kind, group):
+    fields = ('id',) + MATCHED_FIELDS[kind] + SHOWN_FIELDS[kind]
+    return DuplicateGroup(kind=kind, members=[{field: member[field] for field in fields} for member in group])
+
+
+def store_groups(artist_groups, song_groups):
+    """
+    Replace the stored duplicate groups with ``artist_groups`` and
+    ``song_groups`` and return how many were stored.
+    """
+    groups = [_stored(DuplicateGroup.ARTIST, group) for group in artist_groups]
+    groups += [_stored(DuplicateGroup.SONG, group) for group in song_groups]
+    with transaction.atomic():
+        DuplicateGroup.objects.all().delete()
+        DuplicateGroup.objects.bulk_create(groups, batch_size=KEY_CHUNK)
+        invalidate('duplicates')
+    return len(groups)
+
+
+def _live_rows(kind, ids):
+    if kind == DuplicateGroup.ARTIST:
+        rows = Artist.objects.values('id', *MATCHED_FIELDS[kind])
+    else:
+        rows = Song.objects.values('id', 'title', 'album', 'artist_id', artist_name=F('artist__name'))
+    live = {}
+    for chunk in chunks(ids):
+        live.update((row['id'], row) for row in rows.filter(pk__in=chunk).order_by())
+    return live
+
+
+def recheck(groups):
+    """
+    The (artist groups, song groups) of stored ``groups`` still worth
+    merging: only members that exist and whose matched fields are unchanged
+    since they were found, and only groups that keep their keeper and at
+    least one duplicate. Reads just the members' rows, by primary key.
+    """
+    found = {DuplicateGroup.ARTIST: [], DuplicateGroup.SONG: []}
+    for kind, kind_groups in found.items():
+        stored = [group.members for group in groups if group.kind == kind]
+        live = _live_rows(kind, [member['id'] for members in stored for member in members])
+        for members in stored:
+            group = [
+                member for member in members
+                if member['id'] in live
+                and all(live[member['id']][field] == member[field] for field in MATCHED_FIELDS[kind])
+            ]
+            if len(group) > 1 and group[0] is members[0]:
+                kind_groups.append(group)
+    return found[DuplicateGroup.ARTIST], found[DuplicateGroup.SONG]
+
+
+def merge_stored(group_ids):
+    """
+    Merge the stored groups with ``group_ids`` after recheck(), drop them
+    from the store and return (songs moved, songs deleted).
+    """
+    with transaction.atomic():
+        groups = []
+        for chunk in chunks(group_ids):
+            groups.extend(DuplicateGroup.objects.filter(pk__in=chunk))
+        result = merge_duplicates(*recheck(groups))
+        for chunk in chunks([group.pk for group in groups]):
+            DuplicateGroup.objects.filter(pk__in=chunk).delete()
+        invalidate('duplicates')
+    return result
@@ -1,8 +1,103 @@
-from django.forms import ModelForm, TextInput, NumberInput, FileInput
+import json
+
+from django.core.exceptions import ValidationError
+from django.forms import (
+    CharField, ChoiceField, Field, FileInput, Form, IntegerField, ModelForm, MultipleHiddenInput, NumberInput,
+    TextInput, Widget,
+)
+from django.forms.utils import flatatt
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from .bulk import BULK_FIELDS, MAX_BULK_SONGS, delete_songs_by_id, update_songs
 from .models import Artist, Song
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, HTML
 
+# Keeps the hidden artist id in step with the search box: suggestions typed
+# or picked map back to the ids the lookup returned. Each suggestion is an
+# artist_choice(), which is unique even when artists share a name.
+ARTIST_LOOKUP_SCRIPT = """<script>
+(function () {
+  var box = document.getElementById(%(box)s), pk = document.getElementById(%(pk)s);
+  var list = document.getElementById(box.getAttribute('list')), ids = {}, timer;
+  if (pk.value) ids[box.value] = pk.value;
+  box.addEventListener('input', function () {
+    pk.value = ids[box.value] || '';
+    clearTimeout(timer);
+    timer = setTimeout(function () {
+      fetch(box.dataset.lookupUrl + '?q=' + encodeURIComponent(box.value))
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+          list.replaceChildren();
+          data.results.forEach(function (artist) {
+            ids[artist.choice] = artist.id;
+            var option = document.createElement('option');
+            option.value = artist.choice;
+            list.appendChild(option);
+          });
+          pk.value = ids[box.value] || '';
+        });
+    }, 150);
+  });
+})();
+</script>"""
+
+
+def artist_choice(pk, name, label=''):
+    """An artist as the lookup box shows it, e.g. "Burna Boy (Atlantic) #7"."""
+    if label:
+        return '%s (%s) #%d' % (name, label, pk)
+    return '%s #%d' % (name, pk)
+
+
+class ArtistLookupInput(Widget):
+    """
+    Search box for an Artist foreign key.
+
+    Only the selected artist is rendered; suggestions come from the
+    lookup API as the user types, and the chosen id is posted from a hidden
+    input, so ModelChoiceField validates it with a single primary key query.
+    """
+
+    def __init__(self, attrs=None):
+        super().__init__(attrs)
+        # id -> artist_choice(), filled on render or up front by async views.
+        self.names = {}
+
+    def __deepcopy__(self, memo):
+        obj = super().__deepcopy__(memo)
+        obj.names = {}
+        return obj
+
+    def label_for(self, value):
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            return ''
+        if pk not in self.names:
+            row = Artist.objects.filter(pk=pk).values_list('name', 'label').first()
+            self.names[pk] = artist_choice(pk, *row) if row else ''
+        return self.names[pk]
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = self.build_attrs(self.attrs, attrs)
+        box_id = attrs.setdefault('id', 'id_%s' % name)
+        pk_id = box_id + '_pk'
+        attrs.setdefault('placeholder', 'Start typing an artist name')
+        script = ARTIST_LOOKUP_SCRIPT % {
+            'box': json.dumps(box_id).replace('<', '\\u003c'),
+            'pk': json.dumps(pk_id).replace('<', '\\u003c'),
+        }
+        return format_html(
+            '<input type="hidden" name="{}" value="{}" id="{}">'
+            '<input type="search"{} value="{}" list="{}_options" data-lookup-url="{}" autocomplete="off">'
+            '<datalist id="{}_options"></datalist>{}',
+            name, '' if value is None else value, pk_id,
+            flatatt(attrs), self.label_for(value), box_id, reverse('api_artist_lookup'),
+            box_id, mark_safe(script),
+        )
+
 
 class ArtistForm(ModelForm):
     class Meta:
@@ -18,26 +113,87 @@ class ArtistForm(ModelForm):
             'image': FileInput(attrs={'class': "img-thumbnail"})
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
-        self.helper.form_tag = False
-        self.helper.layout = Layout(
-            'name',
-            'age',
-            'nationality',
-            'website',
-            'label',
-            'image',
-            HTML(
-                """{% if form.instance.image %}<img class="img-thumbnail" src="{{ form.instance.image.url }}">{% endif %}""")
-        )
+    # Built once and shared: crispy only reads the helper while rendering.
+    helper = FormHelper()
+    helper.form_tag = False
+    helper.layout = Layout(
+        'name',
+        'age',
+        'nationality',
+        'website',
+        'label',
+        'image',
+        HTML(
+            """{% load artist_images %}{% artist_thumbnail form.instance %}""")
+    )
 
 class SongForm(ModelForm):
     class Meta:
         model = Song
         fields = "__all__"
+        # A <select> would list every artist.
+        widgets = {
+            'artist': ArtistLookupInput(attrs={'class': "form-control"}),
+        }
+
+    helper = FormHelper()
+
+
+class IdListField(Field):
+    """A list of primary keys, posted as repeated fields or a JSON array."""
+    widget = MultipleHiddenInput
+    default_error_messages = {
+        'invalid': 'Song ids must be whole numbers.',
+        'too_many': 'Select at most %(limit)d songs at a time.',
+    }
+
+    def __init__(self, max_length, **kwargs):
+        self.max_length = max_length
+        super().__init__(**kwargs)
+
+    def to_python(self, value):
+        if not value:
+            return []
+        if not isinstance(value, (list, tuple)):
+            raise ValidationError(self.error_messages['invalid'], code='invalid')
+        try:
+            ids = sorted({int(pk) for pk in value})
+        except (TypeError, ValueError):
+            raise ValidationError(self.error_messages['invalid'], code='invalid')
+        if len(ids) > self.max_length:
+            raise ValidationError(self.error_messages['too_many'], code='too_many', params={'limit': self.max_length})
+        return ids
+
+
+class SongBulkForm(Form):
+    """Apply one genre/album/year change to, or delete, many songs at once."""
+    UPDATE = 'update'
+    DELETE = 'delete'
+
+    action = ChoiceField(choices=[(UPDATE, 'Apply changes'), (DELETE, 'Delete')])
+    ids = IdListField(MAX_BULK_SONGS)
+    genre = ChoiceField(choices=[('', 'Keep genre')] + Song.GENRE_CHOICES, required=False)
+    album = CharField(max_length=80, required=False)
+    release_year = IntegerField(required=False)
+
+    def changes(self):
+        return {
+            field: self.cleaned_data[field]
+            for field in BULK_FIELDS if self.cleaned_data.get(field) not in (None, '')
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('action') == self.UPDATE and not self.changes():
+            raise ValidationError('Choose a genre, album or release year to apply.')
+        return cleaned_data
+
+    def apply(self):
+        """Run the action; returns the number of songs selected and affected."""
+        ids = self.cleaned_data['ids']
+        if self.cleaned_data['action'] == self.DELETE:
+            affected = delete_songs_by_id(ids)
+        else:
+            affected = update_songs(ids, self.changes())
+        return {'action': self.cleaned_data['action'], 'selected': len(ids), 'affected': affected}
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.helper = FormHelper()
@@ -0,0 +1,92 @@
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Thumbnails are square crops displayed at THUMBNAIL_SIZE CSS pixels; the
+# larger scales serve high-density screens through srcset.
+THUMBNAIL_SIZE = 96
+THUMBNAIL_SCALES = (1, 2)
+THUMBNAIL_FORMATS = (
+    ('webp', 'WEBP'),
+    ('jpg', 'JPEG'),
+)
+THUMBNAIL_QUALITY = 80
+
+
+def rendition_name(name, width, extension):
+    root, _ = os.path.splitext(name)
+    return '%s.%dx%d.%s' % (root, width, width, extension)
+
+
+def rendition_names(name):
+    return [
+        rendition_name(name, THUMBNAIL_SIZE * scale, extension)
+        for scale in THUMBNAIL_SCALES
+        for extension, _ in THUMBNAIL_FORMATS
+    ]
+
+
+def has_renditions(image):
+    return all(image.storage.exists(n) for n in rendition_names(image.name))
+
+
+def generate_renditions(image):
+    """
+    Write every thumbnail rendition of ``image`` (an ImageFieldFile) next to
+    the original and return their storage names.
+    """
+    storage = image.storage
+    with storage.open(image.name, 'rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original = original.convert('RGB')
+
+    names = []
+    for scale in THUMBNAIL_SCALES:
+        width = THUMBNAIL_SIZE * scale
+        thumbnail = ImageOps.fit(original, (width, width), Image.Resampling.LANCZOS)
+        for extension, fmt in THUMBNAIL_FORMATS:
+            buffer = BytesIO()
+            thumbnail.save(buffer, fmt, quality=THUMBNAIL_QUALITY, optimize=True)
+            name = rendition_name(image.name, width, extension)
+            names.append(save_rendition(storage, name, ContentFile(buffer.getvalue())))
+    return names
+
+
+def save_rendition(storage, name, content):
+    # Rendition names follow from the original's, so they must not be
+    # renamed, whether for a collision or by content addressing.
+    if hasattr(storage, 'save_derived'):
+        return storage.save_derived(name, content)
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, content)
+
+
+def ensure_renditions(image):
+    if not image or has_renditions(image):
+        return
+    try:
+        generate_renditions(image)
+    except (OSError, ValueError):
+        logger.warning('Could not build thumbnails for %s', image.name, exc_info=True)
+
+
+def thumbnail_sources(image):
+    url = image.storage.url
+    sources = {}
+    for extension, _ in THUMBNAIL_FORMATS:
+        sources[extension] = ', '.join(
+            '%s %dx' % (url(rendition_name(image.name, THUMBNAIL_SIZE * scale, extension)), scale)
+            for scale in THUMBNAIL_SCALES
+        )
+    return {
+        'src': url(rendition_name(image.name, THUMBNAIL_SIZE, 'jpg')),
+        'webp_srcset': sources['webp'],
+        'jpeg_srcset': sources['jpg'],
+        'size': THUMBNAIL_SIZE,
+    }
@@ -0,0 +1,174 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+
+from music_app.cache import CATALOG_GROUP, invalidate
+from music_app.models import Artist, Song
+from music_app.stats import apply_artist_deltas, apply_deltas, artist_deltas, count_songs
+
+GENRES = {value for value, _ in Song.GENRE_CHOICES}
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_csv(stream):
+    for row in csv.DictReader(stream):
+        yield row
+
+
+def read_ndjson(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield RowError('invalid JSON: %s' % exc)
+            continue
+        if not isinstance(row, dict):
+            yield RowError('expected a JSON object')
+            continue
+        yield row
+
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+}
+
+
+def _text(row, key, max_length, required=False):
+    value = row.get(key)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise RowError('missing %s' % key)
+    if len(value) > max_length:
+        raise RowError('%s longer than %d characters' % (key, max_length))
+    return value
+
+
+def _integer(row, key):
+    value = row.get(key)
+    if value is None or str(value).strip() == '':
+        return None
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise RowError('%s is not a whole number' % key)
+
+
+def _field_length(model, name):
+    return model._meta.get_field(name).max_length
+
+
+def parse_row(row):
+    """Validate one input row and return (artist_name, artist_fields, song_fields)."""
+    if isinstance(row, RowError):
+        raise row
+    genre = _text(row, 'genre', _field_length(Song, 'genre'), required=True)
+    if genre not in GENRES:
+        raise RowError('unknown genre %r' % genre)
+    song = {
+        'title': _text(row, 'title', _field_length(Song, 'title'), required=True),
+        'genre': genre,
+        'release_year': _integer(row, 'release_year'),
+        'album': _text(row, 'album', _field_length(Song, 'album')) or None,
+    }
+    name = _text(row, 'artist', _field_length(Artist, 'name'), required=True)
+    artist = {
+        'age': _integer(row, 'artist_age'),
+        'nationality': _text(row, 'artist_nationality', _field_length(Artist, 'nationality')),
+        'website': _text(row, 'artist_website', _field_length(Artist, 'website')),
+        'label': _text(row, 'artist_label', _field_length(Artist, 'label')),
+    }
+    return name, artist, song
+
+
+class CatalogImporter:
+    """
+    Load songs (and any artists they mention) from an iterable of rows.
+
+    Rows are consumed ``batch_size`` at a time and each batch is written
+    with bulk_create() inside its own transaction, so memory stays flat
+    apart from the name -> id map of artists.
+    """
+
+    def __init__(self, batch_size=5000, on_batch=None, on_error=None):
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+        self.on_error = on_error
+        self.rows = 0
+        self.songs_created = 0
+        self.artists_created = 0
+        self.skipped = 0
+        self.artist_ids = {}
+
+    def load_artist_map(self):
+        # Iterate newest first so the oldest row wins when names repeat.
+        names = Artist.objects.order_by('-id').values_list('name', 'id')
+        self.artist_ids = dict(names.iterator())
+
+    def run(self, rows):
+        self.load_artist_map()
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+            if self.on_batch:
+                self.on_batch(self)
+        return self
+
+    def _parse(self, batch):
+        parsed = []
+        for row in batch:
+            self.rows += 1
+            try:
+                parsed.append(parse_row(row))
+            except RowError as exc:
+                self.skipped += 1
+                if self.on_error:
+                    self.on_error(self.rows, exc)
+        return parsed
+
+    def _create_artists(self, parsed):
+        new_artists = {}
+        for name, fields, _ in parsed:
+            if name not in self.artist_ids and name not in new_artists:
+                new_artists[name] = Artist(name=name, **fields)
+        if not new_artists:
+            return
+        created = Artist.objects.bulk_create(new_artists.values(), batch_size=self.batch_size)
+        if all(artist.pk is not None for artist in created):
+            self.artist_ids.update((artist.name, artist.pk) for artist in created)
+        else:
+            # Backends that cannot return ids from bulk inserts.
+            lookup = Artist.objects.filter(name__in=list(new_artists)).values_list('name', 'id')
+            for name, pk in lookup:
+                self.artist_ids.setdefault(name, pk)
+        self.artists_created += len(created)
+
+    def import_batch(self, batch):
+        parsed = self._parse(batch)
+        if not parsed:
+            return
+        with transaction.atomic():
+            self._create_artists(parsed)
+            songs = [
+                Song(artist_id=self.artist_ids[name], **fields)
+                for name, _, fields in parsed
+            ]
+            Song.objects.bulk_create(songs, batch_size=self.batch_size)
+            # bulk_create() sends no signals, so update counts and expire
+            # cached pages here.
+            rows = [(s.genre, s.release_year, s.artist_id) for s in songs]
+            apply_deltas(count_songs(rows))
+            apply_artist_deltas(artist_deltas(added=[(*row, 1) for row in rows]))
+            invalidate(CATALOG_GROUP)
+        self.songs_created += len(songs)
@@ -0,0 +1,123 @@
+import json
+import os
+import platform
+import tempfile
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from music_app.benchmarks import (
+    BenchmarkError,
+    RouteBenchmark,
+    catalog_routes,
+    compare,
+    middle,
+    parse_scale,
+    scratch_database,
+    seed_catalog,
+)
+from music_app.models import Artist, Song
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed synthetic catalogs in a scratch database and time every route '
+        'with the test client, recording p50/p95 latency, query count, bytes '
+        'and peak memory as JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', action='append', default=[],
+                            help='Catalog size in songs, e.g. 1k, 100k, 1m (repeatable; default 1k).')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per route.')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per route first.')
+        parser.add_argument('--route', action='append', default=[], help='Only run routes with this name (repeatable).')
+        parser.add_argument('--output', help='Write the results here as JSON ("-" for stdout).')
+        parser.add_argument('--compare', metavar='BASELINE', help='Fail if results regress against this JSON file.')
+        parser.add_argument('--threshold', type=float, default=1.25,
+                            help='Allowed p95 and peak memory growth factor for --compare.')
+        parser.add_argument('--workdir', help='Directory for the scratch databases and uploads (default: a temp dir).')
+        parser.add_argument('--keep-db', action='store_true',
+                            help='Keep seeded databases in --workdir and reuse them on the next run.')
+        parser.add_argument('--page-cache', action='store_true', help='Leave the page cache on (measures cache hits).')
+
+    def handle(self, *args, **options):
+        try:
+            scales = [parse_scale(scale) for scale in options['scale'] or ['1k']]
+        except BenchmarkError as exc:
+            raise CommandError(exc)
+        if options['keep_db'] and not options['workdir']:
+            raise CommandError('--keep-db needs a --workdir to keep the databases in.')
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        workdir = options['workdir'] or tempfile.mkdtemp(prefix='music-genie-bench-')
+        os.makedirs(workdir, exist_ok=True)
+        report = {
+            'meta': {
+                'started': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': connection.Database.sqlite_version,
+                'iterations': options['iterations'],
+                'page_cache': options['page_cache'],
+            },
+            'results': [],
+        }
+        settings = override_settings(
+            PAGE_CACHE_ENABLED=options['page_cache'],
+            MEDIA_ROOT=os.path.join(workdir, 'media'),
+        )
+        with settings:
+            for songs in scales:
+                report['results'] += self.run_scale(songs, workdir, options)
+
+        output = json.dumps(report, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(output)
+        elif options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write('Wrote %s' % options['output'])
+
+        if baseline is not None:
+            regressions = compare(baseline, report, threshold=options['threshold'])
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR('!! %s' % regression))
+            if regressions:
+                raise CommandError('%d regressions against %s.' % (len(regressions), options['compare']))
+            self.stdout.write(self.style.SUCCESS('No regressions against %s.' % options['compare']))
+
+    def run_scale(self, songs, workdir, options):
+        path = os.path.join(workdir, 'catalog-%d.sqlite3' % songs)
+        with scratch_database(path, keep=options['keep_db']):
+            existing = Song.objects.count()
+            if existing != songs:
+                if existing:
+                    raise CommandError('%s holds %d songs, not %d; remove it to reseed.' % (path, existing, songs))
+                started = time.perf_counter()
+                seed_catalog(songs)
+                self.stderr.write('Seeded %d songs in %.1fs' % (songs, time.perf_counter() - started))
+
+            routes = catalog_routes(middle(Artist), middle(Song))
+            if options['route']:
+                routes = [route for route in routes if route.name in options['route']]
+            bench = RouteBenchmark(options['iterations'], options['warmup'])
+            results = []
+            self.stdout.write('%d songs' % songs)
+            for route in routes:
+                try:
+                    result = bench.run(route)
+                except BenchmarkError as exc:
+                    raise CommandError(exc)
+                result['scale'] = songs
+                results.append(result)
+                self.stdout.write('  %-16s %4s  p50 %8.2fms  p95 %8.2fms  %3d queries  %9d bytes  %8.1fKB peak' % (
+                    route.name, result['method'], result['p50_ms'], result['p95_ms'],
+                    result['queries'], result['bytes'], result['peak_memory_kb']))
+            return results
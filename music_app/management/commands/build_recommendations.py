@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from music_app.recommendations import RECOMMENDATIONS, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild every artist\'s genre/decade profile and "more like this" list from the song table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=RECOMMENDATIONS,
+            help='Similar artists kept per artist (default: %d).' % RECOMMENDATIONS,
+        )
+
+    def handle(self, *args, **options):
+        artists = rebuild(options['limit'])
+        self.stdout.write('Built recommendations for %d artist(s).' % artists)
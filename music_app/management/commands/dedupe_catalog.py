@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from music_app.duplicates import (
+    SIMILARITY, find_duplicate_artists, find_duplicate_songs, merge_duplicates, store_groups,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Find artists and songs that differ only in case, accents or punctuation, and store the groups for '
+        '/duplicates/ or merge them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=SIMILARITY,
+                            help='Lowest title similarity, 0-1, for two songs to match (default %(default)s).')
+        parser.add_argument('--merge', action='store_true',
+                            help='Merge every group into its first entry, in one transaction.')
+
+    def handle(self, *args, **options):
+        if not 0 < options['threshold'] <= 1:
+            raise CommandError('--threshold must be between 0 and 1.')
+        artist_groups = find_duplicate_artists()
+        song_groups = find_duplicate_songs(options['threshold'])
+        for group in artist_groups:
+            keeper, duplicates = group[0], group[1:]
+            self.stdout.write('artist %d %r <- %s' % (
+                keeper['id'], keeper['name'], ', '.join('%d %r' % (a['id'], a['name']) for a in duplicates)))
+        for group in song_groups:
+            keeper, duplicates = group[0], group[1:]
+            self.stdout.write('song %d %r <- %s' % (
+                keeper['id'], keeper['title'],
+                ', '.join('%d %r (%.2f)' % (s['id'], s['title'], s['score']) for s in duplicates)))
+        self.stdout.write('%d duplicate artist group(s), %d duplicate song group(s).' % (
+            len(artist_groups), len(song_groups)))
+        if options['merge']:
+            moved, deleted = merge_duplicates(artist_groups, song_groups)
+            self.stdout.write('Merged: %d song(s) moved to their artist, %d duplicate song(s) deleted.' % (
+                moved, deleted))
+            artist_groups = song_groups = []
+        stored = store_groups(artist_groups, song_groups)
+        self.stdout.write('Stored %d group(s) for /duplicates/.' % stored)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from music_app.models import Artist
+from music_app.storage import is_addressed
+
+
+class Command(BaseCommand):
+    help = 'Re-store artist images saved before content addressing under their content hash.'
+
+    def handle(self, *args, **options):
+        moved = repointed = failed = 0
+        storage = Artist._meta.get_field('image').storage
+        names = (
+            Artist.objects.exclude(image='').exclude(image__isnull=True)
+            .order_by().values_list('image', flat=True).distinct()
+        )
+        for name in list(names):
+            if is_addressed(name):
+                continue
+            try:
+                with storage.open(name, 'rb') as original:
+                    new_name = storage.save(name, original)
+            except OSError as exc:
+                failed += 1
+                self.stderr.write('%s: %s' % (name, exc))
+                continue
+            moved += 1
+            # Saving each artist rebuilds renditions, expires its pages and
+            # hands the old file to the usual media cleanup.
+            for artist in Artist.objects.filter(image=name):
+                artist.image.name = new_name
+                artist.save(update_fields=['image', 'updated_at'])
+                repointed += 1
+        self.stdout.write(
+            'Stored %d image(s) by content, %d artist(s) repointed, %d failed.' % (moved, repointed, failed)
+        )
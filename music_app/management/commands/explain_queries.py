@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from music_app.models import Artist, Song
+from music_app.query_plans import (
+    ACCESS_PATHS,
+    capture_selects,
+    explain,
+    find_problems,
+    queryset_sql,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Request each catalog page, run EXPLAIN QUERY PLAN on every SELECT it '
+        'issues (plus the registered access paths) and flag full table scans '
+        'and unindexed sorts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', action='append', default=[], help='Extra URL to check (repeatable).')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Exit with an error when a problem is found.')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print plans for queries without problems too.')
+
+    def default_urls(self):
+        urls = [reverse('artists'), reverse('songs'), reverse('search') + '?q=love']
+        artist = Artist.objects.order_by('id').first()
+        if artist:
+            urls.append(reverse('artist_details', kwargs={'pk': artist.pk}))
+        song = Song.objects.order_by('id').first()
+        if song:
+            urls.append(reverse('song_details', kwargs={'pk': song.pk}))
+        urls += [reverse('add_song'), reverse('duplicates'), reverse('api_genie') + '?size=20']
+        return urls
+
+    def collect(self, urls):
+        client = Client()
+        seen = set()
+        # Cached pages issue no SQL, so render everything fresh.
+        with override_settings(PAGE_CACHE_ENABLED=False):
+            for url in urls:
+                with capture_selects() as queries:
+                    response = client.get(url)
+                if response.status_code != 200:
+                    self.stderr.write('%s returned %d' % (url, response.status_code))
+                for sql, params in queries:
+                    if sql not in seen:
+                        seen.add(sql)
+                        yield url, sql, params
+        for name, build in ACCESS_PATHS.items():
+            sql, params = queryset_sql(build())
+            yield name, sql, params
+
+    def handle(self, *args, **options):
+        checked = flagged = 0
+        for source, sql, params in self.collect(self.default_urls() + options['url']):
+            checked += 1
+            plan = explain(sql, params)
+            problems = find_problems(plan)
+            if problems:
+                flagged += 1
+                self.stdout.write(self.style.WARNING('[%s] %s' % (source, sql)))
+                for problem in problems:
+                    self.stdout.write(self.style.ERROR('    !! %s' % problem))
+            elif options['verbose_plans']:
+                self.stdout.write('[%s] %s' % (source, sql))
+            if problems or options['verbose_plans']:
+                for detail in plan:
+                    self.stdout.write('    %s' % detail)
+
+        summary = 'Checked %d queries, %d with problems.' % (checked, flagged)
+        if flagged and options['fail_on_scan']:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary) if not flagged else summary)
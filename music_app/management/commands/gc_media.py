@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from music_app.media import collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Delete artist images and thumbnails that no artist references.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be removed without deleting.')
+        parser.add_argument(
+            '--min-age', type=int, default=None,
+            help='Spare files modified in the last N seconds (default: MEDIA_GC_MIN_AGE).',
+        )
+
+    def handle(self, *args, **options):
+        files, size = collect_garbage(dry_run=options['dry_run'], min_age=options['min_age'])
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        self.stdout.write('%s %d orphaned file(s), %d bytes.' % (verb, files, size))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from music_app.images import generate_renditions, has_renditions
+from music_app.models import Artist
+
+
+class Command(BaseCommand):
+    help = 'Build missing artist thumbnail renditions (use --force to rebuild all).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild renditions that already exist.')
+
+    def handle(self, *args, **options):
+        built = failed = 0
+        artists = Artist.objects.exclude(image='').exclude(image__isnull=True).only('id', 'image')
+        for artist in artists.iterator():
+            if not options['force'] and has_renditions(artist.image):
+                continue
+            try:
+                generate_renditions(artist.image)
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write('%s: %s' % (artist.image.name, exc))
+            else:
+                built += 1
+        self.stdout.write('Built thumbnails for %d image(s), %d failed.' % (built, failed))
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from music_app.importer import READERS, CatalogImporter
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream songs from a CSV or NDJSON file into the catalog. Each row needs '
+        'artist, title and genre; release_year, album and artist_age, '
+        'artist_nationality, artist_website, artist_label are optional. '
+        'Unknown artists are created on first sight.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' to read standard input.")
+        parser.add_argument('--format', choices=sorted(READERS), help='Input format (default: from the file extension).')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows written per transaction.')
+        parser.add_argument('--max-errors', type=int, default=20, help='Number of rejected rows to report individually.')
+
+    def get_format(self, path, fmt):
+        if fmt:
+            return fmt
+        extension = os.path.splitext(path)[1].lower().lstrip('.')
+        if extension in ('json', 'jsonl'):
+            extension = 'ndjson'
+        if extension not in READERS:
+            raise CommandError('Cannot tell the format of %r; pass --format.' % path)
+        return extension
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        reader = READERS[self.get_format(path, options['format'])]
+        started = time.monotonic()
+
+        def report_batch(importer):
+            elapsed = max(time.monotonic() - started, 1e-9)
+            self.stdout.write('%d rows read, %d songs imported, %d skipped (%.0f rows/s)' % (
+                importer.rows, importer.songs_created, importer.skipped, importer.rows / elapsed,
+            ))
+
+        def report_error(line, error):
+            if importer.skipped <= options['max_errors']:
+                self.stderr.write('Row %d skipped: %s' % (line, error))
+
+        importer = CatalogImporter(
+            batch_size=options['batch_size'],
+            on_batch=report_batch,
+            on_error=report_error,
+        )
+        if path == '-':
+            importer.run(reader(sys.stdin))
+        else:
+            try:
+                stream = open(path, newline='', encoding='utf-8')
+            except OSError as exc:
+                raise CommandError(exc)
+            with stream:
+                importer.run(reader(stream))
+
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(self.style.SUCCESS(
+            'Imported %d songs and %d new artists from %d rows in %.1fs (%.0f rows/s), %d skipped.' % (
+                importer.songs_created, importer.artists_created, importer.rows,
+                elapsed, importer.rows / elapsed, importer.skipped,
+            )
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from music_app.stats import find_drift, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-genre and per-decade song counts from the song table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report drift; exit non-zero if any is found.')
+
+    def handle(self, *args, **options):
+        drift = find_drift() if options['check'] else rebuild()
+        for (dimension, key), (stored, actual) in sorted(drift.items()):
+            self.stdout.write('%s %r: stored %d, actual %d' % (dimension, key, stored, actual))
+        if options['check']:
+            if drift:
+                raise CommandError('%d count(s) have drifted.' % len(drift))
+            self.stdout.write('Catalog counts are up to date.')
+        else:
+            self.stdout.write('Rebuilt catalog counts, %d had drifted.' % len(drift))
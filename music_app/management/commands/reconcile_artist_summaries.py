@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from music_app.stats import find_artist_drift, rebuild_artist_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute each artist's song count, latest release year and genre mix from the song table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report drift; exit non-zero if any is found.')
+
+    def handle(self, *args, **options):
+        drift = find_artist_drift() if options['check'] else rebuild_artist_summaries()
+        for artist_id, (stored, actual) in sorted(drift.items()):
+            self.stdout.write('artist %d: stored %r, actual %r' % (artist_id, stored, actual))
+        if options['check']:
+            if drift:
+                raise CommandError('%d artist summary(s) have drifted.' % len(drift))
+            self.stdout.write('Artist summaries are up to date.')
+        else:
+            self.stdout.write('Reconciled artist summaries, %d had drifted.' % len(drift))
@@ -0,0 +1,121 @@
+import logging
+import os
+import posixpath
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from music_app.images import rendition_names
+from music_app.models import Artist
+
+logger = logging.getLogger(__name__)
+
+# Referenced names are read from the database this many rows at a time.
+REFERENCE_CHUNK = 2000
+
+
+def image_field():
+    return Artist._meta.get_field('image')
+
+
+def referenced_names():
+    """Storage names of every artist image and its thumbnail renditions."""
+    names = set()
+    images = (
+        Artist.objects.exclude(image='').exclude(image__isnull=True)
+        .order_by().values_list('image', flat=True)
+    )
+    for name in images.iterator(chunk_size=REFERENCE_CHUNK):
+        names.add(name)
+        names.update(rendition_names(name))
+    return names
+
+
+def scan(storage, directory):
+    """
+    Yield ``(name, stat)`` for every file under ``directory``.
+
+    Directories are read lazily with os.scandir(), one at a time, so memory
+    stays flat however many files there are.
+    """
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(storage.path(current)) as entries:
+                for entry in entries:
+                    name = posixpath.join(current, entry.name)
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(name)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield name, entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+
+
+def orphaned_files(min_age=None):
+    """
+    Yield ``(name, size)`` for each file in the artist image directory that
+    no artist references, directly or as a thumbnail.
+
+    Files modified in the last ``min_age`` seconds are skipped: they may
+    belong to an upload whose row is not committed yet.
+    """
+    if min_age is None:
+        min_age = settings.MEDIA_GC_MIN_AGE
+    field = image_field()
+    referenced = referenced_names()
+    cutoff = time.time() - min_age
+    for name, stat in scan(field.storage, field.upload_to.rstrip('/')):
+        if name not in referenced and stat.st_mtime <= cutoff:
+            yield name, stat.st_size
+
+
+def collect_garbage(dry_run=False, min_age=None):
+    """
+    Delete orphaned artist images and return ``(files, bytes)`` removed, or
+    that would be removed with ``dry_run``.
+    """
+    storage = image_field().storage
+    files = size = 0
+    for name, file_size in orphaned_files(min_age):
+        if not dry_run:
+            storage.delete(name)
+        files += 1
+        size += file_size
+    return files, size
+
+
+def discard_unreferenced(name):
+    """
+    Delete image ``name`` and its renditions unless an artist still uses it
+    or it was written recently. Returns True if the files were deleted.
+    """
+    storage = image_field().storage
+    if Artist.objects.filter(image=name).exists():
+        return False
+    try:
+        modified = os.stat(storage.path(name)).st_mtime
+    except FileNotFoundError:
+        return False
+    # A recent write may be a duplicate upload now sharing this file.
+    if modified > time.time() - settings.MEDIA_GC_MIN_AGE:
+        return False
+    for path in [name, *rendition_names(name)]:
+        storage.delete(path)
+    return True
+
+
+def discard_on_commit(name):
+    """Once the transaction commits, delete image ``name`` if nothing uses it."""
+    if not name or not settings.MEDIA_CLEANUP_ON_COMMIT:
+        return
+
+    def discard():
+        try:
+            discard_unreferenced(name)
+        except OSError:
+            logger.warning('Could not remove %s', name, exc_info=True)
+
+    transaction.on_commit(discard)
@@ -0,0 +1,26 @@
+# Generated by Django 4.1.13 on 2026-10-17 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0013_alter_song_genre'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='song',
+            name='genre',
+            field=models.CharField(choices=[('Afrobeats', 'Afrobeats'), ('Pop', 'Pop'), ('Jazz', 'Jazz'), ('Hip Hop', 'Hip Hop'), ('Gospel', 'Gospel'), ('R&B', 'R&B'), ('Classical', 'Classical'), ('Techno', 'Techno'), ('Rock', 'Rock'), ('Country', 'Country'), ('Indie Rock', 'Indie Rock'), ('Electro', 'Electro'), ('House', 'House'), ('Instrumental', 'Instrumental'), ('Soul', 'Soul'), ('Garage', 'Garage')], max_length=60),
+        ),
+        migrations.AddIndex(
+            model_name='artist',
+            index=models.Index(fields=['name', 'id'], name='artist_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['title', 'id'], name='song_title_id_idx'),
+        ),
+    ]
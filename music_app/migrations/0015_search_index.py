@@ -0,0 +1,42 @@
+from django.db import migrations
+
+from music_app.migrations._search_triggers import ARTIST_TRIGGERS, SONG_TRIGGERS
+
+# FTS5 tables are kept in sync by triggers rather than Django signals so
+# that bulk_create(), QuerySet.update() and cascading deletes are covered too.
+SONG_FTS = [
+    """CREATE VIRTUAL TABLE music_app_song_fts USING fts5(
+        title, album, artist, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    *SONG_TRIGGERS.values(),
+    """INSERT INTO music_app_song_fts (rowid, title, album, artist)
+    SELECT s.id, s.title, coalesce(s.album, ''), a.name
+    FROM music_app_song s JOIN music_app_artist a ON a.id = s.artist_id""",
+]
+
+ARTIST_FTS = [
+    """CREATE VIRTUAL TABLE music_app_artist_fts USING fts5(
+        name, label, nationality, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    *ARTIST_TRIGGERS.values(),
+    """INSERT INTO music_app_artist_fts (rowid, name, label, nationality)
+    SELECT id, name, label, nationality FROM music_app_artist""",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0014_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            SONG_FTS,
+            reverse_sql=['DROP TRIGGER %s' % name for name in SONG_TRIGGERS] + ['DROP TABLE music_app_song_fts'],
+        ),
+        migrations.RunSQL(
+            ARTIST_FTS,
+            reverse_sql=['DROP TRIGGER %s' % name for name in ARTIST_TRIGGERS] + ['DROP TABLE music_app_artist_fts'],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.1.13 on 2026-10-17 16:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from music_app.migrations._search_triggers import create_triggers, drop_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0015_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_triggers, create_triggers),
+        migrations.AlterModelOptions(
+            name='artist',
+            options={'ordering': ['name', 'id'], 'verbose_name': 'Artist', 'verbose_name_plural': 'Artists'},
+        ),
+        migrations.AlterModelOptions(
+            name='song',
+            options={'ordering': ['title', 'id'], 'verbose_name': 'Song', 'verbose_name_plural': 'Songs'},
+        ),
+        migrations.AlterField(
+            model_name='song',
+            name='artist',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='music_app.artist'),
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['artist', 'title', 'id'], name='song_artist_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['artist', 'release_year'], name='song_artist_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['genre', 'release_year'], name='song_genre_year_idx'),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.1.13 on 2026-10-17 16:12
+
+from django.db import migrations, models
+
+
+def populate_counts(apps, schema_editor):
+    Song = apps.get_model('music_app', 'Song')
+    CatalogCount = apps.get_model('music_app', 'CatalogCount')
+    songs = Song.objects.order_by()
+    counts = []
+    for genre, total in songs.values_list('genre').annotate(total=models.Count('id')):
+        counts.append(CatalogCount(dimension='genre', key=genre, count=total))
+    decades = songs.annotate(decade=models.F('release_year') / 10 * 10).values_list('decade')
+    for decade, total in decades.annotate(total=models.Count('id')):
+        counts.append(CatalogCount(dimension='decade', key='' if decade is None else str(decade), count=total))
+    CatalogCount.objects.bulk_create(counts, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0016_song_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('genre', 'Genre'), ('decade', 'Decade')], max_length=10)),
+                ('key', models.CharField(blank=True, max_length=60)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Catalog count',
+                'verbose_name_plural': 'Catalog counts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='catalogcount',
+            index=models.Index(fields=['dimension', '-count'], name='catalog_count_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='catalogcount',
+            constraint=models.UniqueConstraint(fields=('dimension', 'key'), name='catalog_count_key_uniq'),
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
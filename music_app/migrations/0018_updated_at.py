@@ -0,0 +1,31 @@
+# Generated by Django 4.1.13 on 2026-10-17 16:14
+
+from django.db import migrations, models
+
+from music_app.migrations._search_triggers import create_triggers, drop_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0017_catalog_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_triggers, create_triggers),
+        migrations.AddField(
+            model_name='artist',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['genre', 'id'], name='song_genre_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.13 on 2026-10-17 17:11
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0018_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artist',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('id'), name='artist_name_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.1.13 on 2026-10-17 17:18
+
+from django.db import migrations, models
+import music_app.storage
+
+from music_app.migrations._search_triggers import create_triggers, drop_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0019_artist_name_prefix_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_triggers, create_triggers),
+        migrations.AlterField(
+            model_name='artist',
+            name='image',
+            field=models.ImageField(null=True, storage=music_app.storage.ContentAddressedStorage(), upload_to='images/', verbose_name=''),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.1.13 on 2026-10-17 17:24
+
+from django.db import migrations, models
+
+from music_app.migrations._search_triggers import create_triggers, drop_triggers
+
+
+def populate_summaries(apps, schema_editor):
+    Song = apps.get_model('music_app', 'Song')
+    Artist = apps.get_model('music_app', 'Artist')
+    rows = Song.objects.order_by().values_list('artist_id', 'genre')
+    summaries = {}
+    for artist_id, genre, total, latest in rows.annotate(total=models.Count('id'), latest=models.Max('release_year')):
+        count, previous, genres = summaries.get(artist_id, (0, None, {}))
+        genres[genre] = total
+        if previous is not None and (latest is None or previous > latest):
+            latest = previous
+        summaries[artist_id] = (count + total, latest, genres)
+    artists = [
+        Artist(pk=artist_id, song_count=count, latest_release_year=latest, genre_counts=genres)
+        for artist_id, (count, latest, genres) in summaries.items()
+    ]
+    Artist.objects.bulk_update(artists, ['song_count', 'latest_release_year', 'genre_counts'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0020_artist_image_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_triggers, create_triggers),
+        migrations.AddField(
+            model_name='artist',
+            name='genre_counts',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='artist',
+            name='latest_release_year',
+            field=models.IntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='artist',
+            name='song_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+        migrations.AddIndex(
+            model_name='artist',
+            index=models.Index(fields=['-song_count', 'name', 'id'], name='artist_song_count_idx'),
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
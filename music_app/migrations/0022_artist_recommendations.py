@@ -0,0 +1,43 @@
+# Generated by Django 4.1.13 on 2026-10-17 17:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0021_artist_song_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtistProfile',
+            fields=[
+                ('artist', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profile', serialize=False, to='music_app.artist')),
+                ('vector', models.BinaryField()),
+            ],
+            options={
+                'verbose_name': 'Artist profile',
+                'verbose_name_plural': 'Artist profiles',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArtistSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('artist', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='music_app.artist')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='music_app.artist')),
+            ],
+            options={
+                'verbose_name': 'Artist similarity',
+                'verbose_name_plural': 'Artist similarities',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='artistsimilarity',
+            constraint=models.UniqueConstraint(fields=('artist', 'rank'), name='artist_similarity_rank_uniq'),
+        ),
+    ]
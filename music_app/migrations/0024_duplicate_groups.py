@@ -0,0 +1,29 @@
+# Generated by Django 4.1.13 on 2026-10-17 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0022_artist_recommendations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('artist', 'Artist'), ('song', 'Song')], max_length=10)),
+                ('members', models.JSONField()),
+            ],
+            options={
+                'verbose_name': 'Duplicate group',
+                'verbose_name_plural': 'Duplicate groups',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='duplicategroup',
+            index=models.Index(fields=['kind', 'id'], name='duplicate_group_page_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-17 18:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0024_duplicate_groups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['genre', 'updated_at'], name='song_genre_updated_idx'),
+        ),
+    ]
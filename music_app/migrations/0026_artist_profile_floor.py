@@ -0,0 +1,35 @@
+# Generated by Django 4.1.13 on 2026-10-17 18:19
+
+from django.db import migrations, models
+
+
+def set_floors(apps, schema_editor):
+    ArtistProfile = apps.get_model('music_app', 'ArtistProfile')
+    ArtistSimilarity = apps.get_model('music_app', 'ArtistSimilarity')
+    # Full lists held ten artists when this migration was written; shorter
+    # lists keep the default floor of 0.
+    lists = ArtistSimilarity.objects.order_by().values_list('artist_id')
+    lists = lists.annotate(entries=models.Count('id'), lowest=models.Min('score')).filter(entries__gte=10)
+    profiles = [ArtistProfile(artist_id=artist_id, floor=lowest) for artist_id, _, lowest in lists]
+    ArtistProfile.objects.bulk_update(profiles, ['floor'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music_app', '0025_song_genre_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artistprofile',
+            name='floor',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='artistprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(set_floors, migrations.RunPython.noop),
+    ]
@@ -1,24 +1,93 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.fields.files import FieldFile
+from django.db.models.functions import Lower
 
+from music_app.storage import ContentAddressedStorage
 
-class Artist(models.Model):
+
+class LoadedValuesMixin:
+    """Remember the stored field values so save() hooks can tell what changed."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def loaded_value(self, field_name):
+        return getattr(self, '_loaded_values', {}).get(field_name)
+
+    def remember_loaded_values(self):
+        self._loaded_values = {
+            f.attname: self._stored_value(self.__dict__[f.attname])
+            for f in self._meta.concrete_fields if f.attname in self.__dict__
+        }
+
+    @staticmethod
+    def _stored_value(value):
+        # Keep file names, as from_db() does, not the FieldFile, which may
+        # be renamed in place later.
+        return value.name if isinstance(value, FieldFile) else value
+
+
+class Artist(LoadedValuesMixin, models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField('', max_length=100, null=False)
     age = models.IntegerField('', null=True)
     nationality = models.CharField('', max_length=200)
     website = models.CharField('', max_length=100)
     label = models.CharField('', max_length=200)
-    image = models.ImageField('', upload_to='images/', null=True)
+    # Stored under a hash of its bytes, so identical uploads share one file.
+    image = models.ImageField('', upload_to='images/', null=True, storage=ContentAddressedStorage())
+    # Row version for API ETags; QuerySet.update() must set it explicitly.
+    updated_at = models.DateTimeField(auto_now=True)
+    # Summary of the artist's songs, kept up to date in the same transaction
+    # as every song change by music_app.stats.apply_artist_deltas().
+    song_count = models.IntegerField(default=0, editable=False)
+    latest_release_year = models.IntegerField(null=True, editable=False)
+    genre_counts = models.JSONField(default=dict, editable=False)
+
+    SUMMARY_FIELDS = ('song_count', 'latest_release_year', 'genre_counts')
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # Never write back a summary that songs saved since this copy
+            # was loaded have moved on from.
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.SUMMARY_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        self.remember_loaded_values()
+
+    def genre_mix(self, limit=3):
+        """The artist's most common genres, most songs first."""
+        return sorted(self.genre_counts, key=lambda genre: (-self.genre_counts[genre], genre))[:limit]
+
     class Meta:
         verbose_name = 'Artist'
         verbose_name_plural = 'Artists'
+        ordering = ['name', 'id']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='artist_name_id_idx'),
+            # Case-insensitive name prefix lookups for the artist autocomplete.
+            models.Index(Lower('name'), F('id'), name='artist_name_lower_idx'),
+            # Artist list sorted by catalog size.
+            models.Index(fields=['-song_count', 'name', 'id'], name='artist_song_count_idx'),
+        ]
+
+
+class SongQuerySet(models.QuerySet):
 
+    def with_artist(self):
+        return self.select_related('artist')
 
-class Song(models.Model):
+
+class Song(LoadedValuesMixin, models.Model):
     GENRE_CHOICES = [
         ('Afrobeats', 'Afrobeats'),
         ('Pop', 'Pop'),
@@ -43,19 +112,147 @@ class Song(models.Model):
     title = models.CharField(max_length=100)
     release_year = models.IntegerField(null=True)
     album = models.CharField(max_length=80, null=True)
-    artist = models.ForeignKey(Artist, on_delete=models.CASCADE)
+    # Indexed through the composite (artist, ...) indexes below.
+    artist = models.ForeignKey(Artist, on_delete=models.CASCADE, db_index=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = SongQuerySet.as_manager()
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # The post_save catalog count updates must commit with the row.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+        self.remember_loaded_values()
+
     class Meta:
         verbose_name = "Song"
         verbose_name_plural = "Songs"
+        ordering = ['title', 'id']
+        indexes = [
+            models.Index(fields=['title', 'id'], name='song_title_id_idx'),
+            models.Index(fields=['artist', 'title', 'id'], name='song_artist_title_idx'),
+            models.Index(fields=['artist', 'release_year'], name='song_artist_year_idx'),
+            models.Index(fields=['genre', 'release_year'], name='song_genre_year_idx'),
+            # API listings page each genre in id order.
+            models.Index(fields=['genre', 'id'], name='song_genre_id_idx'),
+            # The newest change per genre, which versions the playlist indexes.
+            models.Index(fields=['genre', 'updated_at'], name='song_genre_updated_idx'),
+        ]
 
+    # Load songs through Song.objects.with_artist() when reading this for
+    # many rows, otherwise each access costs an Artist query.
     @property
     def artistName(self):
         return self.artist.name
 
     @property
     def artistId(self):
-        return self.artist.id
+        return self.artist_id
+
+
+class CatalogCount(models.Model):
+    """
+    Number of songs per genre and release decade. Per-artist counts live on
+    Artist.song_count.
+
+    Kept up to date by the Song signals in music_app.stats, so the stats
+    page reads a handful of rows instead of grouping the whole song table.
+    """
+    GENRE = 'genre'
+    DECADE = 'decade'
+    DIMENSION_CHOICES = [
+        (GENRE, 'Genre'),
+        (DECADE, 'Decade'),
+    ]
+
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=60, blank=True)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return '%s %s: %d' % (self.dimension, self.key, self.count)
+
+    class Meta:
+        verbose_name = 'Catalog count'
+        verbose_name_plural = 'Catalog counts'
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='catalog_count_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['dimension', '-count'], name='catalog_count_rank_idx'),
+        ]
+
+
+class ArtistProfile(models.Model):
+    """
+    An artist's genre/decade feature vector, stored as float32 bytes.
+
+    Built from their songs by music_app.recommendations, which compares
+    these vectors to find similar artists. ``floor`` is the score another
+    artist must beat to enter this artist's list, 0 while the list has
+    room, and ``updated_at`` lets each process reload only changed rows.
+    """
+    artist = models.OneToOneField(Artist, on_delete=models.CASCADE, primary_key=True, related_name='profile')
+    vector = models.BinaryField()
+    floor = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Artist profile'
+        verbose_name_plural = 'Artist profiles'
+
+
+class ArtistSimilarity(models.Model):
+    """
+    One entry of an artist's "more like this" list: the artist ranked
+    ``rank`` (0 = most similar) and its cosine similarity.
+
+    The (artist, rank) constraint doubles as the index the artist page reads
+    its list through.
+    """
+    artist = models.ForeignKey(Artist, on_delete=models.CASCADE, related_name='similarities', db_index=False)
+    rank = models.PositiveSmallIntegerField()
+    similar = models.ForeignKey(Artist, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    def __str__(self):
+        return '%s #%d: %s' % (self.artist_id, self.rank, self.similar_id)
+
+    class Meta:
+        verbose_name = 'Artist similarity'
+        verbose_name_plural = 'Artist similarities'
+        constraints = [
+            models.UniqueConstraint(fields=['artist', 'rank'], name='artist_similarity_rank_uniq'),
+        ]
+
+
+class DuplicateGroup(models.Model):
+    """
+    Artists or songs the dedupe_catalog command found to look like copies
+    of each other, stored for the duplicates page to list and merge.
+
+    ``members`` is the group as found, keeper first: each entry's id and the
+    fields it was matched on, which a merge re-checks against the live rows.
+    """
+    ARTIST = 'artist'
+    SONG = 'song'
+    KIND_CHOICES = [
+        (ARTIST, 'Artist'),
+        (SONG, 'Song'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    members = models.JSONField()
+
+    def __str__(self):
+        return '%s group of %d' % (self.kind, len(self.members))
+
+    class Meta:
+        verbose_name = 'Duplicate group'
+        verbose_name_plural = 'Duplicate groups'
+        indexes = [
+            models.Index(fields=['kind', 'id'], name='duplicate_group_page_idx'),
+        ]
@@ -0,0 +1,177 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.http import Http404
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    if not all(isinstance(v, (str, int, float)) for v in values):
+        raise InvalidCursor(cursor)
+    return values
+
+
+class KeysetPage:
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over a unique ordering such as ('title', 'id').
+
+    Each page is fetched with a range condition on the ordering columns, so
+    with a matching index every page costs the same as the first one.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.fields = tuple(f.lstrip('-') for f in self.ordering)
+        self.per_page = per_page
+
+    def _reversed(self):
+        return tuple(f[1:] if f.startswith('-') else '-' + f for f in self.ordering)
+
+    def _after(self, values, ordering):
+        # (a, b) > (x, y) is written as a >= x AND (a > x OR b > y), which
+        # lets SQLite seek the index on the leading column.
+        condition = None
+        for i in reversed(range(len(ordering))):
+            field = ordering[i].lstrip('-')
+            strict = '%s__%s' % (field, 'lt' if ordering[i].startswith('-') else 'gt')
+            loose = '%s__%s' % (field, 'lte' if ordering[i].startswith('-') else 'gte')
+            if condition is None:
+                condition = Q(**{strict: values[i]})
+            else:
+                condition = Q(**{loose: values[i]}) & (Q(**{strict: values[i]}) | condition)
+        return condition
+
+    def cursor_for(self, obj):
+        # Rows may be model instances or dicts from .values().
+        if isinstance(obj, dict):
+            return encode_cursor(obj[field] for field in self.fields)
+        return encode_cursor(getattr(obj, field) for field in self.fields)
+
+    def _fetch(self, ordering, cursor):
+        queryset = self.queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self._after(decode_cursor(cursor, len(self.fields)), ordering))
+        return queryset[:self.per_page + 1]
+
+    def _build(self, rows, after, before):
+        extra = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if before is not None:
+            rows.reverse()
+            has_next, has_previous = bool(rows), extra
+        else:
+            has_next, has_previous = extra, after is not None
+        return KeysetPage(
+            rows,
+            has_next=has_next,
+            has_previous=has_previous,
+            next_cursor=self.cursor_for(rows[-1]) if has_next and rows else None,
+            previous_cursor=self.cursor_for(rows[0]) if has_previous and rows else None,
+        )
+
+    def page(self, after=None, before=None):
+        if before is not None:
+            rows = list(self._fetch(self._reversed(), before))
+        else:
+            rows = list(self._fetch(self.ordering, after))
+        return self._build(rows, after, before)
+
+    async def apage(self, after=None, before=None):
+        if before is not None:
+            rows = [obj async for obj in self._fetch(self._reversed(), before)]
+        else:
+            rows = [obj async for obj in self._fetch(self.ordering, after)]
+        return self._build(rows, after, before)
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin replacing OFFSET pagination with ?after=/?before= cursors.
+    """
+    keyset_ordering = ('id',)
+    # Other orderings offered through ?sort=<name>; each needs its own index.
+    keyset_orderings = {}
+    sort_kwarg = 'sort'
+    paginate_by = 50
+    max_paginate_by = 200
+    page_size_kwarg = 'page_size'
+
+    def get_paginate_by(self, queryset):
+        try:
+            size = int(self.request.GET.get(self.page_size_kwarg, self.paginate_by))
+        except ValueError:
+            size = self.paginate_by
+        return max(1, min(size, self.max_paginate_by))
+
+    def get_keyset_ordering(self):
+        return self.keyset_orderings.get(self.request.GET.get(self.sort_kwarg), self.keyset_ordering)
+
+    def _page_url(self, param, cursor):
+        query = self.request.GET.copy()
+        query.pop('after', None)
+        query.pop('before', None)
+        query[param] = cursor
+        return '?' + query.urlencode()
+
+    def _finish_page(self, paginator, page):
+        page.next_url = self._page_url('after', page.next_cursor) if page.has_next else None
+        page.previous_url = self._page_url('before', page.previous_cursor) if page.has_previous else None
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, self.get_keyset_ordering(), page_size)
+        try:
+            page = paginator.page(
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before'),
+            )
+        except InvalidCursor:
+            raise Http404('Invalid page cursor.')
+        return self._finish_page(paginator, page)
+
+    async def apaginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, self.get_keyset_ordering(), page_size)
+        try:
+            page = await paginator.apage(
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before'),
+            )
+        except InvalidCursor:
+            raise Http404('Invalid page cursor.')
+        return self._finish_page(paginator, page)
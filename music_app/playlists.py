@@ -0,0 +1,100 @@
+import numpy as np
+from django.db.models import OuterRef, Subquery
+
+from music_app.models import CatalogCount, Song
+
+GENRES = [genre for genre, _ in Song.GENRE_CHOICES]
+
+# Longest playlist one request may ask for.
+MAX_PLAYLIST = 100
+
+# Stands in for a missing release year; sorts before every real year, so
+# any year bound leaves those songs out.
+NO_YEAR = -1
+
+# {genre: (version, years, ids)} for this process, checked against
+# index_versions() before each use.
+_indexes = {}
+
+
+def index_versions(genres):
+    """
+    ``{genre: (song count, newest updated_at)}`` for ``genres``, in one query.
+
+    Read from the database rather than a cache, so every worker sees every
+    write: adding or deleting a song changes its genre's CatalogCount, and
+    any other change moves updated_at. Each genre costs one row of the
+    counts table and one seek of the (genre, updated_at) index.
+    """
+    latest = Song.objects.filter(genre=OuterRef('key')).order_by('-updated_at').values('updated_at')[:1]
+    rows = CatalogCount.objects.filter(dimension=CatalogCount.GENRE, key__in=list(genres))
+    rows = rows.annotate(latest=Subquery(latest)).values_list('key', 'count', 'latest')
+    return {key: (count, latest) for key, count, latest in rows}
+
+
+def genre_index(genre, versions=None):
+    """
+    ``(years, ids)`` arrays for every ``genre`` song, ordered by release year
+    then id, with NO_YEAR for songs without one.
+
+    Built with one covering scan of the (genre, release_year) index and kept
+    in process memory while the genre's entry in ``versions`` (default
+    index_versions() for just this genre) stays the same.
+    """
+    if versions is None:
+        versions = index_versions([genre])
+    version = versions.get(genre)
+    cached = _indexes.get(genre)
+    if cached is not None and cached[0] == version:
+        return cached[1:]
+    rows = Song.objects.filter(genre=genre).order_by('release_year', 'id').values_list('release_year', 'id')
+    rows = list(rows)
+    years = np.array([NO_YEAR if year is None else year for year, _ in rows], dtype=np.int32)
+    ids = np.array([pk for _, pk in rows], dtype=np.int64)
+    _indexes[genre] = (version, years, ids)
+    return years, ids
+
+
+def year_range(years, year_from=None, year_to=None):
+    """Positions ``[start, stop)`` of the songs released between the bounds, inclusive."""
+    if year_from is None and year_to is None:
+        return 0, len(years)
+    start = int(np.searchsorted(years, max(year_from or 0, 0), side='left'))
+    stop = len(years) if year_to is None else int(np.searchsorted(years, year_to, side='right'))
+    return start, max(start, stop)
+
+
+def sample_ids(size, genres=None, year_from=None, year_to=None, seed=None):
+    """
+    Up to ``size`` distinct song ids drawn uniformly from the songs of
+    ``genres`` (default all) released between ``year_from`` and ``year_to``.
+
+    The matching songs are contiguous slices of the genre indexes, found by
+    binary search, and only the ``size`` drawn positions are turned into
+    ids. The draw itself is O(matching songs) in time and memory, as NumPy
+    samples without replacement from the whole range. The same ``seed``
+    gives the same ids until the songs change. A genre named twice is
+    sampled once.
+    """
+    genres = list(dict.fromkeys(genres or GENRES))
+    slices = []
+    versions = index_versions(genres)
+    for genre in genres:
+        years, ids = genre_index(genre, versions)
+        start, stop = year_range(years, year_from, year_to)
+        if stop > start:
+            slices.append(ids[start:stop])
+    total = sum(len(ids) for ids in slices)
+    if not total:
+        return []
+    picks = np.random.default_rng(seed).choice(total, size=min(size, total), replace=False)
+    offsets = np.cumsum([0] + [len(ids) for ids in slices])
+    owners = np.searchsorted(offsets, picks, side='right') - 1
+    return [int(slices[owner][pick - offsets[owner]]) for owner, pick in zip(owners, picks)]
+
+
+def playlist(size, genres=None, year_from=None, year_to=None, seed=None):
+    """The songs sample_ids() draws, with their artists, in drawn order."""
+    ids = sample_ids(size, genres, year_from, year_to, seed)
+    songs = Song.objects.with_artist().in_bulk(ids)
+    return [songs[pk] for pk in ids if pk in songs]
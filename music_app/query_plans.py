@@ -0,0 +1,71 @@
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+
+from music_app.models import Artist, Song
+from music_app.recommendations import similar_artists
+from music_app.search import artists_by_prefix
+
+# Filter shapes the catalog needs to serve from an index, beyond the ones
+# the views issue. Each entry builds a representative queryset; order_by()
+# drops Meta.ordering where only the filter matters.
+ACCESS_PATHS = {
+    'songs by genre and year range': lambda: Song.objects.filter(
+        genre='Pop', release_year__gte=1990, release_year__lt=2000).order_by(),
+    'songs by artist and year': lambda: Song.objects.filter(
+        artist_id=1, release_year=2020).order_by(),
+    'songs by artist, newest first': lambda: Song.objects.filter(
+        artist_id=1).order_by('-release_year'),
+    'API songs by genre': lambda: Song.objects.filter(genre='Pop').order_by('id')[:51],
+    'songs by title': lambda: Song.objects.filter(title='Hello'),
+    'artists by name': lambda: Artist.objects.filter(name='Adele'),
+    'artists by name prefix': lambda: artists_by_prefix('Ad'),
+    'artists by song count': lambda: Artist.objects.order_by('-song_count', 'name', 'id')[:51],
+    'similar artists': lambda: similar_artists(1),
+    'playlist genre index': lambda: Song.objects.filter(genre='Pop').order_by(
+        'release_year', 'id').values_list('release_year', 'id'),
+}
+
+# "SCAN t" is a full table scan; "SCAN t USING [COVERING] INDEX i" walks an
+# index in order (fine under a LIMIT) and virtual tables plan their own
+# lookups.
+FULL_SCAN_RE = re.compile(r'^SCAN (?!CONSTANT ROW)(\S+)(?!.*\b(USING|VIRTUAL TABLE)\b)')
+TEMP_SORT_RE = re.compile(r'USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)')
+
+
+def explain(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def find_problems(plan):
+    # Full-text matches are ordered by a computed rank, which always needs a
+    # sort over the (already narrowed) matches.
+    ranked = any('VIRTUAL TABLE' in detail for detail in plan)
+    problems = []
+    for detail in plan:
+        if FULL_SCAN_RE.search(detail):
+            problems.append('full scan: %s' % detail)
+        elif TEMP_SORT_RE.search(detail) and not ranked:
+            problems.append('unindexed sort: %s' % detail)
+    return problems
+
+
+@contextmanager
+def capture_selects():
+    """Record (sql, params) for every SELECT run inside the block."""
+    queries = []
+
+    def record(execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT'):
+            queries.append((sql, tuple(params or ())))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        yield queries
+
+
+def queryset_sql(queryset):
+    return queryset.query.sql_with_params()
@@ -0,0 +1,298 @@
+import datetime
+import logging
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from music_app.batching import KEY_CHUNK, chunks
+from music_app.cache import CATALOG_GROUP, artist_group, invalidate
+from music_app.models import Artist, ArtistProfile, ArtistSimilarity, Song
+
+logger = logging.getLogger(__name__)
+
+# Length of each artist's "more like this" list.
+RECOMMENDATIONS = 10
+
+# Artists scored against the whole catalog per matrix product; bounds the
+# (batch x artists) score matrix held in memory.
+SCORE_BATCH = 1024
+
+GENRES = [genre for genre, _ in Song.GENRE_CHOICES]
+GENRE_INDEX = {genre: i for i, genre in enumerate(GENRES)}
+# Songs before the first decade or after the last count towards it.
+FIRST_DECADE = 1950
+LAST_DECADE = 2020
+DECADES = range(FIRST_DECADE, LAST_DECADE + 10, 10)
+DIMENSIONS = len(GENRES) + len(DECADES)
+
+# How much the genre and era mixes weigh in the similarity. Stored vectors
+# bake these in: run build_recommendations after changing them.
+GENRE_WEIGHT = 1.0
+DECADE_WEIGHT = 0.5
+
+DTYPE = np.float32
+
+# Rows committed after a newer one was read can carry a slightly older
+# updated_at (a writer may wait up to the busy timeout for the lock), so
+# each sync re-reads this much before the newest row it has seen.
+SYNC_OVERLAP = datetime.timedelta(seconds=5)
+
+# (ids, matrix, floors, newest updated_at) of every stored profile, held by
+# this process between refreshes and synced by profiles().
+_profiles = {}
+
+
+def count_features(artist_ids=None, song_model=Song):
+    """
+    ``{artist_id: counts}`` with each artist's song count per genre, then per
+    decade, from one GROUP BY over the songs (per chunk of ``artist_ids``).
+    """
+    songs = song_model.objects.order_by()
+    batches = [songs] if artist_ids is None else [songs.filter(artist_id__in=chunk) for chunk in chunks(artist_ids)]
+    counts = {}
+    for batch in batches:
+        rows = batch.annotate(decade=F('release_year') / 10 * 10).values_list('artist_id', 'genre', 'decade')
+        for artist_id, genre, decade, songs in rows.annotate(songs=Count('id')):
+            vector = counts.get(artist_id)
+            if vector is None:
+                vector = counts[artist_id] = np.zeros(DIMENSIONS, dtype=DTYPE)
+            if genre in GENRE_INDEX:
+                vector[GENRE_INDEX[genre]] += songs
+            if decade is not None:
+                decade = min(max(decade, FIRST_DECADE), LAST_DECADE)
+                vector[len(GENRES) + (decade - FIRST_DECADE) // 10] += songs
+    return counts
+
+
+def feature_vector(counts):
+    """Weighted genre and decade shares of ``counts``, scaled to unit length."""
+    vector = np.zeros(DIMENSIONS, dtype=DTYPE)
+    for part, weight in ((slice(0, len(GENRES)), GENRE_WEIGHT), (slice(len(GENRES), DIMENSIONS), DECADE_WEIGHT)):
+        total = counts[part].sum()
+        if total:
+            vector[part] = weight * counts[part] / total
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def load_profiles(since=None):
+    """
+    The stored profiles as (artist ids, unit-row matrix, floors, newest
+    updated_at), in id order; only those updated at or after ``since`` if
+    it is given.
+    """
+    rows = ArtistProfile.objects.order_by('artist_id')
+    if since is not None:
+        rows = rows.filter(updated_at__gte=since)
+    ids, vectors, floors, latest = [], [], [], None
+    for artist_id, vector, floor, updated_at in rows.values_list(
+            'artist_id', 'vector', 'floor', 'updated_at').iterator(chunk_size=KEY_CHUNK * 4):
+        ids.append(artist_id)
+        vectors.append(np.frombuffer(bytes(vector), dtype=DTYPE))
+        floors.append(floor)
+        if latest is None or updated_at > latest:
+            latest = updated_at
+    matrix = np.vstack(vectors) if vectors else np.zeros((0, DIMENSIONS), dtype=DTYPE)
+    return np.array(ids, dtype=np.int64), matrix, np.array(floors, dtype=DTYPE), latest
+
+
+def _keep(profiles, mask):
+    ids, matrix, floors, latest = profiles
+    return ids[mask], matrix[mask], floors[mask], latest
+
+
+def profiles(forget=()):
+    """
+    Every stored profile as (artist ids, unit-row matrix, floors), in id order.
+
+    The first call loads them all; later ones read only the rows updated
+    since the newest this process has seen, plus the bare ids when the row
+    count shows that some were deleted. ``forget`` names profiles the
+    caller has just deleted itself, which saves reading the ids.
+    """
+    total = ArtistProfile.objects.count()
+    cached = _profiles.get('all')
+    if cached is None or cached[3] is None:
+        cached = load_profiles()
+    else:
+        if forget:
+            cached = _keep(cached, ~np.isin(cached[0], list(forget)))
+        ids, matrix, floors, latest = cached
+        new_ids, new_matrix, new_floors, new_latest = load_profiles(latest - SYNC_OVERLAP)
+        if len(new_ids):
+            kept = ~np.isin(ids, new_ids)
+            ids = np.concatenate([ids[kept], new_ids])
+            order = np.argsort(ids, kind='stable')
+            cached = (
+                ids[order],
+                np.vstack([matrix[kept], new_matrix])[order],
+                np.concatenate([floors[kept], new_floors])[order],
+                max(latest, new_latest),
+            )
+        if len(cached[0]) != total:
+            present = ArtistProfile.objects.values_list('artist_id', flat=True).iterator(chunk_size=KEY_CHUNK * 4)
+            cached = _keep(cached, np.isin(cached[0], np.fromiter(present, dtype=np.int64)))
+    _profiles['all'] = cached
+    return cached[:3]
+
+
+def top_similar(query_ids, ids, matrix, k=RECOMMENDATIONS):
+    """
+    Yield ``(artist_id, [(similar_id, score), ...])`` with the ``k`` best
+    cosine matches of each artist in ``query_ids``, best first.
+
+    Rows are unit length, so one matrix product per SCORE_BATCH artists
+    gives all their similarities. Artists never match themselves, and
+    matches sharing nothing (score 0) are left out.
+    """
+    if not len(ids):
+        return
+    position = {artist_id: i for i, artist_id in enumerate(ids.tolist())}
+    query_ids = [artist_id for artist_id in query_ids if artist_id in position]
+    k = min(k, len(ids) - 1)
+    for start in range(0, len(query_ids), SCORE_BATCH):
+        batch = query_ids[start:start + SCORE_BATCH]
+        rows = np.array([position[artist_id] for artist_id in batch])
+        scores = matrix[rows] @ matrix.T
+        scores[np.arange(len(rows)), rows] = -np.inf
+        if k <= 0:
+            for artist_id in batch:
+                yield artist_id, []
+            continue
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        for artist_id, columns, values in zip(batch, best, best_scores):
+            yield artist_id, [
+                (int(ids[column]), float(score)) for column, score in zip(columns, values) if score > 0
+            ]
+
+
+def _similarity_rows(lists):
+    return [
+        ArtistSimilarity(artist_id=artist_id, rank=rank, similar_id=similar_id, score=score)
+        for artist_id, matches in lists
+        for rank, (similar_id, score) in enumerate(matches)
+    ]
+
+
+def _floor(matches, k):
+    return matches[-1][1] if len(matches) >= k else 0.0
+
+
+def _profile_rows(counts, floors=None):
+    floors = floors or {}
+    return [
+        ArtistProfile(artist_id=artist_id, vector=feature_vector(vector).tobytes(), floor=floors.get(artist_id, 0.0))
+        for artist_id, vector in counts.items()
+    ]
+
+
+def rebuild(k=RECOMMENDATIONS):
+    """Recompute every profile and similarity list; returns the number of artists profiled."""
+    with transaction.atomic():
+        counts = count_features()
+        ids = np.array(sorted(counts), dtype=np.int64)
+        vectors = [feature_vector(counts[artist_id]) for artist_id in ids.tolist()]
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, DIMENSIONS), dtype=DTYPE)
+        lists = list(top_similar(ids.tolist(), ids, matrix, k))
+        ArtistProfile.objects.all().delete()
+        ArtistProfile.objects.bulk_create(
+            _profile_rows(counts, {a: _floor(matches, k) for a, matches in lists}), batch_size=KEY_CHUNK)
+        ArtistSimilarity.objects.all().delete()
+        ArtistSimilarity.objects.bulk_create(_similarity_rows(lists), batch_size=KEY_CHUNK)
+        invalidate(CATALOG_GROUP)
+    # Every row is new: reload them all on the next refresh.
+    _profiles.clear()
+    return len(ids)
+
+
+def _best_scores(matrix, rows):
+    """Each profile's best score against the profiles at ``rows``, SCORE_BATCH rows per product."""
+    best = np.zeros(len(matrix), dtype=DTYPE)
+    for start in range(0, len(rows), SCORE_BATCH):
+        np.maximum(best, (matrix @ matrix[rows[start:start + SCORE_BATCH]].T).max(axis=1), out=best)
+    return best
+
+
+def refresh(artist_ids, k=RECOMMENDATIONS):
+    """
+    Update the recommendations after the songs of ``artist_ids`` changed.
+
+    Their vectors are rebuilt from their songs alone and scored against the
+    profiles this process keeps in memory, which reads back only the rows
+    that changed. Then only the lists the change can reach are recomputed:
+    theirs, those that include one of them, and those another artist should
+    now enter, because its new score beats the list's stored floor.
+    """
+    changed = set(artist_ids)
+    try:
+        with transaction.atomic():
+            counts = count_features(changed)
+            live = set()
+            for chunk in chunks(changed):
+                ArtistProfile.objects.filter(artist_id__in=chunk).delete()
+                live.update(Artist.objects.filter(pk__in=chunk).values_list('pk', flat=True))
+            live &= counts.keys()
+            ArtistProfile.objects.bulk_create(
+                _profile_rows({a: counts[a] for a in live}), batch_size=KEY_CHUNK)
+            ids, matrix, floors = profiles(forget=changed - live)
+
+            stale = set(changed)
+            for chunk in chunks(changed):
+                stale.update(ArtistSimilarity.objects.filter(similar_id__in=chunk).values_list('artist_id', flat=True))
+            rows = np.flatnonzero(np.isin(ids, list(changed)))
+            if len(rows):
+                stale.update(ids[_best_scores(matrix, rows) > floors].tolist())
+
+            lists = list(top_similar(sorted(stale), ids, matrix, k))
+            for chunk in chunks(stale):
+                ArtistSimilarity.objects.filter(artist_id__in=chunk).delete()
+            ArtistSimilarity.objects.bulk_create(_similarity_rows(lists), batch_size=KEY_CHUNK)
+            now = timezone.now()
+            ArtistProfile.objects.bulk_update(
+                [ArtistProfile(artist_id=a, floor=_floor(matches, k), updated_at=now) for a, matches in lists],
+                ['floor', 'updated_at'], batch_size=KEY_CHUNK)
+            invalidate(*{artist_group(artist_id) for artist_id in stale})
+    except Exception:
+        # The kept profiles may hold rows that were rolled back.
+        _profiles.clear()
+        raise
+    return stale
+
+
+def refresh_on_commit(artist_ids):
+    """
+    With RECOMMENDATIONS_LIVE on, refresh() the recommendations of
+    ``artist_ids`` once the transaction commits.
+
+    The refresh runs in the thread that made the change. It reads the
+    changed artists' songs and profiles, and the lists they can reach, but
+    still scores them against every profile in memory.
+    """
+    if not settings.RECOMMENDATIONS_LIVE:
+        return
+    artist_ids = set(artist_ids)
+
+    def update():
+        try:
+            refresh(artist_ids)
+        except Exception:
+            # The write has committed and the lists are only hints;
+            # build_recommendations repairs them.
+            logger.warning('Could not refresh recommendations for %s', sorted(artist_ids), exc_info=True)
+
+    transaction.on_commit(update)
+
+
+def similar_artists(artist_id):
+    """(id, name, score) of the artists most like ``artist_id``, best first."""
+    return (
+        ArtistSimilarity.objects.filter(artist_id=artist_id).order_by('rank')
+        .values_list('similar_id', 'similar__name', 'score')
+    )
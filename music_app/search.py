@@ -0,0 +1,69 @@
+import re
+import string
+
+from django.db import connection
+from django.db.models.functions import Lower
+
+from music_app.models import Artist, Song
+
+# bm25() column weights: a hit in a title or name outranks one in an album
+# or label.
+SONG_WEIGHTS = (10.0, 4.0, 6.0)      # title, album, artist
+ARTIST_WEIGHTS = (10.0, 3.0, 2.0)    # name, label, nationality
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# SQLite's lower() only folds ASCII, so prefixes are folded the same way to
+# compare against the lower(name) index.
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def build_match_query(text):
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted so FTS5 operators typed by users are matched literally.
+    """
+    tokens = TOKEN_RE.findall(text or '')
+    return ' '.join('"%s"*' % token for token in tokens)
+
+
+def _ranked_ids(table, weights, text, limit):
+    match = build_match_query(text)
+    if not match:
+        return []
+    sql = 'SELECT rowid FROM {table} WHERE {table} MATCH %s ORDER BY bm25({table}, {weights}) LIMIT %s'.format(
+        table=table,
+        weights=', '.join(str(w) for w in weights),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _in_rank_order(queryset, ids):
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+def search_songs(text, limit=50):
+    ids = _ranked_ids('music_app_song_fts', SONG_WEIGHTS, text, limit)
+    return _in_rank_order(Song.objects.with_artist(), ids)
+
+
+def search_artists(text, limit=50):
+    ids = _ranked_ids('music_app_artist_fts', ARTIST_WEIGHTS, text, limit)
+    return _in_rank_order(Artist.objects.all(), ids)
+
+
+def artists_by_prefix(prefix, limit=20):
+    """
+    (id, name, label) of artists whose name starts with ``prefix``, ignoring case,
+    in name order. A range over the lower(name) index, so the cost depends
+    on ``limit`` rather than on the number of artists.
+    """
+    prefix = (prefix or '').strip().translate(ASCII_LOWER)
+    queryset = Artist.objects.annotate(name_lower=Lower('name'))
+    if prefix:
+        queryset = queryset.filter(name_lower__gte=prefix, name_lower__lt=prefix + '\U0010ffff')
+    return queryset.order_by('name_lower', 'id').values_list('id', 'name', 'label')[:limit]
@@ -0,0 +1,100 @@
+from collections import Counter
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from music_app.cache import artist_group, invalidate
+from music_app.deletion import deleted_in_batch
+from music_app.images import ensure_renditions
+from music_app.media import discard_on_commit
+from music_app.models import Artist, ArtistSimilarity, Song
+from music_app.stats import (
+    COUNTED_FIELDS, apply_artist_deltas, apply_deltas, artist_deltas, song_keys, stored_row,
+)
+
+
+@receiver(post_save, sender=Artist)
+def build_artist_thumbnails(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ensure_renditions(instance.image)
+
+
+@receiver(post_save, sender=Artist)
+def discard_replaced_image(sender, instance, raw=False, **kwargs):
+    previous = instance.loaded_value('image')
+    if not raw and previous != instance.image.name:
+        discard_on_commit(previous)
+
+
+@receiver(post_delete, sender=Artist)
+def discard_deleted_image(sender, instance, **kwargs):
+    discard_on_commit(instance.loaded_value('image') or instance.image.name)
+
+
+@receiver(post_save, sender=Artist)
+@receiver(post_delete, sender=Artist)
+def invalidate_artist_pages(sender, instance, **kwargs):
+    # The song list shows artist names, so it goes stale too.
+    invalidate('artists', 'songs', artist_group(instance.pk))
+
+
+@receiver(post_save, sender=Artist)
+def invalidate_recommending_pages(sender, instance, created=False, **kwargs):
+    # Artist pages recommending this one show its name.
+    if not created:
+        recommending = ArtistSimilarity.objects.filter(similar_id=instance.pk).values_list('artist_id', flat=True)
+        invalidate(*{artist_group(artist_id) for artist_id in recommending})
+
+
+@receiver(post_save, sender=Song)
+@receiver(post_delete, sender=Song)
+def invalidate_song_pages(sender, instance, **kwargs):
+    if deleted_in_batch(instance):
+        return
+    groups = {'songs', artist_group(instance.artist_id)}
+    previous_artist = instance.loaded_value('artist_id')
+    if previous_artist is not None:
+        groups.add(artist_group(previous_artist))
+    invalidate(*groups)
+
+
+def _counted(update_fields):
+    if update_fields is None:
+        return True
+    return bool({'genre', 'release_year', 'artist', 'artist_id'} & set(update_fields))
+
+
+@receiver(pre_save, sender=Song)
+def remember_song_counts(sender, instance, update_fields=None, **kwargs):
+    if _counted(update_fields):
+        instance._counted_row = stored_row(instance)
+
+
+@receiver(post_save, sender=Song)
+def update_song_counts(sender, instance, update_fields=None, **kwargs):
+    if not _counted(update_fields):
+        return
+    row = (instance.genre, instance.release_year, instance.artist_id)
+    previous = instance.__dict__.pop('_counted_row', None)
+    if row == previous:
+        return
+    deltas = Counter(song_keys(instance.genre, instance.release_year))
+    removed = []
+    if previous is not None:
+        deltas.subtract(song_keys(*previous[:2]))
+        removed.append((*previous, 1))
+    apply_deltas(deltas)
+    apply_artist_deltas(artist_deltas(added=[(*row, 1)], removed=removed))
+    # The artist list shows song counts.
+    invalidate('artists')
+
+
+@receiver(post_delete, sender=Song)
+def remove_song_counts(sender, instance, **kwargs):
+    if deleted_in_batch(instance):
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    values = [loaded.get(field, getattr(instance, field)) for field in COUNTED_FIELDS]
+    apply_deltas(Counter({key: -1 for key in song_keys(*values[:2])}))
+    apply_artist_deltas(artist_deltas(removed=[(*values, 1)]))
+    invalidate('artists')
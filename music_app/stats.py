@@ -0,0 +1,226 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum
+
+from music_app.batching import KEY_CHUNK, chunks
+from music_app.models import Artist, CatalogCount, Song
+from music_app.recommendations import refresh_on_commit
+
+COUNTED_FIELDS = ('genre', 'release_year', 'artist_id')
+UNKNOWN_DECADE = ''
+
+
+def decade_key(release_year):
+    if release_year is None:
+        return UNKNOWN_DECADE
+    return str(release_year // 10 * 10)
+
+
+def song_keys(genre, release_year):
+    return [
+        (CatalogCount.GENRE, genre),
+        (CatalogCount.DECADE, decade_key(release_year)),
+    ]
+
+
+def count_songs(rows):
+    """Tally (genre, release_year, artist_id) rows into per-key deltas."""
+    deltas = Counter()
+    for genre, release_year, _ in rows:
+        deltas.update(song_keys(genre, release_year))
+    return deltas
+
+
+def stored_row(song):
+    """
+    The (genre, release_year, artist_id) of the saved copy of ``song``, or
+    None if it has not been saved yet. Falls back to a query when the song
+    was not loaded with all of the counted fields.
+    """
+    if song.pk is None:
+        return None
+    loaded = getattr(song, '_loaded_values', {})
+    if all(field in loaded for field in COUNTED_FIELDS):
+        return tuple(loaded[field] for field in COUNTED_FIELDS)
+    return Song.objects.filter(pk=song.pk).values_list(*COUNTED_FIELDS).first()
+
+
+def apply_deltas(deltas, count_model=CatalogCount):
+    """
+    Add ``{(dimension, key): delta}`` to the stored counts.
+
+    Missing rows are inserted as zero first and every change is applied as
+    ``count = count + delta``, so concurrent writers never lose updates.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic(savepoint=False):
+        new_rows = [
+            count_model(dimension=dimension, key=key, count=0)
+            for (dimension, key), delta in deltas.items() if delta > 0
+        ]
+        count_model.objects.bulk_create(new_rows, batch_size=KEY_CHUNK, ignore_conflicts=True)
+        groups = {}
+        for (dimension, key), delta in deltas.items():
+            groups.setdefault((dimension, delta), []).append(key)
+        for (dimension, delta), keys in groups.items():
+            for chunk in chunks(keys):
+                count_model.objects.filter(dimension=dimension, key__in=chunk).update(
+                    count=F('count') + delta,
+                )
+
+
+def artist_deltas(added=(), removed=()):
+    """
+    Per-artist genre changes, ``{artist_id: Counter({genre: songs})}``, for
+    (genre, release_year, artist_id, songs) rows added and removed.
+
+    An artist whose songs only changed year keeps an entry with nothing but
+    zeros, so its latest release year is still recomputed.
+    """
+    deltas = {}
+    for rows, sign in ((added, 1), (removed, -1)):
+        for genre, _, artist_id, songs in rows:
+            deltas.setdefault(artist_id, Counter())[genre] += sign * songs
+    return deltas
+
+
+def apply_artist_deltas(deltas):
+    """
+    Bring song_count, latest_release_year and genre_counts up to date for
+    the artists in ``deltas`` (see artist_deltas()).
+
+    Call it after the songs themselves are written, in the same
+    transaction. SQLite then already holds the write lock for it, so the
+    summaries read here cannot change before they are written back. The
+    latest year is one seek per artist on the (artist, release_year) index.
+    """
+    if not deltas:
+        return
+    latest = Song.objects.filter(artist_id=OuterRef('pk'), release_year__isnull=False)
+    latest = Subquery(latest.order_by('-release_year').values('release_year')[:1])
+    with transaction.atomic(savepoint=False):
+        for chunk in chunks(deltas):
+            artists = list(Artist.objects.filter(pk__in=chunk).only('id', 'song_count', 'genre_counts'))
+            for artist in artists:
+                changes = deltas[artist.pk]
+                genres = Counter(artist.genre_counts)
+                genres.update(changes)
+                artist.song_count += sum(changes.values())
+                artist.genre_counts = {genre: songs for genre, songs in genres.items() if songs > 0}
+            Artist.objects.bulk_update(artists, ['song_count', 'genre_counts'])
+            Artist.objects.filter(pk__in=chunk).update(latest_release_year=latest)
+    # The same artists' genre and era mixes changed.
+    refresh_on_commit(deltas)
+
+
+def compute_counts(song_model=Song):
+    """Count every song from scratch with one GROUP BY per dimension."""
+    songs = song_model.objects.order_by()
+    counts = {}
+    for genre, total in songs.values_list('genre').annotate(total=Count('id')):
+        counts[(CatalogCount.GENRE, genre)] = total
+    decades = songs.annotate(decade=F('release_year') / 10 * 10).values_list('decade')
+    for decade, total in decades.annotate(total=Count('id')):
+        key = UNKNOWN_DECADE if decade is None else str(decade)
+        counts[(CatalogCount.DECADE, key)] = total
+    return counts
+
+
+def find_drift(song_model=Song, count_model=CatalogCount):
+    """Return ``{(dimension, key): (stored, actual)}`` for every wrong count."""
+    actual = compute_counts(song_model)
+    stored = {
+        (dimension, key): count
+        for dimension, key, count in count_model.objects.exclude(count=0).values_list('dimension', 'key', 'count')
+    }
+    return {
+        key: (stored.get(key, 0), actual.get(key, 0))
+        for key in stored.keys() | actual.keys()
+        if stored.get(key, 0) != actual.get(key, 0)
+    }
+
+
+def rebuild(song_model=Song, count_model=CatalogCount):
+    """Replace the stored counts with freshly computed ones; returns the drift found."""
+    with transaction.atomic():
+        drift = find_drift(song_model, count_model)
+        count_model.objects.all().delete()
+        count_model.objects.bulk_create(
+            [count_model(dimension=d, key=k, count=n) for (d, k), n in compute_counts(song_model).items()],
+            batch_size=KEY_CHUNK,
+        )
+    return drift
+
+
+def compute_artist_summaries(song_model=Song):
+    """
+    ``{artist_id: (song_count, latest_release_year, genre_counts)}`` for every
+    artist with songs, from one GROUP BY over the song table.
+    """
+    rows = song_model.objects.order_by().values_list('artist_id', 'genre')
+    summaries = {}
+    for artist_id, genre, total, latest in rows.annotate(total=Count('id'), latest=Max('release_year')):
+        count, previous, genres = summaries.get(artist_id, (0, None, {}))
+        genres[genre] = total
+        if previous is not None and (latest is None or previous > latest):
+            latest = previous
+        summaries[artist_id] = (count + total, latest, genres)
+    return summaries
+
+
+def find_artist_drift(song_model=Song, artist_model=Artist):
+    """Return ``{artist_id: (stored, actual)}`` for every artist whose summary is wrong."""
+    actual = compute_artist_summaries(song_model)
+    stored = artist_model.objects.order_by().values_list('id', *Artist.SUMMARY_FIELDS)
+    drift = {}
+    for artist_id, *summary in stored.iterator(chunk_size=KEY_CHUNK):
+        expected = actual.get(artist_id, (0, None, {}))
+        if tuple(summary) != expected:
+            drift[artist_id] = (tuple(summary), expected)
+    return drift
+
+
+def rebuild_artist_summaries(song_model=Song, artist_model=Artist):
+    """Rewrite every drifted artist summary; returns the drift found."""
+    with transaction.atomic():
+        drift = find_artist_drift(song_model, artist_model)
+        artists = []
+        for artist_id, (_, actual) in drift.items():
+            artist = artist_model(pk=artist_id)
+            artist.song_count, artist.latest_release_year, artist.genre_counts = actual
+            artists.append(artist)
+        artist_model.objects.bulk_update(artists, Artist.SUMMARY_FIELDS, batch_size=KEY_CHUNK)
+    return drift
+
+
+def _counts(dimension):
+    return CatalogCount.objects.filter(dimension=dimension, count__gt=0)
+
+
+def genre_counts():
+    """(genre, count) for every genre choice, in GENRE_CHOICES order."""
+    counts = dict(_counts(CatalogCount.GENRE).values_list('key', 'count'))
+    return [(genre, counts.get(genre, 0)) for genre, _ in Song.GENRE_CHOICES]
+
+
+def decade_counts():
+    """(label, count) per decade, oldest first, songs without a year last."""
+    counts = dict(_counts(CatalogCount.DECADE).values_list('key', 'count'))
+    unknown = counts.pop(UNKNOWN_DECADE, 0)
+    rows = [('%ss' % key, counts[key]) for key in sorted(counts, key=int)]
+    if unknown:
+        rows.append(('Unknown', unknown))
+    return rows
+
+
+def top_artists(limit=20):
+    """(artist, count) for the artists with the most songs, from the song_count index."""
+    artists = Artist.objects.filter(song_count__gt=0).order_by('-song_count', 'name', 'id')[:limit]
+    return [(artist, artist.song_count) for artist in artists]
+
+
+def total_songs():
+    return _counts(CatalogCount.GENRE).aggregate(total=Sum('count'))['total'] or 0
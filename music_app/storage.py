@@ -0,0 +1,76 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+ADDRESSED_NAME_RE = re.compile(r'^[0-9a-f]{64}$')
+
+# Prefix of uploads still being written; left behind only by a crash.
+TEMP_PREFIX = '.upload-'
+
+
+def is_addressed(name):
+    """True if ``name`` is already a content hash name."""
+    return bool(ADDRESSED_NAME_RE.match(os.path.splitext(posixpath.basename(name))[0]))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names each saved file after the SHA-256 of its
+    bytes, keeping the directory and (lowercased) extension it was given.
+
+    The hash is taken while the upload is copied to a temporary file, so the
+    content is read once. Identical uploads end up with the same name, and
+    the second one is discarded instead of stored next to the first. As a
+    result one file may be shared by several rows: never delete a stored
+    file without checking that nothing else references it.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Names come from content, so an existing file is the same file.
+        return name
+
+    def _write_temp(self, directory, content, digest=None):
+        full_directory = self.path(directory)
+        os.makedirs(full_directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=full_directory, prefix=TEMP_PREFIX)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    if digest is not None:
+                        digest.update(chunk)
+                    f.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return temp_path
+
+    def _save(self, name, content):
+        directory, basename = posixpath.split(name)
+        digest = hashlib.sha256()
+        temp_path = self._write_temp(directory, content, digest)
+        name = posixpath.join(directory, digest.hexdigest() + os.path.splitext(basename)[1].lower())
+        try:
+            # Refresh the shared file's mtime so media cleanup, which spares
+            # recently written files, leaves it alone until this is committed.
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            os.replace(temp_path, self.path(name))
+        else:
+            os.remove(temp_path)
+        return name
+
+    def save_derived(self, name, content):
+        """
+        Save ``content`` at exactly ``name``, replacing any file there. For
+        files derived from a stored one, such as thumbnails, whose names
+        follow from the original's.
+        """
+        temp_path = self._write_temp(posixpath.dirname(name), content)
+        os.replace(temp_path, self.path(name))
+        return name
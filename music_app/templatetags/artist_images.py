@@ -0,0 +1,13 @@
+from django import template
+
+from music_app.images import thumbnail_sources
+
+register = template.Library()
+
+
+@register.inclusion_tag('_artist_thumbnail.html')
+def artist_thumbnail(artist):
+    context = {'artist': artist}
+    if artist.image:
+        context.update(thumbnail_sources(artist.image))
+    return context
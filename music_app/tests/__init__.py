@@ -0,0 +1,5 @@
+import logging
+
+# Keep the per-request timing lines out of the test output; assertLogs()
+# lowers the level again where a test checks them.
+logging.getLogger('music_genie.timing').setLevel(logging.WARNING)
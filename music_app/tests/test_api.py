@@ -0,0 +1,171 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+from music_app.models import Artist, Song
+
+
+class ApiTestCase(TestCase):
+
+    def setUp(self):
+        self.artist = Artist.objects.create(name="Api Artist", age=30, nationality="Ghanaian", website="", label="Label")
+        self.other = Artist.objects.create(name="Other Artist", nationality="", website="", label="")
+        self.songs = [
+            Song.objects.create(genre="Jazz", title="First", release_year=1999, artist=self.artist),
+            Song.objects.create(genre="Pop", title="Second", release_year=2005, artist=self.artist),
+            Song.objects.create(genre="Jazz", title="Third", release_year=2005, artist=self.other),
+        ]
+
+
+class SongListApiTest(ApiTestCase):
+
+    def test_lists_songs_in_id_order(self):
+        response = self.client.get(reverse("api_songs"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        data = response.json()
+        self.assertEqual([s["id"] for s in data["results"]], [s.pk for s in self.songs])
+        self.assertEqual(data["results"][0]["artist"]["name"], "Api Artist")
+        self.assertIsNone(data["next"])
+        self.assertIsNone(data["previous"])
+
+    def test_cursor_paging(self):
+        first = self.client.get(reverse("api_songs"), {"page_size": 2}).json()
+        self.assertEqual(len(first["results"]), 2)
+        second = self.client.get(first["next"]).json()
+        self.assertEqual([s["title"] for s in second["results"]], ["Third"])
+        self.assertIsNone(second["next"])
+        back = self.client.get(second["previous"]).json()
+        self.assertEqual(back["results"], first["results"])
+
+    def test_filters(self):
+        def titles(**params):
+            return [s["title"] for s in self.client.get(reverse("api_songs"), params).json()["results"]]
+        self.assertEqual(titles(genre="Jazz"), ["First", "Third"])
+        self.assertEqual(titles(year=2005), ["Second", "Third"])
+        self.assertEqual(titles(artist=self.other.pk), ["Third"])
+        self.assertEqual(titles(genre="Jazz", year=2005), ["Third"])
+
+    def test_bad_parameters_return_400(self):
+        for params in ({"genre": "Polka"}, {"year": "recent"}, {"artist": "x"}, {"after": "bogus!"}):
+            with self.subTest(params):
+                response = self.client.get(reverse("api_songs"), params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+    def test_read_only(self):
+        response = self.client.post(reverse("api_songs"), {})
+        self.assertEqual(response.status_code, 405)
+
+
+class ArtistApiTest(ApiTestCase):
+
+    def test_list(self):
+        data = self.client.get(reverse("api_artists")).json()
+        self.assertEqual([a["name"] for a in data["results"]], ["Api Artist", "Other Artist"])
+
+    def test_detail(self):
+        data = self.client.get(reverse("api_artist", args=[self.artist.pk])).json()
+        self.assertEqual(data["name"], "Api Artist")
+        self.assertEqual(data["age"], 30)
+        self.assertIsNone(data["image"])
+        self.assertTrue(data["songs"].endswith("/api/songs/?artist=%d" % self.artist.pk))
+
+    def test_missing_returns_404(self):
+        response = self.client.get(reverse("api_artist", args=[999999]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"error": "Not found."})
+
+
+class ConditionalGetTest(ApiTestCase):
+
+    def get(self, url, **headers):
+        return self.client.get(url, **headers)
+
+    def test_detail_etag_round_trip(self):
+        url = reverse("api_song", args=[self.songs[0].pk])
+        first = self.get(url)
+        self.assertTrue(first["ETag"].startswith('"'))
+        with self.assertNumQueries(1):
+            second = self.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second.content, b"")
+
+    def test_detail_last_modified(self):
+        song = Song.objects.get(pk=self.songs[0].pk)
+        url = reverse("api_song", args=[song.pk])
+        response = self.get(url)
+        self.assertEqual(response["Last-Modified"], http_date(song.updated_at.timestamp()))
+        response = self.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_changes_etag(self):
+        url = reverse("api_song", args=[self.songs[0].pk])
+        etag = self.get(url)["ETag"]
+        song = Song.objects.get(pk=self.songs[0].pk)
+        song.title = "Renamed"
+        song.save()
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "Renamed")
+
+    def test_artist_rename_changes_song_etag(self):
+        url = reverse("api_song", args=[self.songs[0].pk])
+        etag = self.get(url)["ETag"]
+        self.artist.name = "Renamed Artist"
+        self.artist.save()
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["artist"]["name"], "Renamed Artist")
+
+    def test_list_not_modified_skips_full_fetch(self):
+        url = reverse("api_songs")
+        etag = self.get(url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.has_header("Last-Modified"))
+
+    def test_list_etag_changes_on_delete_and_insert(self):
+        url = reverse("api_songs")
+        etag = self.get(url)["ETag"]
+        self.songs[1].delete()
+        after_delete = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after_delete.status_code, 200)
+        Song.objects.create(genre="Soul", title="Fourth", artist=self.other)
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=after_delete["ETag"]).status_code, 200)
+
+    def test_updated_at_moves_on_save(self):
+        song = Song.objects.get(pk=self.songs[0].pk)
+        before = song.updated_at
+        song.save()
+        self.assertGreater(song.updated_at, before)
+
+
+class ArtistLookupApiTest(ApiTestCase):
+
+    def test_prefix_matches(self):
+        response = self.client.get(reverse("api_artist_lookup"), {"q": "oth"})
+        self.assertEqual(response.json(), {"results": [{
+            "id": self.other.pk, "name": "Other Artist", "label": "", "choice": "Other Artist #%d" % self.other.pk,
+        }]})
+
+    def test_namesakes_get_distinct_choices(self):
+        namesake = Artist.objects.create(name="Other Artist", nationality="", website="", label="Indie")
+        results = self.client.get(reverse("api_artist_lookup"), {"q": "oth"}).json()["results"]
+        self.assertEqual([a["choice"] for a in results], [
+            "Other Artist #%d" % self.other.pk, "Other Artist (Indie) #%d" % namesake.pk,
+        ])
+
+    def test_limit(self):
+        data = self.client.get(reverse("api_artist_lookup"), {"limit": 1}).json()
+        self.assertEqual([a["name"] for a in data["results"]], ["Api Artist"])
+
+    def test_bad_limit(self):
+        response = self.client.get(reverse("api_artist_lookup"), {"limit": "many"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_one_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse("api_artist_lookup"), {"q": "a"})
+
@@ -0,0 +1,173 @@
+import importlib
+import json
+
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import clear_url_caches, resolve, reverse
+from django.utils.http import urlencode
+from music_app import api, views
+from music_app.models import Artist, Song
+from music_genie import urls
+from music_genie.middleware import AsyncWhiteNoiseMiddleware
+
+
+def reload_urls():
+    importlib.reload(urls)
+    clear_url_caches()
+
+
+class AsyncViewTestCase(TestCase):
+    """Routes the catalog URLs to the async views, as asgi.py does."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Cleanups run last-in first-out: reload once the setting is restored.
+        cls.addClassCleanup(reload_urls)
+        cls.enterClassContext(override_settings(ASYNC_VIEWS=True))
+        reload_urls()
+
+    def setUp(self):
+        self.artist = Artist.objects.create(name="Async Artist", nationality="", website="", label="")
+        self.other = Artist.objects.create(name="Another Artist", nationality="", website="", label="")
+        for title in ["Gamma", "Alpha", "Beta"]:
+            Song.objects.create(genre="Soul", title=title, release_year=2001, artist=self.artist)
+
+
+class AsyncUrlSelectionTest(AsyncViewTestCase):
+
+    def test_async_views_selected_by_setting(self):
+        self.assertIs(resolve("/songs/").func.view_class, views.AsyncSongListView)
+        self.assertIs(resolve("/artist-details/1/").func.view_class, views.AsyncArtistDetailView)
+        self.assertIs(resolve("/api/songs/1/").func.view_class, api.AsyncSongDetailApiView)
+        self.assertTrue(iscoroutinefunction(resolve("/artists/").func))
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class AsyncCatalogViewTest(AsyncViewTestCase):
+
+    async def test_song_list_page(self):
+        response = await self.async_client.get(reverse("songs"), {"page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s.title for s in response.context["songs"]], ["Alpha", "Beta"])
+        self.assertContains(response, "Next")
+
+    def test_song_list_is_one_query(self):
+        # The sync client runs the async view through async_to_sync, and its
+        # ORM calls come back to this thread's connection.
+        with self.assertNumQueries(1):
+            self.client.get(reverse("songs"))
+
+    async def test_artist_list_follows_cursor(self):
+        first = await self.async_client.get(reverse("artists"), {"page_size": 1})
+        self.assertEqual([a.name for a in first.context["artists"]], ["Another Artist"])
+        second = await self.async_client.get(reverse("artists") + first.context["page_obj"].next_url)
+        self.assertEqual([a.name for a in second.context["artists"]], ["Async Artist"])
+
+    async def test_invalid_cursor_is_404(self):
+        response = await self.async_client.get(reverse("artists"), {"after": "bogus!"})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_artist_page_lists_songs(self):
+        response = await self.async_client.get(reverse("artist_details", args=[self.artist.pk]))
+        self.assertContains(response, 'value="Async Artist"')
+        self.assertContains(response, "Gamma")
+
+    async def test_artist_page_pages_songs(self):
+        response = await self.async_client.get(reverse("artist_details", args=[self.artist.pk]), {"page_size": 2})
+        self.assertEqual([s["title"] for s in response.context["songs"]], ["Alpha", "Beta"])
+        fragment = await self.async_client.get(
+            reverse("artist_songs", args=[self.artist.pk]) + response.context["songs_page"].next_url)
+        self.assertEqual([s["title"] for s in fragment.context["songs"]], ["Gamma"])
+        self.assertNotContains(fragment, "<form")
+
+    async def test_artist_songs_missing_artist_is_404(self):
+        response = await self.async_client.get(reverse("artist_songs", args=[999999]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_song_page_preloads_artist_name(self):
+        song = await Song.objects.aget(title="Alpha")
+        response = await self.async_client.get(reverse("song_details", args=[song.pk]))
+        self.assertContains(response, 'name="artist" value="%d"' % self.artist.pk)
+        self.assertContains(response, 'value="Async Artist #%d"' % self.artist.pk)
+        self.assertNotContains(response, "Another Artist")
+
+    async def test_missing_object_is_404(self):
+        response = await self.async_client.get(reverse("song_details", args=[999999]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_post_is_saved_by_update_view(self):
+        song = await Song.objects.aget(title="Alpha")
+        # Django 4.1's async test client cannot stream multipart bodies.
+        response = await self.async_client.post(
+            reverse("song_details", args=[song.pk]),
+            urlencode({"genre": "Jazz", "title": "Renamed", "release_year": 2002, "album": "B-Sides", "artist": self.other.pk}),
+            content_type="application/x-www-form-urlencoded",
+        )
+        self.assertEqual(response.status_code, 302)
+        song = await Song.objects.aget(pk=song.pk)
+        self.assertEqual((song.title, song.artist_id), ("Renamed", self.other.pk))
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class AsyncCachedPageTest(AsyncViewTestCase):
+
+    def test_second_request_is_a_cache_hit(self):
+        first = self.client.get(reverse("artists"))
+        self.assertEqual(first["X-Page-Cache"], "miss")
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse("artists"))
+        self.assertEqual(second["X-Page-Cache"], "hit")
+
+
+class AsyncApiTest(AsyncViewTestCase):
+
+    async def test_list(self):
+        response = await self.async_client.get(reverse("api_songs"), {"page_size": 2})
+        data = json.loads(response.content)
+        self.assertEqual([s["title"] for s in data["results"]], ["Gamma", "Alpha"])
+        self.assertIsNotNone(data["next"])
+        again = await self.async_client.get(
+            reverse("api_songs"), {"page_size": 2}, **{"If-None-Match": response["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+    def test_conditional_get_is_one_query(self):
+        etag = self.client.get(reverse("api_songs"))["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("api_songs"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    async def test_detail(self):
+        song = await Song.objects.aget(title="Beta")
+        response = await self.async_client.get(reverse("api_song", args=[song.pk]))
+        data = json.loads(response.content)
+        self.assertEqual(data["title"], "Beta")
+        self.assertEqual(data["artist"]["name"], "Async Artist")
+        self.assertTrue(response.has_header("Last-Modified"))
+
+    async def test_errors(self):
+        response = await self.async_client.get(reverse("api_artist", args=[999999]))
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(reverse("api_songs"), {"genre": "Polka"})
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.post(reverse("api_songs"))
+        self.assertEqual(response.status_code, 405)
+
+
+class AsyncWhiteNoiseMiddlewareTest(SimpleTestCase):
+
+    async def async_view(self, request):
+        return HttpResponse("view")
+
+    def test_adapts_to_async_chain(self):
+        self.assertTrue(iscoroutinefunction(AsyncWhiteNoiseMiddleware(self.async_view)))
+
+    def test_stays_sync_in_sync_chain(self):
+        middleware = AsyncWhiteNoiseMiddleware(lambda request: HttpResponse("view"))
+        self.assertFalse(iscoroutinefunction(middleware))
+        self.assertEqual(middleware(RequestFactory().get("/songs/")).content, b"view")
+
+    async def test_passes_through_to_async_view(self):
+        response = await AsyncWhiteNoiseMiddleware(self.async_view)(RequestFactory().get("/songs/"))
+        self.assertEqual(response.content, b"view")
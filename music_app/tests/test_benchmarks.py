@@ -0,0 +1,132 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import get_resolver
+from music_app import benchmarks
+from music_app.models import Artist, Song
+
+
+class ScaleTest(TestCase):
+
+    def test_suffixes(self):
+        self.assertEqual(benchmarks.parse_scale("1000"), 1000)
+        self.assertEqual(benchmarks.parse_scale("100k"), 100000)
+        self.assertEqual(benchmarks.parse_scale("1M"), 1000000)
+        self.assertEqual(benchmarks.parse_scale("2.5k"), 2500)
+
+    def test_invalid_scales_rejected(self):
+        for value in ("", "lots", "0", "k"):
+            with self.subTest(value):
+                with self.assertRaises(benchmarks.BenchmarkError):
+                    benchmarks.parse_scale(value)
+
+    def test_synthetic_rows_are_deterministic(self):
+        rows = list(benchmarks.synthetic_rows(45, seed=3))
+        self.assertEqual(rows, list(benchmarks.synthetic_rows(45, seed=3)))
+        self.assertEqual(len({row["artist"] for row in rows}), 3)
+
+    def test_seed_catalog(self):
+        benchmarks.seed_catalog(50)
+        self.assertEqual(Song.objects.count(), 50)
+        self.assertEqual(Artist.objects.count(), 3)
+
+
+class PercentileTest(TestCase):
+
+    def test_nearest_rank(self):
+        samples = list(range(1, 101))
+        self.assertEqual(benchmarks.percentile(samples, 50), 50)
+        self.assertEqual(benchmarks.percentile(samples, 95), 95)
+        self.assertEqual(benchmarks.percentile([7], 95), 7)
+
+
+class CompareTest(TestCase):
+
+    def report(self, **fields):
+        result = {"scale": 1000, "route": "song list", "queries": 1, "p95_ms": 10.0, "peak_memory_kb": 500.0}
+        result.update(fields)
+        return {"results": [result]}
+
+    def test_unchanged(self):
+        self.assertEqual(benchmarks.compare(self.report(), self.report()), [])
+
+    def test_extra_query_is_a_regression(self):
+        regressions = benchmarks.compare(self.report(), self.report(queries=2))
+        self.assertEqual(regressions, ["song list @ 1000 songs: 2 queries, was 1"])
+
+    def test_latency_needs_ratio_and_floor(self):
+        self.assertEqual(benchmarks.compare(self.report(), self.report(p95_ms=12.0)), [])
+        self.assertEqual(benchmarks.compare(self.report(p95_ms=0.5), self.report(p95_ms=1.2)), [])
+        self.assertEqual(len(benchmarks.compare(self.report(), self.report(p95_ms=14.0))), 1)
+
+    def test_memory_growth(self):
+        self.assertEqual(len(benchmarks.compare(self.report(), self.report(peak_memory_kb=900.0))), 1)
+
+    def test_new_routes_ignored(self):
+        self.assertEqual(benchmarks.compare(self.report(), self.report(route="stats")), [])
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class RouteBenchmarkTest(TestCase):
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.settings = override_settings(MEDIA_ROOT=self.media)
+        self.settings.enable()
+        benchmarks.seed_catalog(60)
+        self.routes = benchmarks.catalog_routes(benchmarks.middle(Artist), benchmarks.middle(Song))
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def test_every_route_runs(self):
+        bench = benchmarks.RouteBenchmark(iterations=2, warmup=0)
+        for route in self.routes:
+            with self.subTest(route.name):
+                result = bench.run(route)
+                self.assertEqual(result["route"], route.name)
+                self.assertLessEqual(result["p50_ms"], result["p95_ms"])
+                self.assertGreater(result["peak_memory_kb"], 0)
+
+    def test_routes_cover_every_url(self):
+        names = {getattr(pattern, "name", None) for pattern in get_resolver().url_patterns} - {None}
+        self.assertEqual(names - {route.url_name for route in self.routes}, set())
+
+    def test_duplicates_merge_route_merges(self):
+        route = next(route for route in self.routes if route.name == "duplicates merge")
+        before = Song.objects.count()
+        benchmarks.RouteBenchmark(iterations=1, warmup=0).request(route)
+        self.assertEqual(Song.objects.count(), before + 1)
+
+    def test_list_metrics(self):
+        route = next(route for route in self.routes if route.name == "song list")
+        result = benchmarks.RouteBenchmark(iterations=3, warmup=1).run(route)
+        self.assertEqual(result["iterations"], 3)
+        self.assertEqual(result["queries"], 1)
+        self.assertGreater(result["bytes"], 0)
+
+    def test_unexpected_status_raises(self):
+        route = benchmarks.Route("missing", "songs", lambda: ("/no-such-page/", None))
+        with self.assertRaises(benchmarks.BenchmarkError):
+            benchmarks.RouteBenchmark(iterations=1, warmup=0).run(route)
+
+    def test_middle_of_empty_table(self):
+        Song.objects.all().delete()
+        with self.assertRaises(benchmarks.BenchmarkError):
+            benchmarks.middle(Song)
+
+
+class BenchmarkCommandTest(TestCase):
+
+    def test_bad_scale(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark", "--scale", "lots", stdout=StringIO())
+
+    def test_keep_db_needs_workdir(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark", "--keep-db", stdout=StringIO())
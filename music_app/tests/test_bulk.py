@@ -0,0 +1,152 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from music_app import bulk
+from music_app.forms import SongBulkForm
+from music_app.models import Artist, Song
+from music_app.search import search_songs
+from music_app.stats import find_drift
+
+
+class BulkTestCase(TestCase):
+
+    def setUp(self):
+        self.artist = Artist.objects.create(name="Bulk Artist", nationality="", website="", label="")
+        self.other = Artist.objects.create(name="Other Artist", nationality="", website="", label="")
+        self.songs = [
+            Song.objects.create(genre="Pop", title="Song %d" % i, release_year=1990 + i, album="Old", artist=self.artist)
+            for i in range(4)
+        ]
+        self.untouched = Song.objects.create(genre="Pop", title="Untouched", release_year=1995, album="Old", artist=self.other)
+
+    def ids(self, songs=None):
+        return [song.pk for song in songs or self.songs]
+
+
+class UpdateSongsTest(BulkTestCase):
+
+    def test_one_update_statement(self):
+        with CaptureQueriesContext(connection) as queries:
+            updated = bulk.update_songs(self.ids(), {"genre": "Jazz", "album": "New"})
+        self.assertEqual(updated, 4)
+        self.assertEqual(len([q for q in queries if q["sql"].startswith('UPDATE "music_app_song"')]), 1)
+        self.assertEqual(Song.objects.filter(genre="Jazz", album="New").count(), 4)
+        self.assertEqual(Song.objects.get(pk=self.untouched.pk).genre, "Pop")
+
+    def test_ids_bound_a_chunk_at_a_time(self):
+        with mock.patch("music_app.bulk.chunks", lambda ids: ([i] for i in ids)):
+            with CaptureQueriesContext(connection) as queries:
+                updated = bulk.update_songs(self.ids(), {"genre": "Jazz"})
+        self.assertEqual(updated, 4)
+        self.assertEqual(len([q for q in queries if q["sql"].startswith('UPDATE "music_app_song"')]), 4)
+        self.assertEqual(find_drift(), {})
+
+    def test_counts_follow_genre_and_year(self):
+        bulk.update_songs(self.ids(), {"genre": "Jazz", "release_year": 2011})
+        self.assertEqual(find_drift(), {})
+
+    def test_updated_at_moves(self):
+        before = self.songs[0].updated_at
+        bulk.update_songs(self.ids(), {"album": "New"})
+        self.assertGreater(Song.objects.get(pk=self.songs[0].pk).updated_at, before)
+
+    def test_search_index_follows_album(self):
+        bulk.update_songs(self.ids(), {"album": "Remastered"})
+        self.assertEqual(len(search_songs("remastered")), 4)
+
+    def test_missing_ids_are_not_counted(self):
+        self.assertEqual(bulk.update_songs(self.ids() + [999999], {"album": "New"}), 4)
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_song_list_expires(self):
+        cache.clear()
+        url = reverse("songs")
+        self.client.get(url)
+        bulk.update_songs(self.ids(), {"album": "Refreshed"})
+        response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "Refreshed")
+
+
+class DeleteSongsTest(BulkTestCase):
+
+    def test_delete(self):
+        self.assertEqual(bulk.delete_songs_by_id(self.ids()[:3]), 3)
+        self.assertEqual(Song.objects.count(), 2)
+        self.assertEqual(find_drift(), {})
+
+
+class SongBulkFormTest(BulkTestCase):
+
+    def test_update_needs_a_change(self):
+        form = SongBulkForm({"action": "update", "ids": self.ids()})
+        self.assertFalse(form.is_valid())
+        self.assertIn("__all__", form.errors)
+
+    def test_ids_must_be_numbers(self):
+        form = SongBulkForm({"action": "delete", "ids": ["1", "one"]})
+        self.assertIn("ids", form.errors)
+
+    def test_selection_is_capped(self):
+        form = SongBulkForm({"action": "delete", "ids": list(range(1, bulk.MAX_BULK_SONGS + 2))})
+        self.assertIn("ids", form.errors)
+
+    def test_unknown_genre(self):
+        form = SongBulkForm({"action": "update", "ids": self.ids(), "genre": "Polka"})
+        self.assertIn("genre", form.errors)
+
+
+class BulkSongsViewTest(BulkTestCase):
+
+    def test_update(self):
+        response = self.client.post(reverse("bulk_songs"), {"action": "update", "ids": self.ids(), "release_year": 2020})
+        self.assertContains(response, "Updated 4 of 4 selected songs.")
+        self.assertEqual(Song.objects.filter(release_year=2020).count(), 4)
+
+    def test_delete(self):
+        response = self.client.post(reverse("bulk_songs"), {"action": "delete", "ids": self.ids()[:2]})
+        self.assertContains(response, "Deleted 2 of 2 selected songs.")
+        self.assertEqual(Song.objects.count(), 3)
+
+    def test_invalid(self):
+        response = self.client.post(reverse("bulk_songs"), {"action": "update", "ids": self.ids()})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Song.objects.filter(album="Old").count(), 5)
+
+    def test_get_is_not_allowed(self):
+        self.assertEqual(self.client.get(reverse("bulk_songs")).status_code, 405)
+
+    def test_song_list_has_checkboxes(self):
+        response = self.client.get(reverse("songs"))
+        self.assertContains(response, 'name="ids" value="%d" form="bulk-songs"' % self.songs[0].pk)
+
+
+class SongBulkApiTest(BulkTestCase):
+
+    def post(self, data):
+        return self.client.post(reverse("api_songs_bulk"), json.dumps(data), content_type="application/json")
+
+    def test_update(self):
+        response = self.post({"action": "update", "ids": self.ids(), "genre": "Soul"})
+        self.assertEqual(response.json(), {"action": "update", "selected": 4, "affected": 4})
+        self.assertEqual(Song.objects.filter(genre="Soul").count(), 4)
+
+    def test_delete(self):
+        response = self.post({"action": "delete", "ids": self.ids()})
+        self.assertEqual(response.json()["affected"], 4)
+
+    def test_invalid(self):
+        response = self.post({"action": "update", "ids": "all"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ids", response.json()["fields"])
+
+    def test_body_must_be_an_object(self):
+        response = self.client.post(reverse("api_songs_bulk"), "[1, 2]", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse("api_songs_bulk"), "nope", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,296 @@
+import re
+import shutil
+import tempfile
+
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from music_app.cache import CATALOG_GROUP, CSRF_PLACEHOLDER, group_versions, invalidate
+from music_app.forms import ArtistForm, SongForm
+from music_app.importer import CatalogImporter
+from music_app.models import Artist, Song
+from music_app.tests.test_views import TINY_GIF
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.artist = Artist.objects.create(
+            name="Cached Artist",
+            nationality="Senegalese",
+            website="",
+            label="",
+        )
+        self.song = Song.objects.create(genre="Soul", title="Cached Song", artist=self.artist)
+
+    def without_tokens(self, response):
+        return re.sub(rb'name="csrfmiddlewaretoken" value="[^"]+"', b"", response.content)
+
+    def get(self, url, client=None):
+        return (client or self.client).get(url)
+
+    def assertHit(self, url):
+        with self.assertNumQueries(0):
+            response = self.get(url)
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        return response
+
+    def assertMiss(self, url):
+        response = self.get(url)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        return response
+
+
+class CachedPageTest(PageCacheTestCase):
+
+    def test_song_list_served_from_cache(self):
+        url = reverse("songs")
+        first = self.assertMiss(url)
+        second = self.assertHit(url)
+        # Delete buttons carry CSRF tokens, which are masked per response.
+        self.assertEqual(self.without_tokens(first), self.without_tokens(second))
+
+    def test_artist_list_served_from_cache(self):
+        url = reverse("artists")
+        self.assertMiss(url)
+        self.assertHit(url)
+
+    def test_artist_detail_served_from_cache(self):
+        url = reverse("artist_details", kwargs={"pk": self.artist.pk})
+        self.assertMiss(url)
+        self.assertHit(url)
+
+    def test_query_string_is_part_of_key(self):
+        self.assertMiss(reverse("songs"))
+        self.assertMiss(reverse("songs") + "?page_size=1")
+
+    def test_missing_artist_is_not_cached(self):
+        url = reverse("artist_details", kwargs={"pk": 99999})
+        self.assertEqual(self.get(url).status_code, 404)
+        self.assertEqual(self.get(url).status_code, 404)
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_can_be_disabled(self):
+        response = self.get(reverse("songs"))
+        self.assertNotIn("X-Page-Cache", response)
+        self.assertIn("songs", response.context)
+
+
+class FormPageCacheTest(PageCacheTestCase):
+
+    def test_add_pages_served_from_cache(self):
+        for url in [reverse("add_artist"), reverse("add_song")]:
+            with self.subTest(url):
+                self.assertMiss(url)
+                self.assertNotContains(self.assertHit(url), CSRF_PLACEHOLDER)
+
+    def test_song_edit_page_served_from_cache(self):
+        url = reverse("song_details", kwargs={"pk": self.song.pk})
+        self.assertMiss(url)
+        self.assertHit(url)
+
+    def test_new_artist_leaves_add_song_page_cached(self):
+        url = reverse("add_song")
+        self.assertMiss(url)
+        Artist.objects.create(name="New Artist", nationality="", website="", label="")
+        self.assertHit(url)
+
+    def test_artist_rename_expires_song_edit_page(self):
+        url = reverse("song_details", kwargs={"pk": self.song.pk})
+        self.assertMiss(url)
+        self.artist.name = "Renamed Artist"
+        self.artist.save()
+        self.assertContains(self.assertMiss(url), 'value="Renamed Artist #%d"' % self.artist.pk)
+
+    def test_song_edit_expires_its_page(self):
+        url = reverse("song_details", kwargs={"pk": self.song.pk})
+        self.assertMiss(url)
+        self.song.title = "Retitled Song"
+        self.song.save()
+        self.assertContains(self.assertMiss(url), "Retitled Song")
+
+    def test_invalid_post_is_not_cached(self):
+        url = reverse("add_artist")
+        self.assertMiss(url)
+        response = self.client.post(url, {"name": ""})
+        self.assertNotIn("X-Page-Cache", response)
+        self.assertHit(url)
+
+    def test_template_pack_is_part_of_key(self):
+        url = reverse("add_artist")
+        self.assertMiss(url)
+        with override_settings(CRISPY_TEMPLATE_PACK="bootstrap4"):
+            self.assertMiss(url)
+
+    def test_helper_built_once_per_class(self):
+        self.assertIs(ArtistForm().helper, ArtistForm().helper)
+        self.assertIs(SongForm().helper, SongForm().helper)
+
+
+class InvalidationTest(PageCacheTestCase):
+
+    def test_new_song_expires_song_list(self):
+        url = reverse("songs")
+        self.assertMiss(url)
+        Song.objects.create(genre="Pop", title="Fresh Song", artist=self.artist)
+        self.assertContains(self.assertMiss(url), "Fresh Song")
+
+    def test_song_edit_expires_artist_detail(self):
+        url = reverse("artist_details", kwargs={"pk": self.artist.pk})
+        self.assertMiss(url)
+        self.song.title = "Renamed Song"
+        self.song.save()
+        self.assertContains(self.assertMiss(url), "Renamed Song")
+
+    def test_song_edit_leaves_artist_list_cached(self):
+        url = reverse("artists")
+        self.assertMiss(url)
+        self.song.title = "Renamed Song"
+        self.song.save()
+        self.assertHit(url)
+
+    def test_song_reassignment_expires_previous_artist(self):
+        other = Artist.objects.create(name="Other", nationality="", website="", label="")
+        old_url = reverse("artist_details", kwargs={"pk": self.artist.pk})
+        self.assertMiss(old_url)
+        song = Song.objects.get(pk=self.song.pk)
+        song.artist = other
+        song.save()
+        self.assertNotContains(self.assertMiss(old_url), "Cached Song")
+
+    def test_song_delete_expires_pages(self):
+        url = reverse("songs")
+        self.assertMiss(url)
+        self.song.delete()
+        self.assertNotContains(self.assertMiss(url), "Cached Song")
+
+    def test_artist_rename_expires_song_list(self):
+        url = reverse("songs")
+        self.assertMiss(url)
+        self.artist.name = "Renamed Artist"
+        self.artist.save()
+        self.assertContains(self.assertMiss(url), "Renamed Artist")
+
+    def test_other_artist_detail_stays_cached(self):
+        other = Artist.objects.create(name="Other", nationality="", website="", label="")
+        url = reverse("artist_details", kwargs={"pk": other.pk})
+        self.assertMiss(url)
+        self.song.save()
+        self.assertHit(url)
+
+    def test_import_expires_everything(self):
+        url = reverse("artist_details", kwargs={"pk": self.artist.pk})
+        self.assertMiss(url)
+        CatalogImporter().run([
+            {"artist": "Cached Artist", "title": "Imported Song", "genre": "Pop"},
+        ])
+        self.assertContains(self.assertMiss(url), "Imported Song")
+
+    def test_invalidate_bumps_again_on_commit(self):
+        before = group_versions([CATALOG_GROUP])
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            invalidate(CATALOG_GROUP)
+        immediate = group_versions([CATALOG_GROUP])
+        self.assertNotEqual(before, immediate)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertNotEqual(group_versions([CATALOG_GROUP]), immediate)
+
+
+class CsrfCachingTest(PageCacheTestCase):
+
+    def token_in(self, response):
+        match = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', response.content)
+        return match.group(1).decode()
+
+    def test_placeholder_never_reaches_clients(self):
+        url = reverse("artist_details", kwargs={"pk": self.artist.pk})
+        self.assertNotContains(self.assertMiss(url), CSRF_PLACEHOLDER)
+        self.assertNotContains(self.assertHit(url), CSRF_PLACEHOLDER)
+
+    def test_cached_form_posts_with_fresh_token(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        url = reverse("artist_details", kwargs={"pk": self.artist.pk})
+        self.assertMiss(url)
+        client = Client(enforce_csrf_checks=True)
+        response = self.get(url, client)
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        data = {
+            "csrfmiddlewaretoken": self.token_in(response),
+            "name": "Posted",
+            "age": 30,
+            "nationality": "Senegalese",
+            "website": "https://posted.example",
+            "label": "Posted Label",
+            "image": SimpleUploadedFile("csrf.gif", TINY_GIF, content_type="image/gif"),
+        }
+        response = client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        self.artist.refresh_from_db()
+        self.assertEqual(self.artist.name, "Posted")
+
+
+class FileCacheBackendTest(PageCacheTestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.override = override_settings(CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": self.location,
+            },
+        })
+        self.override.enable()
+        super().setUp()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def test_hit_and_invalidate(self):
+        url = reverse("songs")
+        self.assertMiss(url)
+        self.assertHit(url)
+        Song.objects.create(genre="Pop", title="Filed Song", artist=self.artist)
+        self.assertContains(self.assertMiss(url), "Filed Song")
+
+
+class SharedCacheTest(PageCacheTestCase):
+    """Two cache instances over one directory, as two workers would open it."""
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        backend = {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": self.location,
+        }
+        self.override = override_settings(CACHES={"default": backend, "worker": dict(backend)})
+        self.override.enable()
+        super().setUp()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def test_separate_instances(self):
+        self.assertIsNot(caches["default"], caches["worker"])
+
+    def test_invalidation_crosses_instances(self):
+        before = group_versions([CATALOG_GROUP])
+        with override_settings(PAGE_CACHE_ALIAS="worker"):
+            self.assertEqual(group_versions([CATALOG_GROUP]), before)
+            invalidate(CATALOG_GROUP)
+        self.assertNotEqual(group_versions([CATALOG_GROUP]), before)
+
+    def test_page_cached_by_one_worker_expired_by_another(self):
+        url = reverse("songs")
+        self.assertMiss(url)
+        with override_settings(PAGE_CACHE_ALIAS="worker"):
+            self.assertHit(url)
+            Song.objects.create(genre="Pop", title="Other Worker", artist=self.artist)
+        self.assertContains(self.assertMiss(url), "Other Worker")
@@ -0,0 +1,170 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase
+
+from music_genie.backends.sqlite3.base import DatabaseWrapper
+
+PRODUCTION = settings.DATABASE_PROFILES['production']
+
+
+class ProductionDatabaseTestCase(SimpleTestCase):
+    """Opens separate connections, like separate workers, to a temporary database file."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'db.sqlite3')
+        setup = self.connect()
+        with setup.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)')
+        setup.close()
+
+    def connect(self, pragmas=None, **options):
+        options = dict(PRODUCTION['OPTIONS'], **options)
+        if pragmas:
+            options['pragmas'] = dict(options['pragmas'], **pragmas)
+        settings_dict = dict(connection.settings_dict, ENGINE=PRODUCTION['ENGINE'], NAME=self.path, OPTIONS=options)
+        wrapper = DatabaseWrapper(settings_dict, alias='worker')
+        # Each worker thread uses its own wrapper; cleanup runs in this one.
+        wrapper.inc_thread_sharing()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def count(self, cursor):
+        cursor.execute('SELECT count(*) FROM item')
+        return cursor.fetchone()[0]
+
+
+class ProfileSettingsTest(ProductionDatabaseTestCase):
+
+    def test_pragmas_applied_to_new_connections(self):
+        with self.connect().cursor() as cursor:
+            def pragma(name):
+                cursor.execute('PRAGMA %s' % name)
+                return cursor.fetchone()[0]
+            self.assertEqual(pragma('journal_mode'), 'wal')
+            self.assertEqual(pragma('synchronous'), 1)
+            self.assertEqual(pragma('busy_timeout'), 5000)
+            self.assertEqual(pragma('cache_size'), -64000)
+            self.assertEqual(pragma('foreign_keys'), 1)
+
+    def test_connections_are_persistent_with_health_checks(self):
+        self.assertGreater(PRODUCTION['CONN_MAX_AGE'], 0)
+        self.assertTrue(PRODUCTION['CONN_HEALTH_CHECKS'])
+
+    def test_invalid_pragma_name(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.connect(pragmas={'journal_mode; DROP TABLE item': 'WAL'}).ensure_connection()
+
+    def test_invalid_transaction_mode(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.connect(transaction_mode='LAZY').transaction_mode
+
+    def test_atomic_blocks_begin_immediate(self):
+        wrapper = self.connect()
+        wrapper._start_transaction_under_autocommit()
+        self.assertTrue(wrapper.connection.in_transaction)
+        # Another connection cannot take the write lock while this one holds it.
+        other = self.connect(pragmas={'busy_timeout': 50})
+        with self.assertRaises(OperationalError):
+            other._start_transaction_under_autocommit()
+        wrapper.cursor().execute('COMMIT')
+
+
+class ConcurrencyTest(ProductionDatabaseTestCase):
+
+    def test_reader_never_waits_for_an_open_write_transaction(self):
+        writer, reader = self.connect(), self.connect()
+        with writer.cursor() as write, reader.cursor() as read:
+            write.execute('BEGIN IMMEDIATE')
+            write.execute("INSERT INTO item (name) VALUES ('pending')")
+            started = time.monotonic()
+            self.assertEqual(self.count(read), 0)
+            self.assertLess(time.monotonic() - started, 0.5)
+            write.execute('COMMIT')
+            self.assertEqual(self.count(read), 1)
+
+    def test_writer_commits_while_reader_holds_a_snapshot(self):
+        writer, reader = self.connect(), self.connect()
+        with writer.cursor() as write, reader.cursor() as read:
+            read.execute('BEGIN')
+            self.assertEqual(self.count(read), 0)
+            write.execute("INSERT INTO item (name) VALUES ('new')")
+            # The open read transaction keeps its snapshot...
+            self.assertEqual(self.count(read), 0)
+            read.execute('COMMIT')
+            # ...and sees the write once it starts a new one.
+            self.assertEqual(self.count(read), 1)
+
+    def test_rollback_journal_blocks_the_same_writer(self):
+        pragmas = {'journal_mode': 'DELETE', 'busy_timeout': 50}
+        writer, reader = self.connect(pragmas=pragmas), self.connect(pragmas=pragmas)
+        with writer.cursor() as write, reader.cursor() as read:
+            read.execute('BEGIN')
+            self.count(read)
+            with self.assertRaisesMessage(OperationalError, 'database is locked'):
+                write.execute("INSERT INTO item (name) VALUES ('blocked')")
+            read.execute('COMMIT')
+
+    def test_readers_keep_going_under_write_load(self):
+        stop = threading.Event()
+        errors = []
+
+        def write_loop(wrapper):
+            try:
+                with wrapper.cursor() as cursor:
+                    while not stop.is_set():
+                        wrapper._start_transaction_under_autocommit()
+                        cursor.executemany('INSERT INTO item (name) VALUES (%s)', [('x' * 200,)] * 200)
+                        cursor.execute('COMMIT')
+            except Exception as exc:
+                errors.append(exc)
+
+        writer = threading.Thread(target=write_loop, args=(self.connect(),))
+        writer.start()
+        try:
+            slowest = 0
+            with self.connect().cursor() as read:
+                for _ in range(50):
+                    started = time.monotonic()
+                    self.count(read)
+                    slowest = max(slowest, time.monotonic() - started)
+        finally:
+            stop.set()
+            writer.join()
+        self.assertEqual(errors, [])
+        self.assertLess(slowest, 1)
+
+    def test_concurrent_writers_queue_instead_of_failing(self):
+        errors = []
+
+        def read_then_write(wrapper, name):
+            try:
+                with wrapper.cursor() as cursor:
+                    for _ in range(5):
+                        wrapper._start_transaction_under_autocommit()
+                        self.count(cursor)
+                        time.sleep(0.01)
+                        cursor.execute('INSERT INTO item (name) VALUES (%s)', [name])
+                        cursor.execute('COMMIT')
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [
+            threading.Thread(target=read_then_write, args=(self.connect(), 'worker %d' % i))
+            for i in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with self.connect().cursor() as cursor:
+            self.assertEqual(self.count(cursor), 15)
@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.signals import post_delete, pre_delete
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from music_app import deletion
+from music_app.models import Artist, Song
+from music_app.search import search_songs
+from music_app.stats import find_drift
+
+
+class DeleteArtistTest(TestCase):
+
+    def setUp(self):
+        self.artist = Artist.objects.create(name="Prolific", nationality="", website="", label="")
+        self.other = Artist.objects.create(name="Bystander", nationality="", website="", label="")
+        for i in range(7):
+            Song.objects.create(genre="Jazz", title="Track %d" % i, release_year=1990 + i, artist=self.artist)
+        self.kept = Song.objects.create(genre="Pop", title="Kept Track", release_year=2001, artist=self.other)
+
+    def test_songs_deleted_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            deleted = deletion.delete_artist(self.artist, batch_size=3)
+        self.assertEqual(deleted, 7)
+        self.assertFalse(Artist.objects.filter(pk=self.artist.pk).exists())
+        self.assertEqual(list(Song.objects.all()), [self.kept])
+        song_deletes = [q["sql"] for q in queries if q["sql"].startswith('DELETE FROM "music_app_song"')]
+        self.assertEqual(len(song_deletes), 3)
+
+    def test_counts_stay_in_step(self):
+        deletion.delete_artist(self.artist, batch_size=3)
+        self.assertEqual(find_drift(), {})
+
+    def test_search_index_follows(self):
+        deletion.delete_artist(self.artist, batch_size=3)
+        self.assertEqual(search_songs("track"), [self.kept])
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_cached_pages_expire(self):
+        cache.clear()
+        url = reverse("songs")
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "miss")
+        deletion.delete_artist(self.artist)
+        response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertNotContains(response, "Track 0")
+
+    def test_other_receivers_get_their_signals(self):
+        seen = []
+
+        def receiver(sender, instance, **kwargs):
+            seen.append(instance.title)
+
+        pre_delete.connect(receiver, sender=Song)
+        self.addCleanup(pre_delete.disconnect, receiver, sender=Song)
+        self.assertFalse(deletion.signals_handled())
+        self.assertEqual(deletion.delete_artist(self.artist, batch_size=3), 7)
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(find_drift(), {})
+
+    def test_own_receivers_are_handled(self):
+        self.assertTrue(deletion.signals_handled())
+
+    def test_post_delete_receivers_called_after_batches(self):
+        seen = []
+
+        def receiver(sender, instance, origin=None, **kwargs):
+            seen.append((instance.title, origin.model))
+
+        post_delete.connect(receiver, sender=Song)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Song)
+        self.assertTrue(deletion.signals_handled())
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(deletion.delete_artist(self.artist, batch_size=3), 7)
+        self.assertEqual(sorted(seen), [("Track %d" % i, Song) for i in range(7)])
+        song_deletes = [q["sql"] for q in queries if q["sql"].startswith('DELETE FROM "music_app_song"')]
+        self.assertEqual(len(song_deletes), 3)
+        # The app's own receivers skip songs whose counts were done per batch.
+        self.assertEqual(find_drift(), {})
@@ -0,0 +1,251 @@
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from music_app import duplicates
+from music_app.duplicates import (
+    blocking_key, find_duplicate_artists, find_duplicate_songs, merge_artists, merge_duplicates, merge_songs,
+    merge_stored, normalize, normalize_artist, recheck, store_groups,
+)
+from music_app.models import Artist, DuplicateGroup, Song
+from music_app.stats import find_artist_drift, find_drift
+
+
+class NormalizeTest(TestCase):
+
+    def test_case_accents_and_punctuation(self):
+        self.assertEqual(normalize("  Café  Del-Mar!! "), "cafe del mar")
+        self.assertEqual(normalize("Rock & Roll"), normalize("rock and roll"))
+        self.assertEqual(normalize(None), "")
+
+    def test_artist_drops_leading_the(self):
+        self.assertEqual(normalize_artist("The Band"), normalize_artist("band"))
+        self.assertEqual(normalize_artist("Theory"), "theory")
+
+    def test_blocking_key(self):
+        self.assertEqual(blocking_key("The Beatles", "Let It Be"), ("beatles", "leti"))
+        self.assertEqual(blocking_key("BEATLES", "let-it be (live)"), ("beatles", "leti"))
+
+
+class DuplicatesTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.artist = Artist.objects.create(name="Fela Kuti", nationality="Nigerian", website="", label="")
+        self.copy = Artist.objects.create(name="fela  kuti", nationality="", website="fela.example", label="")
+        self.other = Artist.objects.create(name="Burna Boy", nationality="", website="", label="")
+        self.song = Song.objects.create(genre="Afrobeats", title="Zombie", album="Zombie", release_year=1976,
+                                        artist=self.artist)
+        self.dupe = Song.objects.create(genre="Afrobeats", title="ZOMBIE!", album=None, release_year=None,
+                                        artist=self.copy)
+        self.kept = Song.objects.create(genre="Afrobeats", title="Water No Get Enemy", artist=self.copy)
+        Song.objects.create(genre="Afrobeats", title="Zombie", artist=self.other)
+
+
+class FindDuplicatesTest(DuplicatesTestCase):
+
+    def test_artists_grouped_by_normalized_name(self):
+        groups = find_duplicate_artists()
+        self.assertEqual([[a["id"] for a in group] for group in groups], [[self.copy.pk, self.artist.pk]])
+
+    def test_songs_grouped_across_duplicate_artists(self):
+        groups = find_duplicate_songs()
+        self.assertEqual(len(groups), 1)
+        # The copy with album and year is kept.
+        self.assertEqual([s["id"] for s in groups[0]], [self.song.pk, self.dupe.pk])
+        self.assertEqual(groups[0][1]["artist_name"], "fela  kuti")
+        self.assertEqual(groups[0][1]["score"], 1.0)
+
+    def test_songs_read_a_block_of_artists_at_a_time(self):
+        # Burna Boy, then both Fela Kutis, which are never split.
+        with self.assertNumQueries(3):
+            groups = find_duplicate_songs(block_size=1)
+        self.assertEqual([[s["id"] for s in group] for group in groups], [[self.song.pk, self.dupe.pk]])
+
+    def test_near_titles_within_threshold(self):
+        typo = Song.objects.create(genre="Pop", title="Water No Get Enemyy", artist=self.artist)
+        group = [s["id"] for g in find_duplicate_songs() for s in g if s["id"] in (self.kept.pk, typo.pk)]
+        self.assertEqual(sorted(group), [self.kept.pk, typo.pk])
+        self.assertEqual(len(find_duplicate_songs(threshold=1.0)), 1)
+
+    def test_different_albums_kept_apart(self):
+        Song.objects.filter(pk=self.dupe.pk).update(album="Live in Berlin")
+        self.assertEqual(find_duplicate_songs(), [])
+
+    def test_only_bucket_is_compared(self):
+        Song.objects.create(genre="Pop", title="Zombie", artist=Artist.objects.create(name="The Cranberries"))
+        calls = []
+        original = duplicates._title_clusters
+
+        def spy(songs, threshold):
+            calls.append(len(songs))
+            return original(songs, threshold)
+
+        duplicates._title_clusters = spy
+        try:
+            find_duplicate_songs()
+        finally:
+            duplicates._title_clusters = original
+        self.assertEqual(calls, [2])
+
+    def test_crowded_bucket_matches_exact_titles_only(self):
+        typo = Song.objects.create(genre="Pop", title="Zombiee", album="Zombie", artist=self.artist)
+        self.assertIn(typo.pk, [s["id"] for s in find_duplicate_songs()[0]])
+        original, duplicates.MAX_BUCKET = duplicates.MAX_BUCKET, 1
+        try:
+            self.assertNotIn(typo.pk, [s["id"] for s in find_duplicate_songs()[0]])
+        finally:
+            duplicates.MAX_BUCKET = original
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class MergeTest(DuplicatesTestCase):
+
+    def test_merge_artists_moves_songs(self):
+        moved = merge_artists(find_duplicate_artists())
+        self.assertEqual(moved, 1)
+        # The artist with more songs is kept and takes over missing details.
+        keeper = Artist.objects.get(pk=self.copy.pk)
+        self.assertFalse(Artist.objects.filter(pk=self.artist.pk).exists())
+        self.assertEqual(keeper.nationality, "Nigerian")
+        self.assertEqual(keeper.website, "fela.example")
+        self.assertEqual(keeper.song_count, 3)
+        self.assertEqual(Song.objects.get(pk=self.song.pk).artist_id, keeper.pk)
+        self.assertEqual(find_drift(), {})
+        self.assertEqual(find_artist_drift(), {})
+
+    def test_merge_songs_deletes_duplicates(self):
+        self.assertEqual(merge_songs(find_duplicate_songs()), 1)
+        self.assertFalse(Song.objects.filter(pk=self.dupe.pk).exists())
+        self.assertTrue(Song.objects.filter(pk=self.song.pk).exists())
+        self.assertEqual(find_drift(), {})
+        self.assertEqual(find_artist_drift(), {})
+
+    def test_merge_duplicates(self):
+        moved, deleted = merge_duplicates(find_duplicate_artists(), find_duplicate_songs())
+        self.assertEqual((moved, deleted), (1, 1))
+        self.assertEqual(Artist.objects.get(pk=self.copy.pk).song_count, 2)
+        self.assertEqual(find_duplicate_artists(), [])
+        self.assertEqual(find_duplicate_songs(), [])
+        self.assertEqual(find_drift(), {})
+        self.assertEqual(find_artist_drift(), {})
+
+    def test_nothing_to_merge(self):
+        self.assertEqual(merge_duplicates([], []), (0, 0))
+        self.assertEqual(Song.objects.count(), 4)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class StoredGroupsTest(DuplicatesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        store_groups(find_duplicate_artists(), find_duplicate_songs())
+        self.artist_group = DuplicateGroup.objects.get(kind=DuplicateGroup.ARTIST)
+        self.song_group = DuplicateGroup.objects.get(kind=DuplicateGroup.SONG)
+
+    def test_store_replaces_groups(self):
+        self.assertEqual([m["id"] for m in self.song_group.members], [self.song.pk, self.dupe.pk])
+        self.assertEqual(store_groups([], find_duplicate_songs()), 1)
+        self.assertEqual(DuplicateGroup.objects.get().kind, DuplicateGroup.SONG)
+
+    def test_recheck_reads_members_only(self):
+        with self.assertNumQueries(2):
+            artist_groups, song_groups = recheck([self.artist_group, self.song_group])
+        self.assertEqual([[a["id"] for a in group] for group in artist_groups], [[self.copy.pk, self.artist.pk]])
+        self.assertEqual([[s["id"] for s in group] for group in song_groups], [[self.song.pk, self.dupe.pk]])
+
+    def test_recheck_drops_changed_members(self):
+        Song.objects.filter(pk=self.dupe.pk).update(title="Zombie (Live)")
+        Artist.objects.filter(pk=self.artist.pk).update(name="Fela Anikulapo Kuti")
+        self.assertEqual(recheck([self.artist_group, self.song_group]), ([], []))
+
+    def test_recheck_needs_keeper(self):
+        Song.objects.filter(pk=self.song.pk).delete()
+        self.assertEqual(recheck([self.song_group]), ([], []))
+
+    def test_merge_stored(self):
+        self.assertEqual(merge_stored([self.song_group.pk]), (0, 1))
+        self.assertFalse(Song.objects.filter(pk=self.dupe.pk).exists())
+        self.assertTrue(Artist.objects.filter(pk=self.artist.pk).exists())
+        self.assertEqual(list(DuplicateGroup.objects.all()), [self.artist_group])
+        self.assertEqual(find_drift(), {})
+
+
+class DedupeCommandTest(DuplicatesTestCase):
+
+    def test_report(self):
+        out = StringIO()
+        call_command("dedupe_catalog", stdout=out)
+        self.assertIn("song %d 'Zombie' <- %d 'ZOMBIE!' (1.00)" % (self.song.pk, self.dupe.pk), out.getvalue())
+        self.assertIn("1 duplicate artist group(s), 1 duplicate song group(s).", out.getvalue())
+        self.assertIn("Stored 2 group(s)", out.getvalue())
+        self.assertTrue(Song.objects.filter(pk=self.dupe.pk).exists())
+        self.assertEqual(DuplicateGroup.objects.count(), 2)
+
+    def test_merge(self):
+        out = StringIO()
+        call_command("dedupe_catalog", "--merge", stdout=out)
+        self.assertIn("1 song(s) moved to their artist, 1 duplicate song(s) deleted", out.getvalue())
+        self.assertFalse(Artist.objects.filter(pk=self.artist.pk).exists())
+        self.assertFalse(DuplicateGroup.objects.exists())
+
+    def test_bad_threshold(self):
+        with self.assertRaises(CommandError):
+            call_command("dedupe_catalog", "--threshold", "2", stdout=StringIO())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class DuplicatesViewTest(DuplicatesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        call_command("dedupe_catalog", stdout=StringIO())
+        self.artist_group = DuplicateGroup.objects.get(kind=DuplicateGroup.ARTIST)
+        self.song_group = DuplicateGroup.objects.get(kind=DuplicateGroup.SONG)
+
+    def test_report(self):
+        response = self.client.get(reverse("duplicates"))
+        self.assertContains(response, "ZOMBIE!")
+        self.assertContains(response, 'name="group" value="%d"' % self.song_group.pk)
+        self.assertContains(response, 'name="group" value="%d"' % self.artist_group.pk)
+
+    def test_reads_stored_groups_only(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse("duplicates"), {"page_size": 1})
+
+    def test_pages_through_groups(self):
+        response = self.client.get(reverse("duplicates"), {"page_size": 1})
+        self.assertEqual(list(response.context["groups"]), [self.artist_group])
+        response = self.client.get(reverse("duplicates") + response.context["page_obj"].next_url)
+        self.assertEqual(list(response.context["groups"]), [self.song_group])
+
+    def test_expires_after_merge(self):
+        self.client.get(reverse("duplicates"))
+        self.client.post(reverse("merge_duplicates"), {"group": [self.song_group.pk, self.artist_group.pk]})
+        self.assertContains(self.client.get(reverse("duplicates")), "No duplicates found")
+
+    def test_merge_only_ticked_groups(self):
+        response = self.client.post(reverse("merge_duplicates"), {"group": [self.song_group.pk]})
+        self.assertRedirects(response, "/duplicates/")
+        self.assertFalse(Song.objects.filter(pk=self.dupe.pk).exists())
+        self.assertTrue(Artist.objects.filter(pk=self.artist.pk).exists())
+
+    def test_stale_members_left_alone(self):
+        self.dupe.title = "Zombie Nation"
+        self.dupe.save()
+        self.client.post(reverse("merge_duplicates"), {"group": [self.song_group.pk]})
+        self.assertTrue(Song.objects.filter(pk=self.dupe.pk).exists())
+        self.assertFalse(DuplicateGroup.objects.filter(pk=self.song_group.pk).exists())
+
+    def test_unknown_ids_ignored(self):
+        self.client.post(reverse("merge_duplicates"), {"group": ["0", "junk"]})
+        self.assertEqual(Song.objects.count(), 4)
+        self.assertEqual(Artist.objects.count(), 3)
+
+    def test_merge_requires_post(self):
+        self.assertEqual(self.client.get(reverse("merge_duplicates")).status_code, 405)
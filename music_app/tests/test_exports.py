@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+from unittest import mock
+
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+from music_app import exports
+from music_app.importer import CatalogImporter, read_csv
+from music_app.models import Artist, Song
+
+
+class ExportTestCase(TestCase):
+
+    def setUp(self):
+        self.artist = Artist.objects.create(
+            name="Export Artist",
+            age=33,
+            nationality="Kenyan",
+            website="https://export.example",
+            label="Export Label",
+        )
+        for i in range(5):
+            Song.objects.create(
+                genre="Jazz",
+                title="Track, \"%d\"" % i,
+                release_year=2010 + i,
+                album="Exported",
+                artist=self.artist,
+            )
+
+    def fetch(self, dataset, fmt):
+        response = self.client.get(reverse("export", kwargs={"dataset": dataset, "fmt": fmt}))
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content).decode()
+
+
+class ExportStreamTest(ExportTestCase):
+
+    def test_rows_in_primary_key_order_across_chunks(self):
+        rows = list(exports.iter_rows(Song, exports.SONG_COLUMNS, chunk_size=2))
+        self.assertEqual([row[0] for row in rows], list(Song.objects.order_by("id").values_list("id", flat=True)))
+
+    def test_each_chunk_is_one_query(self):
+        with self.assertNumQueries(4):
+            list(exports.iter_rows(Song, exports.SONG_COLUMNS, chunk_size=2))
+
+    def test_stream_is_lazy(self):
+        with self.assertNumQueries(0):
+            exports.export_stream("songs", "csv")
+
+    def test_buffered_groups_lines(self):
+        chunks = list(exports.buffered(["ab", "cd", "ef", "g"], flush_bytes=4))
+        self.assertEqual(chunks, ["abcd", "efg"])
+
+
+class ExportViewTest(ExportTestCase):
+
+    def test_songs_csv(self):
+        response, body = self.fetch("songs", "csv")
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        self.assertIn('filename="songs.csv"', response["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["title"], 'Track, "0"')
+        self.assertEqual(rows[0]["artist"], "Export Artist")
+        self.assertEqual(rows[0]["artist_label"], "Export Label")
+
+    def test_songs_ndjson(self):
+        response, body = self.fetch("songs", "ndjson")
+        self.assertTrue(response["Content-Type"].startswith("application/x-ndjson"))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[4]["release_year"], 2014)
+        self.assertEqual(rows[4]["artist_nationality"], "Kenyan")
+
+    def test_artists_csv(self):
+        _, body = self.fetch("artists", "csv")
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([r["name"] for r in rows], ["Export Artist"])
+
+    def test_query_count_tracks_chunks_not_rows(self):
+        small_chunks = lambda dataset, fmt: exports.export_stream(dataset, fmt, chunk_size=2)
+        with mock.patch("music_app.views.export_stream", small_chunks):
+            with self.assertNumQueries(4):
+                self.fetch("songs", "csv")
+
+    def test_export_round_trips_through_import(self):
+        _, body = self.fetch("songs", "csv")
+        Song.objects.all().delete()
+        CatalogImporter().run(read_csv(io.StringIO(body)))
+        self.assertEqual(Song.objects.filter(artist=self.artist).count(), 5)
+
+    def test_unknown_dataset_returns_404(self):
+        response = self.client.get(reverse("export", kwargs={"dataset": "users", "fmt": "csv"}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_format_returns_404(self):
+        response = self.client.get(reverse("export", kwargs={"dataset": "songs", "fmt": "xml"}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_post_not_allowed(self):
+        response = self.client.post(reverse("export", kwargs={"dataset": "songs", "fmt": "csv"}))
+        self.assertEqual(response.status_code, 405)
+
+
+class AsgiExportTest(ExportTestCase):
+    """Under ASGI, Django 4.1 iterates a streaming body on the event loop."""
+
+    async def fetch_async(self, dataset, fmt):
+        response = await self.async_client.get(reverse("export", kwargs={"dataset": dataset, "fmt": fmt}))
+        self.assertEqual(response.status_code, 200)
+        # Iterated here, on the loop, as ASGIHandler.send_response does.
+        return response, b"".join(response).decode()
+
+    async def test_songs_csv(self):
+        response, body = await self.fetch_async("songs", "csv")
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+        self.assertIn('filename="songs.csv"', response["Content-Disposition"])
+        self.assertEqual(response["Content-Length"], str(len(body.encode())))
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([row["title"] for row in rows], ['Track, "%d"' % i for i in range(5)])
+
+    async def test_artists_ndjson(self):
+        _, body = await self.fetch_async("artists", "ndjson")
+        self.assertEqual([json.loads(line)["name"] for line in body.splitlines()], ["Export Artist"])
+
+    async def test_spooled_in_chunks(self):
+        small_chunks = lambda dataset, fmt: exports.export_stream(dataset, fmt, chunk_size=2)
+        with mock.patch("music_app.views.export_stream", small_chunks):
+            _, body = await self.fetch_async("songs", "ndjson")
+        self.assertEqual(len(body.splitlines()), 5)
+
+    async def test_unknown_dataset_returns_404(self):
+        response = await self.async_client.get(reverse("export", kwargs={"dataset": "users", "fmt": "csv"}))
+        self.assertEqual(response.status_code, 404)
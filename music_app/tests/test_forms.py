@@ -179,3 +179,44 @@ class SongFormTest(TestCase):
             }
             form = SongForm(data=data)
             self.assertTrue(form.is_valid(), f"Genre '{genre_value}' should be valid")
+
+
+class ArtistLookupInputTest(TestCase):
+
+    def setUp(self):
+        self.artist = Artist.objects.create(name="Chosen Artist", nationality="", website="", label="")
+        for i in range(5):
+            Artist.objects.create(name="Unlisted %d" % i, nationality="", website="", label="")
+
+    def test_unbound_form_lists_no_artists(self):
+        with self.assertNumQueries(0):
+            html = str(SongForm()["artist"])
+        self.assertNotIn("<option", html)
+        self.assertIn('data-lookup-url="/api/artists/lookup/"', html)
+
+    def test_selected_artist_rendered_with_one_query(self):
+        form = SongForm(initial={"artist": self.artist.pk})
+        with self.assertNumQueries(1):
+            html = str(form["artist"])
+        self.assertIn('name="artist" value="%d"' % self.artist.pk, html)
+        self.assertIn('value="Chosen Artist #%d"' % self.artist.pk, html)
+        self.assertNotIn("Unlisted", html)
+
+    def test_unknown_artist_is_invalid(self):
+        form = SongForm(data={"genre": "Pop", "title": "Song", "release_year": 2023, "album": "A", "artist": 999999})
+        self.assertFalse(form.is_valid())
+        self.assertIn("artist", form.errors)
+        self.assertNotIn('value="None"', str(form["artist"]))
+
+    def test_names_are_not_shared_between_forms(self):
+        str(SongForm(initial={"artist": self.artist.pk})["artist"])
+        self.artist.name = "Renamed Artist"
+        self.artist.save()
+        html = str(SongForm(initial={"artist": self.artist.pk})["artist"])
+        self.assertIn('value="Renamed Artist #%d"' % self.artist.pk, html)
+
+    def test_namesakes_render_apart(self):
+        namesake = Artist.objects.create(name="Chosen Artist", nationality="", website="", label="Indie")
+        html = str(SongForm(initial={"artist": namesake.pk})["artist"])
+        self.assertIn('value="Chosen Artist (Indie) #%d"' % namesake.pk, html)
+
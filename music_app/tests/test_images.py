@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from music_app.images import rendition_name, rendition_names, THUMBNAIL_SIZE
+from music_app.models import Artist
+
+
+def make_image(size=(640, 480), fmt="PNG"):
+    buffer = BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+class ThumbnailTestCase(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_artist(self, name="Pictured", data=None):
+        return Artist.objects.create(
+            name=name,
+            nationality="",
+            website="",
+            label="",
+            image=SimpleUploadedFile("photo.png", data or make_image(), content_type="image/png"),
+        )
+
+
+class RenditionPipelineTest(ThumbnailTestCase):
+
+    def test_rendition_name_sits_next_to_original(self):
+        self.assertEqual(
+            rendition_name("images/photo.png", 96, "webp"),
+            "images/photo.96x96.webp",
+        )
+
+    def test_saving_artist_builds_all_renditions(self):
+        artist = self.create_artist()
+        for name in rendition_names(artist.image.name):
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)), name)
+
+    def test_renditions_have_fixed_size_and_format(self):
+        artist = self.create_artist()
+        small_webp = rendition_name(artist.image.name, THUMBNAIL_SIZE, "webp")
+        large_jpeg = rendition_name(artist.image.name, THUMBNAIL_SIZE * 2, "jpg")
+        with Image.open(os.path.join(self.media_root, small_webp)) as image:
+            self.assertEqual(image.format, "WEBP")
+            self.assertEqual(image.size, (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        with Image.open(os.path.join(self.media_root, large_jpeg)) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(image.size, (THUMBNAIL_SIZE * 2, THUMBNAIL_SIZE * 2))
+
+    def test_thumbnails_are_smaller_than_original(self):
+        data = make_image(size=(2000, 2000), fmt="BMP")
+        artist = self.create_artist(data=data)
+        name = rendition_name(artist.image.name, THUMBNAIL_SIZE, "webp")
+        self.assertLess(os.path.getsize(os.path.join(self.media_root, name)), len(data) / 100)
+
+    def test_unreadable_image_does_not_break_save(self):
+        with self.assertLogs("music_app.images", "WARNING"):
+            artist = Artist.objects.create(
+                name="Broken",
+                nationality="",
+                website="",
+                label="",
+                image=SimpleUploadedFile("broken.png", b"not an image"),
+            )
+        self.assertTrue(Artist.objects.filter(pk=artist.pk).exists())
+
+    def test_artist_without_image_is_skipped(self):
+        artist = Artist.objects.create(name="Plain", nationality="", website="", label="")
+        self.assertFalse(artist.image)
+        self.assertEqual(os.listdir(self.media_root), [])
+
+
+class ThumbnailTagTest(ThumbnailTestCase):
+
+    def render(self, artist):
+        template = Template("{% load artist_images %}{% artist_thumbnail artist %}")
+        return template.render(Context({"artist": artist}))
+
+    def test_renders_responsive_markup(self):
+        artist = self.create_artist()
+        html = self.render(artist)
+        self.assertIn('type="image/webp"', html)
+        self.assertIn("%s 1x" % rendition_name(artist.image.name, THUMBNAIL_SIZE, "webp"), html)
+        self.assertIn("%s 2x" % rendition_name(artist.image.name, THUMBNAIL_SIZE * 2, "webp"), html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('width="96" height="96"', html)
+
+    def test_does_not_link_original(self):
+        artist = self.create_artist()
+        html = self.render(artist)
+        self.assertNotIn('"%s"' % artist.image.url, html)
+
+    def test_empty_without_image(self):
+        artist = Artist.objects.create(name="Plain", nationality="", website="", label="")
+        self.assertEqual(self.render(artist).strip(), "")
+
+    def test_artist_list_uses_thumbnails(self):
+        artist = self.create_artist()
+        response = self.client.get(reverse("artists"))
+        self.assertContains(response, "<picture>")
+        self.assertNotContains(response, 'src="%s"' % artist.image.url)
+
+
+class GenerateThumbnailsCommandTest(ThumbnailTestCase):
+
+    def test_backfills_missing_renditions(self):
+        artist = self.create_artist()
+        for name in rendition_names(artist.image.name):
+            os.remove(os.path.join(self.media_root, name))
+        out = StringIO()
+        call_command("generate_thumbnails", stdout=out)
+        self.assertIn("Built thumbnails for 1 image(s)", out.getvalue())
+        for name in rendition_names(artist.image.name):
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+
+    def test_skips_existing_renditions(self):
+        self.create_artist()
+        out = StringIO()
+        call_command("generate_thumbnails", stdout=out)
+        self.assertIn("Built thumbnails for 0 image(s)", out.getvalue())
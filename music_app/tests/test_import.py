@@ -0,0 +1,171 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from music_app.importer import CatalogImporter, RowError, parse_row, read_ndjson
+from music_app.models import Artist, Song
+
+
+class ParseRowTest(TestCase):
+
+    def test_valid_row(self):
+        name, artist, song = parse_row({
+            "artist": " Wizkid ",
+            "title": "Essence",
+            "genre": "Afrobeats",
+            "release_year": "2020",
+            "album": "",
+            "artist_label": "Starboy",
+        })
+        self.assertEqual(name, "Wizkid")
+        self.assertEqual(artist["label"], "Starboy")
+        self.assertIsNone(artist["age"])
+        self.assertEqual(song, {
+            "title": "Essence",
+            "genre": "Afrobeats",
+            "release_year": 2020,
+            "album": None,
+        })
+
+    def test_unknown_genre_rejected(self):
+        with self.assertRaises(RowError):
+            parse_row({"artist": "A", "title": "T", "genre": "Polka"})
+
+    def test_missing_title_rejected(self):
+        with self.assertRaises(RowError):
+            parse_row({"artist": "A", "title": "", "genre": "Pop"})
+
+    def test_bad_year_rejected(self):
+        with self.assertRaises(RowError):
+            parse_row({"artist": "A", "title": "T", "genre": "Pop", "release_year": "soon"})
+
+    def test_overlong_title_rejected(self):
+        with self.assertRaises(RowError):
+            parse_row({"artist": "A", "title": "x" * 101, "genre": "Pop"})
+
+    def test_ndjson_reader_flags_bad_lines(self):
+        rows = list(read_ndjson(StringIO('{"a": 1}\n\nnot json\n[1]\n')))
+        self.assertEqual(rows[0], {"a": 1})
+        self.assertIsInstance(rows[1], RowError)
+        self.assertIsInstance(rows[2], RowError)
+        self.assertEqual(len(rows), 3)
+
+
+class CatalogImporterTest(TestCase):
+
+    def rows(self, count, artists=3):
+        for i in range(count):
+            yield {
+                "artist": "Artist %d" % (i % artists),
+                "title": "Song %d" % i,
+                "genre": "Pop",
+                "release_year": 2000 + i % 20,
+            }
+
+    def test_imports_songs_and_creates_artists(self):
+        importer = CatalogImporter(batch_size=4).run(self.rows(10))
+        self.assertEqual(importer.songs_created, 10)
+        self.assertEqual(importer.artists_created, 3)
+        self.assertEqual(Song.objects.count(), 10)
+        self.assertEqual(Artist.objects.count(), 3)
+        self.assertEqual(Song.objects.filter(artist__name="Artist 0").count(), 4)
+
+    def test_reuses_existing_artists(self):
+        existing = Artist.objects.create(name="Artist 1", nationality="", website="", label="")
+        CatalogImporter(batch_size=4).run(self.rows(6))
+        self.assertEqual(Artist.objects.filter(name="Artist 1").count(), 1)
+        self.assertEqual(existing.song_set.count(), 2)
+
+    def test_reports_each_batch(self):
+        batches = []
+        CatalogImporter(batch_size=4, on_batch=lambda i: batches.append(i.rows)).run(self.rows(10))
+        self.assertEqual(batches, [4, 8, 10])
+
+    def test_skips_invalid_rows(self):
+        errors = []
+        rows = [
+            {"artist": "Good", "title": "Fine", "genre": "Jazz"},
+            {"artist": "Bad", "title": "Nope", "genre": "Polka"},
+        ]
+        importer = CatalogImporter(on_error=lambda line, exc: errors.append(line)).run(rows)
+        self.assertEqual(importer.skipped, 1)
+        self.assertEqual(errors, [2])
+        self.assertFalse(Artist.objects.filter(name="Bad").exists())
+
+    def test_batch_query_count_does_not_grow_with_rows(self):
+        importer = CatalogImporter(batch_size=1000)
+        importer.load_artist_map()
+        rows = list(self.rows(150, artists=30))
+        # savepoint, artist insert, song insert, catalog count insert, one
+        # count update per (dimension, delta) pair, artist summary read,
+        # write and latest year update, release savepoint
+        with self.assertNumQueries(11):
+            importer.import_batch(rows)
+
+
+class ImportCatalogCommandTest(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(content)
+        return path
+
+    def call(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_catalog", *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_import(self):
+        path = self.write("feed.csv", (
+            "artist,title,genre,release_year,album,artist_nationality\n"
+            "Tems,Free Mind,R&B,2020,For Broken Ears,Nigerian\n"
+            "Tems,Higher,R&B,2021,,Nigerian\n"
+        ))
+        out, _ = self.call(path)
+        self.assertIn("Imported 2 songs and 1 new artists", out)
+        self.assertIn("rows/s", out)
+        tems = Artist.objects.get(name="Tems")
+        self.assertEqual(tems.nationality, "Nigerian")
+        self.assertEqual(Song.objects.get(title="Higher").album, None)
+
+    def test_ndjson_import(self):
+        lines = [
+            {"artist": "Asake", "title": "Sungba", "genre": "Afrobeats", "release_year": 2022},
+            {"artist": "Asake", "title": "Terminator", "genre": "Afrobeats"},
+        ]
+        path = self.write("feed.ndjson", "\n".join(json.dumps(line) for line in lines))
+        out, _ = self.call(path, "--batch-size", "1")
+        self.assertEqual(Song.objects.filter(artist__name="Asake").count(), 2)
+        self.assertEqual(out.count("rows read"), 2)
+
+    def test_rejected_rows_reported(self):
+        path = self.write("feed.csv", "artist,title,genre\nX,Y,Polka\n")
+        out, err = self.call(path)
+        self.assertIn("Row 1 skipped: unknown genre", err)
+        self.assertIn("1 skipped", out)
+
+    def test_unknown_extension_needs_format(self):
+        path = self.write("feed.txt", "")
+        with self.assertRaises(CommandError):
+            self.call(path)
+
+    def test_explicit_format(self):
+        path = self.write("feed.txt", "artist,title,genre\nX,Y,Pop\n")
+        self.call(path, "--format", "csv")
+        self.assertTrue(Song.objects.filter(title="Y").exists())
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            self.call(os.path.join(self.tmpdir, "missing.csv"))
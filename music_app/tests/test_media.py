@@ -0,0 +1,140 @@
+import os
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from music_app.images import rendition_names
+from music_app.media import collect_garbage, discard_unreferenced, orphaned_files, referenced_names
+from music_app.models import Artist
+from music_app.storage import TEMP_PREFIX
+from music_app.tests.test_images import ThumbnailTestCase, make_image
+
+
+@override_settings(MEDIA_GC_MIN_AGE=0)
+class MediaTestCase(ThumbnailTestCase):
+
+    def write(self, name, data=b"stale"):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return name
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
+
+
+class GarbageCollectorTest(MediaTestCase):
+
+    def test_referenced_names_include_renditions(self):
+        artist = self.create_artist()
+        self.assertEqual(referenced_names(), {artist.image.name, *rendition_names(artist.image.name)})
+
+    def test_removes_only_unreferenced_files(self):
+        artist = self.create_artist()
+        orphan = self.write("images/old.jpg")
+        nested = self.write("images/2019/older.png")
+        temp = self.write("images/%sabc" % TEMP_PREFIX)
+        self.assertEqual(collect_garbage(), (3, 15))
+        for name in (orphan, nested, temp):
+            self.assertFalse(self.exists(name), name)
+        for name in (artist.image.name, *rendition_names(artist.image.name)):
+            self.assertTrue(self.exists(name), name)
+
+    def test_shared_file_kept(self):
+        data = make_image()
+        first = self.create_artist("First", data)
+        self.create_artist("Second", data)
+        first.delete()
+        self.assertEqual(collect_garbage(), (0, 0))
+
+    def test_dry_run_keeps_files(self):
+        orphan = self.write("images/old.jpg")
+        self.assertEqual(collect_garbage(dry_run=True), (1, 5))
+        self.assertTrue(self.exists(orphan))
+
+    def test_recent_files_spared(self):
+        self.write("images/new.jpg")
+        self.assertEqual(list(orphaned_files(min_age=3600)), [])
+
+    def test_files_outside_upload_directory_ignored(self):
+        other = self.write("exports/report.csv")
+        collect_garbage()
+        self.assertTrue(self.exists(other))
+
+    def test_missing_directory(self):
+        self.assertEqual(collect_garbage(), (0, 0))
+
+    def test_command(self):
+        self.write("images/old.jpg")
+        out = StringIO()
+        call_command("gc_media", "--dry-run", stdout=out)
+        self.assertIn("Would remove 1 orphaned file(s), 5 bytes.", out.getvalue())
+        call_command("gc_media", stdout=out)
+        self.assertIn("Removed 1 orphaned file(s), 5 bytes.", out.getvalue())
+        self.assertFalse(self.exists("images/old.jpg"))
+
+
+@override_settings(MEDIA_CLEANUP_ON_COMMIT=True)
+class CleanupOnCommitTest(MediaTestCase):
+
+    def files(self, artist):
+        return [artist.image.name, *rendition_names(artist.image.name)]
+
+    def test_delete_removes_image_after_commit(self):
+        artist = self.create_artist()
+        names = self.files(artist)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("delete_artist", args=[artist.id]))
+        for name in names:
+            self.assertFalse(self.exists(name), name)
+
+    def test_nothing_removed_before_commit(self):
+        artist = self.create_artist()
+        with self.captureOnCommitCallbacks() as callbacks:
+            artist.delete()
+        self.assertTrue(self.exists(artist.image.name))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(self.exists(artist.image.name))
+
+    def test_replaced_image_removed(self):
+        artist = Artist.objects.get(pk=self.create_artist().pk)
+        old = self.files(artist)
+        artist.image = SimpleUploadedFile("new.png", make_image(size=(300, 300)), content_type="image/png")
+        with self.captureOnCommitCallbacks(execute=True):
+            artist.save()
+        for name in old:
+            self.assertFalse(self.exists(name), name)
+        self.assertTrue(self.exists(artist.image.name))
+
+    def test_unchanged_image_kept(self):
+        artist = self.create_artist()
+        with self.captureOnCommitCallbacks(execute=True):
+            artist.name = "Renamed"
+            artist.save()
+        self.assertTrue(self.exists(artist.image.name))
+
+    def test_shared_image_kept(self):
+        data = make_image()
+        first = self.create_artist("First", data)
+        self.create_artist("Second", data)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(self.exists(first.image.name))
+
+    @override_settings(MEDIA_GC_MIN_AGE=3600)
+    def test_recent_image_kept(self):
+        artist = self.create_artist()
+        self.assertFalse(discard_unreferenced(artist.image.name))
+        self.assertTrue(self.exists(artist.image.name))
+
+    @override_settings(MEDIA_CLEANUP_ON_COMMIT=False)
+    def test_disabled(self):
+        artist = self.create_artist()
+        with self.captureOnCommitCallbacks(execute=True):
+            artist.delete()
+        self.assertTrue(self.exists(artist.image.name))
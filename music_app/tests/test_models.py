@@ -131,6 +131,16 @@ class SongModelTest(TestCase):
     def test_artist_id_property(self):
         self.assertEqual(self.song.artistId, self.artist.id)
 
+    def test_artist_id_property_does_not_query(self):
+        song = Song.objects.get(pk=self.song.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(song.artistId, self.artist.id)
+
+    def test_with_artist_preloads_artist_name(self):
+        songs = list(Song.objects.with_artist())
+        with self.assertNumQueries(0):
+            self.assertEqual([s.artistName for s in songs], ["Song Artist"])
+
     def test_genre_choices(self):
         field = Song._meta.get_field("genre")
         expected_genres = [
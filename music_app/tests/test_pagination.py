@@ -0,0 +1,188 @@
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from music_app.models import Artist, Song
+from music_app.pagination import (
+    KeysetPaginator,
+    InvalidCursor,
+    encode_cursor,
+    decode_cursor,
+)
+
+
+class CursorEncodingTest(TestCase):
+
+    def test_round_trip(self):
+        cursor = encode_cursor(["Some Title", 42])
+        self.assertEqual(decode_cursor(cursor, 2), ["Some Title", 42])
+
+    def test_cursor_is_url_safe(self):
+        cursor = encode_cursor(["?&/+= weird", 1])
+        self.assertNotIn("=", cursor)
+        self.assertNotIn("/", cursor)
+        self.assertNotIn("+", cursor)
+
+    def test_garbage_cursor_raises(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor("not-a-cursor!!", 2)
+
+    def test_wrong_length_raises(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(encode_cursor([1]), 2)
+
+    def test_non_scalar_value_raises(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(encode_cursor([{"a": 1}, 2]), 2)
+
+
+class KeysetPaginatorTest(TestCase):
+
+    def setUp(self):
+        self.artist = Artist.objects.create(
+            name="Paginated Artist",
+            nationality="",
+            website="",
+            label="",
+        )
+        # Duplicate titles make sure the id tie-breaker is honoured.
+        for title in ["B", "A", "C", "B", "E", "D", "B"]:
+            Song.objects.create(genre="Pop", title=title, artist=self.artist)
+        self.expected = list(Song.objects.order_by("title", "id"))
+
+    def paginator(self, per_page=3):
+        return KeysetPaginator(Song.objects.all(), ("title", "id"), per_page)
+
+    def test_first_page(self):
+        page = self.paginator().page()
+        self.assertEqual(page.object_list, self.expected[:3])
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+        self.assertIsNone(page.previous_cursor)
+
+    def test_walk_forward_visits_every_row_once(self):
+        paginator = self.paginator()
+        seen = []
+        page = paginator.page()
+        seen.extend(page.object_list)
+        while page.has_next:
+            page = paginator.page(after=page.next_cursor)
+            seen.extend(page.object_list)
+        self.assertEqual(seen, self.expected)
+        self.assertFalse(page.has_next)
+        self.assertTrue(page.has_previous)
+
+    def test_walk_backward_returns_previous_page(self):
+        paginator = self.paginator()
+        first = paginator.page()
+        second = paginator.page(after=first.next_cursor)
+        back = paginator.page(before=second.previous_cursor)
+        self.assertEqual(back.object_list, first.object_list)
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_descending_ordering(self):
+        paginator = KeysetPaginator(Song.objects.all(), ("-title", "-id"), 4)
+        first = paginator.page()
+        second = paginator.page(after=first.next_cursor)
+        self.assertEqual(
+            first.object_list + second.object_list,
+            list(reversed(self.expected)),
+        )
+
+    def test_page_issues_single_query(self):
+        paginator = self.paginator()
+        cursor = paginator.page().next_cursor
+        with self.assertNumQueries(1):
+            paginator.page(after=cursor)
+
+    def test_deep_page_uses_index(self):
+        cursor = self.paginator().page().next_cursor
+        queryset = self.paginator()._fetch(("title", "id"), cursor)
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("song_title_id_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+class ArtistListPaginationTest(TestCase):
+
+    def setUp(self):
+        for i in range(5):
+            Artist.objects.create(
+                name="Artist %d" % i,
+                nationality="",
+                website="",
+                label="",
+            )
+
+    def test_page_size_parameter(self):
+        response = self.client.get(reverse("artists"), {"page_size": 2})
+        self.assertEqual(len(response.context["artists"]), 2)
+        self.assertTrue(response.context["is_paginated"])
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(reverse("artists"), {"page_size": 10000})
+        self.assertEqual(response.context["paginator"].per_page, 200)
+
+    def test_invalid_page_size_falls_back_to_default(self):
+        response = self.client.get(reverse("artists"), {"page_size": "lots"})
+        self.assertEqual(response.context["paginator"].per_page, 50)
+
+    def test_next_link_rendered(self):
+        response = self.client.get(reverse("artists"), {"page_size": 2})
+        page = response.context["page_obj"]
+        self.assertIn("after=" + page.next_cursor, page.next_url)
+        self.assertIn("page_size=2", page.next_url)
+        self.assertContains(response, "Next")
+
+    def test_following_next_link(self):
+        first = self.client.get(reverse("artists"), {"page_size": 2})
+        second = self.client.get(reverse("artists") + first.context["page_obj"].next_url)
+        names = [a.name for a in second.context["artists"]]
+        self.assertEqual(names, ["Artist 2", "Artist 3"])
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(reverse("artists"), {"after": "bogus!"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_sort_by_song_count(self):
+        for i, artist in enumerate(Artist.objects.order_by("id")):
+            for n in range(i % 3):
+                Song.objects.create(genre="Pop", title="Song %d" % n, release_year=2000 + n, artist=artist)
+        first = self.client.get(reverse("artists"), {"sort": "songs", "page_size": 3})
+        self.assertIn("sort=songs", first.context["page_obj"].next_url)
+        second = self.client.get(reverse("artists") + first.context["page_obj"].next_url)
+        names = [a.name for a in first.context["artists"]] + [a.name for a in second.context["artists"]]
+        self.assertEqual(names, ["Artist 2", "Artist 1", "Artist 4", "Artist 0", "Artist 3"])
+        self.assertContains(first, "<td>2001</td>", html=True)
+
+    def test_unknown_sort_uses_name(self):
+        response = self.client.get(reverse("artists"), {"sort": "bogus"})
+        self.assertEqual(response.context["artists"][0].name, "Artist 0")
+
+
+class SongListPaginationTest(TestCase):
+
+    def setUp(self):
+        artist = Artist.objects.create(
+            name="Song Pager",
+            nationality="",
+            website="",
+            label="",
+        )
+        for title in ["Zeta", "Alpha", "Mu"]:
+            Song.objects.create(genre="Rock", title=title, artist=artist)
+
+    def test_songs_ordered_by_title(self):
+        response = self.client.get(reverse("songs"))
+        titles = [s.title for s in response.context["songs"]]
+        self.assertEqual(titles, ["Alpha", "Mu", "Zeta"])
+
+    def test_previous_link_from_second_page(self):
+        first = self.client.get(reverse("songs"), {"page_size": 2})
+        second = self.client.get(reverse("songs") + first.context["page_obj"].next_url)
+        self.assertEqual([s.title for s in second.context["songs"]], ["Zeta"])
+        back = self.client.get(reverse("songs") + second.context["page_obj"].previous_url)
+        self.assertEqual([s.title for s in back.context["songs"]], ["Alpha", "Mu"])
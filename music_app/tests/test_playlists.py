@@ -0,0 +1,161 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from music_app.bulk import update_songs
+from music_app.deletion import delete_songs
+from music_app.models import Artist, CatalogCount, Song
+from music_app.playlists import NO_YEAR, genre_index, playlist, sample_ids, year_range
+
+
+class PlaylistTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.artist = Artist.objects.create(name="Sampled", nationality="", website="", label="")
+        for year in range(1960, 2000):
+            Song.objects.create(genre="Jazz", title="Jazz %d" % year, release_year=year, artist=self.artist)
+        for year in range(1990, 2000):
+            Song.objects.create(genre="Pop", title="Pop %d" % year, release_year=year, artist=self.artist)
+        Song.objects.create(genre="Jazz", title="Undated", release_year=None, artist=self.artist)
+
+
+class GenreIndexTest(PlaylistTestCase):
+
+    def test_sorted_by_year_with_unknown_first(self):
+        years, ids = genre_index("Jazz")
+        self.assertEqual(years[0], NO_YEAR)
+        self.assertEqual(list(years[1:]), list(range(1960, 2000)))
+        self.assertEqual(len(ids), 41)
+
+    def test_cached_until_songs_change(self):
+        genre_index("Pop")
+        # Only the version stamp is read.
+        with self.assertNumQueries(1):
+            genre_index("Pop")
+        Song.objects.create(genre="Pop", title="Fresh", release_year=2001, artist=self.artist)
+        self.assertEqual(len(genre_index("Pop")[1]), 11)
+
+    def test_kept_through_other_genres_and_artist_edits(self):
+        genre_index("Pop")
+        Song.objects.create(genre="Jazz", title="Elsewhere", release_year=1999, artist=self.artist)
+        self.artist.name = "Resampled"
+        self.artist.save()
+        with self.assertNumQueries(1):
+            genre_index("Pop")
+
+    def test_versions_come_from_the_database(self):
+        # Another worker's write leaves this process's cache alone; only the
+        # rows it changes can tell.
+        genre_index("Pop")
+        cache.clear()
+        Song.objects.filter(genre="Pop", release_year=1990).update(release_year=1950, updated_at=timezone.now())
+        self.assertEqual(genre_index("Pop")[0][0], 1950)
+        CatalogCount.objects.filter(dimension=CatalogCount.GENRE, key="Pop").update(count=0)
+        with self.assertNumQueries(2):
+            genre_index("Pop")
+
+    def test_rebuilt_after_genre_or_year_change(self):
+        genre_index("Pop")
+        song = Song.objects.filter(genre="Pop").first()
+        song.release_year = 1950
+        song.save()
+        self.assertEqual(genre_index("Pop")[0][0], 1950)
+        update_songs([song.pk], {"genre": "Jazz"})
+        self.assertEqual(len(genre_index("Pop")[1]), 9)
+        delete_songs(Song.objects.filter(genre="Pop", release_year=1999))
+        self.assertEqual(len(genre_index("Pop")[1]), 8)
+
+    def test_year_range(self):
+        years, _ = genre_index("Jazz")
+        self.assertEqual(year_range(years), (0, 41))
+        start, stop = year_range(years, 1970, 1979)
+        self.assertEqual(list(years[start:stop]), list(range(1970, 1980)))
+        self.assertEqual(year_range(years, None, 1961), (1, 3))
+        start, stop = year_range(years, 2050, None)
+        self.assertEqual(start, stop)
+
+
+class SampleTest(PlaylistTestCase):
+
+    def years(self, ids):
+        return set(Song.objects.filter(pk__in=ids).values_list("release_year", flat=True))
+
+    def test_filters_by_genre_and_years_without_repeats(self):
+        ids = sample_ids(8, ["Jazz"], 1970, 1979, seed=1)
+        self.assertEqual(len(ids), 8)
+        self.assertEqual(len(set(ids)), 8)
+        self.assertTrue(self.years(ids) <= set(range(1970, 1980)))
+        self.assertEqual(set(Song.objects.filter(pk__in=ids).values_list("genre", flat=True)), {"Jazz"})
+
+    def test_spans_several_genres(self):
+        ids = sample_ids(20, ["Jazz", "Pop"], 1990, 1999, seed=3)
+        self.assertEqual(len(set(ids)), 20)
+        genres = Song.objects.filter(pk__in=ids).values_list("genre", flat=True)
+        self.assertEqual(set(genres), {"Jazz", "Pop"})
+
+    def test_repeated_genre_counted_once(self):
+        ids = sample_ids(50, ["Pop", "Pop"], seed=5)
+        self.assertEqual(len(ids), 10)
+        self.assertEqual(sorted(ids), sorted(sample_ids(50, ["Pop"], seed=5)))
+
+    def test_short_of_matches_returns_all(self):
+        self.assertEqual(len(sample_ids(50, ["Pop"], seed=2)), 10)
+
+    def test_no_matches(self):
+        self.assertEqual(sample_ids(5, ["Rock"]), [])
+
+    def test_seed_replays(self):
+        self.assertEqual(sample_ids(10, seed=42), sample_ids(10, seed=42))
+        self.assertNotEqual(sample_ids(10, seed=42), sample_ids(10, seed=43))
+
+    def test_all_genres_by_default(self):
+        self.assertEqual(len(sample_ids(100)), 51)
+
+    def test_playlist_query_count(self):
+        genre_index("Jazz")
+        with CaptureQueriesContext(connection) as queries:
+            songs = playlist(5, ["Jazz"], seed=7)
+        # The version stamp, then the drawn songs.
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("RANDOM", queries[1]["sql"].upper())
+        self.assertEqual([s.pk for s in songs], sample_ids(5, ["Jazz"], seed=7))
+
+
+class GenieApiTest(PlaylistTestCase):
+
+    def test_playlist(self):
+        response = self.client.get(reverse("api_genie"), {"genre": "Jazz", "from": 1980, "to": 1989, "size": 4})
+        data = response.json()
+        self.assertEqual(len(data["results"]), 4)
+        for song in data["results"]:
+            self.assertEqual(song["genre"], "Jazz")
+            self.assertTrue(1980 <= song["release_year"] <= 1989)
+            self.assertEqual(song["artist"]["name"], "Sampled")
+
+    def test_seed_returned_and_replayed(self):
+        first = self.client.get(reverse("api_genie"), {"size": 5}).json()
+        again = self.client.get(reverse("api_genie"), {"size": 5, "seed": first["seed"]}).json()
+        self.assertEqual([s["id"] for s in first["results"]], [s["id"] for s in again["results"]])
+
+    def test_size_capped(self):
+        response = self.client.get(reverse("api_genie"), {"size": 1000})
+        self.assertEqual(len(response.json()["results"]), 51)
+
+    def test_invalid_parameters(self):
+        for params in ({"genre": "Polka"}, {"from": "long ago"}, {"seed": -1}):
+            response = self.client.get(reverse("api_genie"), params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn("error", response.json())
+
+    def test_repeated_genre_parameter(self):
+        response = self.client.get(reverse("api_genie") + "?genre=Pop&genre=Pop&size=50")
+        ids = [song["id"] for song in response.json()["results"]]
+        self.assertEqual(len(ids), 10)
+        self.assertEqual(len(set(ids)), 10)
+
+    def test_post_not_allowed(self):
+        self.assertEqual(self.client.post(reverse("api_genie")).status_code, 405)
@@ -0,0 +1,100 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from music_app import query_plans
+from music_app.models import Artist, Song
+
+
+class FindProblemsTest(TestCase):
+
+    def test_full_scan_flagged(self):
+        self.assertEqual(
+            query_plans.find_problems(["SCAN music_app_song"]),
+            ["full scan: SCAN music_app_song"],
+        )
+
+    def test_index_walk_not_flagged(self):
+        self.assertEqual(query_plans.find_problems(["SCAN music_app_song USING INDEX song_title_id_idx"]), [])
+        self.assertEqual(query_plans.find_problems(["SCAN music_app_song USING COVERING INDEX x"]), [])
+
+    def test_index_search_not_flagged(self):
+        self.assertEqual(query_plans.find_problems(["SEARCH music_app_song USING INDEX i (genre=?)"]), [])
+
+    def test_temp_sort_flagged(self):
+        problems = query_plans.find_problems([
+            "SEARCH music_app_song USING INDEX i (genre=?)",
+            "USE TEMP B-TREE FOR ORDER BY",
+        ])
+        self.assertEqual(problems, ["unindexed sort: USE TEMP B-TREE FOR ORDER BY"])
+
+    def test_fts_rank_sort_not_flagged(self):
+        self.assertEqual(query_plans.find_problems([
+            "SCAN music_app_song_fts VIRTUAL TABLE INDEX 0:M3",
+            "USE TEMP B-TREE FOR ORDER BY",
+        ]), [])
+
+
+class IndexCoverageTest(TestCase):
+
+    def setUp(self):
+        self.artist = Artist.objects.create(name="Indexed", nationality="", website="", label="")
+        Song.objects.create(genre="Pop", title="Indexed Song", release_year=1995, artist=self.artist)
+
+    def plan_for(self, queryset):
+        return query_plans.explain(*query_plans.queryset_sql(queryset))
+
+    def test_access_paths_use_indexes(self):
+        for name, build in query_plans.ACCESS_PATHS.items():
+            with self.subTest(name):
+                self.assertEqual(query_plans.find_problems(self.plan_for(build())), [])
+
+    def test_genre_year_filter_uses_composite_index(self):
+        plan = self.plan_for(query_plans.ACCESS_PATHS["songs by genre and year range"]())
+        self.assertIn("song_genre_year_idx", " ".join(plan))
+
+    def test_artist_song_table_is_read_in_index_order(self):
+        plan = self.plan_for(self.artist.song_set.all())
+        self.assertIn("song_artist_title_idx", " ".join(plan))
+        self.assertEqual(query_plans.find_problems(plan), [])
+
+    def test_capture_selects_records_only_selects(self):
+        with query_plans.capture_selects() as queries:
+            self.client.get(reverse("songs"))
+        self.assertTrue(queries)
+        self.assertTrue(all(sql.lstrip().upper().startswith("SELECT") for sql, _ in queries))
+
+    def test_default_orderings(self):
+        self.assertEqual(Song._meta.ordering, ["title", "id"])
+        self.assertEqual(Artist._meta.ordering, ["name", "id"])
+
+
+class ExplainQueriesCommandTest(TestCase):
+
+    def setUp(self):
+        artist = Artist.objects.create(name="Explained", nationality="", website="", label="")
+        Song.objects.create(genre="Jazz", title="Explained Song", artist=artist)
+
+    def test_clean_run(self):
+        out = StringIO()
+        call_command("explain_queries", "--fail-on-scan", stdout=out, stderr=StringIO())
+        self.assertIn("0 with problems", out.getvalue())
+
+    def test_verbose_plans(self):
+        out = StringIO()
+        call_command("explain_queries", "--verbose-plans", stdout=out, stderr=StringIO())
+        self.assertIn("[/songs/]", out.getvalue())
+        self.assertIn("song_title_id_idx", out.getvalue())
+
+    def test_unindexed_filter_is_flagged(self):
+        paths = dict(query_plans.ACCESS_PATHS)
+        paths["songs by album"] = lambda: Song.objects.filter(album="Unindexed").order_by()
+        with mock.patch("music_app.management.commands.explain_queries.ACCESS_PATHS", paths):
+            out = StringIO()
+            call_command("explain_queries", stdout=out, stderr=StringIO())
+            self.assertIn("!! full scan: SCAN music_app_song", out.getvalue())
+            with self.assertRaises(CommandError):
+                call_command("explain_queries", "--fail-on-scan", stdout=StringIO(), stderr=StringIO())
@@ -0,0 +1,250 @@
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from music_app.models import Artist, ArtistProfile, ArtistSimilarity, Song
+from music_app import recommendations
+from music_app.recommendations import (
+    DIMENSIONS, GENRES, count_features, feature_vector, load_profiles, profiles, rebuild, refresh, similar_artists,
+    top_similar,
+)
+
+
+class RecommendationTestCase(TestCase):
+
+    def artist(self, name, songs):
+        artist = Artist.objects.create(name=name, nationality="", website="", label="")
+        for n, (genre, year) in enumerate(songs):
+            Song.objects.create(genre=genre, title="%s %d" % (name, n), release_year=year, artist=artist)
+        return artist
+
+    def setUp(self):
+        self.jazz = self.artist("Jazz A", [("Jazz", 1960), ("Jazz", 1965), ("Soul", 1970)])
+        self.jazz_too = self.artist("Jazz B", [("Jazz", 1962), ("Soul", 1968)])
+        self.pop = self.artist("Pop A", [("Pop", 2010), ("Pop", 2015)])
+        self.pop_too = self.artist("Pop B", [("Pop", 2012), ("Electro", 2019)])
+        self.silent = Artist.objects.create(name="Silent", nationality="", website="", label="")
+
+    def names(self, artist):
+        return [name for _, name, _ in similar_artists(artist.pk)]
+
+
+class FeatureTest(RecommendationTestCase):
+
+    def test_counts_genres_and_decades(self):
+        counts = count_features([self.jazz.pk])
+        self.assertEqual(list(counts), [self.jazz.pk])
+        vector = counts[self.jazz.pk]
+        self.assertEqual(vector[GENRES.index("Jazz")], 2)
+        self.assertEqual(vector[GENRES.index("Soul")], 1)
+        self.assertEqual(vector[len(GENRES) + 1], 2)  # 1960s
+        self.assertEqual(vector[len(GENRES) + 2], 1)  # 1970s
+
+    def test_out_of_range_years_clamped(self):
+        old = self.artist("Old", [("Jazz", 1920), ("Jazz", None)])
+        vector = count_features([old.pk])[old.pk]
+        self.assertEqual(vector[len(GENRES)], 1)
+        self.assertEqual(vector[len(GENRES):].sum(), 1)
+
+    def test_vector_is_unit_length(self):
+        vector = feature_vector(count_features([self.pop.pk])[self.pop.pk])
+        self.assertAlmostEqual(float(np.linalg.norm(vector)), 1.0, places=5)
+        self.assertEqual(vector.shape, (DIMENSIONS,))
+
+    def test_empty_counts_give_zero_vector(self):
+        self.assertFalse(feature_vector(np.zeros(DIMENSIONS, dtype=np.float32)).any())
+
+
+class TopSimilarTest(TestCase):
+
+    def test_batches_rank_and_skip_self_and_unrelated(self):
+        ids = np.array([1, 2, 3, 4])
+        matrix = np.array([[1, 0], [0.8, 0.6], [0, 1], [0.6, 0.8]], dtype=np.float32)
+        results = dict(top_similar([1, 3, 99], ids, matrix, k=2))
+        self.assertEqual(set(results), {1, 3})
+        self.assertEqual([similar for similar, _ in results[1]], [2, 4])
+        self.assertEqual([similar for similar, _ in results[3]], [4, 2])
+        self.assertAlmostEqual(results[1][0][1], 0.8, places=5)
+
+    def test_single_artist_has_no_matches(self):
+        self.assertEqual(list(top_similar([1], np.array([1]), np.ones((1, 2), dtype=np.float32))), [(1, [])])
+
+
+class RebuildTest(RecommendationTestCase):
+
+    def test_lists_favour_shared_genres_and_eras(self):
+        rebuild()
+        self.assertEqual(self.names(self.jazz)[0], "Jazz B")
+        self.assertEqual(self.names(self.pop)[0], "Pop B")
+        self.assertNotIn("Pop A", self.names(self.jazz))
+        self.assertEqual(self.names(self.silent), [])
+        self.assertFalse(ArtistProfile.objects.filter(artist=self.silent).exists())
+
+    def test_limit(self):
+        rebuild(k=1)
+        self.assertEqual(ArtistSimilarity.objects.filter(artist=self.jazz).count(), 1)
+
+    def test_floors_of_full_lists(self):
+        rebuild(k=1)
+        score = ArtistSimilarity.objects.get(artist=self.jazz).score
+        self.assertAlmostEqual(ArtistProfile.objects.get(artist=self.jazz).floor, score, places=5)
+        rebuild()
+        self.assertEqual(set(ArtistProfile.objects.values_list("floor", flat=True)), {0.0})
+
+    def test_single_indexed_read(self):
+        rebuild()
+        with self.assertNumQueries(1):
+            list(similar_artists(self.jazz.pk))
+
+    def test_command(self):
+        out = StringIO()
+        call_command("build_recommendations", stdout=out)
+        self.assertIn("Built recommendations for 4 artist(s).", out.getvalue())
+
+
+@override_settings(RECOMMENDATIONS_LIVE=True)
+class IncrementalRefreshTest(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        rebuild()
+
+    def assertMatchesRebuild(self):
+        refreshed = {a.pk: list(similar_artists(a.pk)) for a in Artist.objects.all()}
+        rebuild()
+        rebuilt = {a.pk: list(similar_artists(a.pk)) for a in Artist.objects.all()}
+        for artist_id in rebuilt:
+            self.assertEqual([s for s, _, _ in refreshed[artist_id]], [s for s, _, _ in rebuilt[artist_id]], artist_id)
+
+    def test_song_change_moves_artist_between_lists(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for song in Song.objects.filter(artist=self.pop_too):
+                song.genre, song.release_year = "Jazz", 1963
+                song.save()
+        self.assertEqual(self.names(self.pop_too)[0], "Jazz A")
+        self.assertIn("Pop B", self.names(self.jazz))
+        self.assertNotIn("Pop B", self.names(self.pop))
+        self.assertMatchesRebuild()
+
+    def test_new_artist_enters_lists(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            newcomer = self.artist("Pop C", [("Pop", 2011)])
+        self.assertEqual(self.names(newcomer)[0], "Pop A")
+        self.assertIn("Pop C", self.names(self.pop))
+        self.assertMatchesRebuild()
+
+    def test_deleted_artist_leaves_lists(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("delete_artist", args=[self.jazz_too.pk]))
+        self.assertNotIn("Jazz B", self.names(self.jazz))
+        self.assertMatchesRebuild()
+
+    def test_refresh_touches_only_reachable_lists(self):
+        stale = refresh([self.jazz.pk])
+        self.assertIn(self.jazz.pk, stale)
+        self.assertNotIn(self.pop.pk, stale)
+
+    @override_settings(RECOMMENDATIONS_LIVE=False)
+    def test_disabled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            newcomer = self.artist("Pop C", [("Pop", 2011)])
+        self.assertEqual(self.names(newcomer), [])
+
+    def test_failed_refresh_is_logged_not_raised(self):
+        with mock.patch("music_app.recommendations.refresh", side_effect=ValueError("shapes")):
+            with self.assertLogs("music_app.recommendations", "WARNING"):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.artist("Pop C", [("Pop", 2011)])
+        self.assertTrue(Artist.objects.filter(name="Pop C").exists())
+
+    def test_profiles_round_trip(self):
+        ids, matrix, floors, _ = load_profiles()
+        self.assertEqual(ids.tolist(), sorted([self.jazz.pk, self.jazz_too.pk, self.pop.pk, self.pop_too.pk]))
+        self.assertEqual(matrix.shape, (4, DIMENSIONS))
+        self.assertEqual(floors.shape, (4,))
+
+    def test_refresh_matches_rebuild_with_full_lists(self):
+        rebuild(k=1)
+        for song in Song.objects.filter(artist=self.pop_too):
+            song.genre, song.release_year = "Jazz", 1963
+            song.save()
+        refresh([self.pop_too.pk], k=1)
+        refreshed = dict(ArtistSimilarity.objects.values_list("artist_id", "similar_id"))
+        floors = dict(ArtistProfile.objects.values_list("artist_id", "floor"))
+        rebuild(k=1)
+        self.assertEqual(refreshed, dict(ArtistSimilarity.objects.values_list("artist_id", "similar_id")))
+        for artist_id, floor in ArtistProfile.objects.values_list("artist_id", "floor"):
+            self.assertAlmostEqual(floors[artist_id], floor, places=5)
+
+
+@override_settings(RECOMMENDATIONS_LIVE=False)
+class ProfileSyncTest(RecommendationTestCase):
+    """profiles() as seen by one process while others write."""
+
+    def setUp(self):
+        super().setUp()
+        rebuild()
+        profiles()
+
+    def test_unchanged_profiles_not_read_again(self):
+        with self.assertNumQueries(2):
+            ids, _, _ = profiles()
+        self.assertEqual(len(ids), 4)
+
+    def test_reads_rows_another_process_changed(self):
+        vector = np.zeros(DIMENSIONS, dtype=np.float32)
+        vector[0] = 1
+        ArtistProfile.objects.filter(artist=self.jazz).update(vector=vector.tobytes(), updated_at=timezone.now())
+        ids, matrix, _ = profiles()
+        self.assertEqual(matrix[ids.tolist().index(self.jazz.pk)].tolist(), vector.tolist())
+
+    def test_reads_rows_another_process_added(self):
+        newcomer = self.artist("Pop C", [("Pop", 2011)])
+        ArtistProfile.objects.create(artist=newcomer, vector=np.ones(DIMENSIONS, dtype=np.float32).tobytes())
+        self.assertIn(newcomer.pk, profiles()[0].tolist())
+
+    def test_drops_rows_another_process_deleted(self):
+        ArtistProfile.objects.filter(artist=self.pop).delete()
+        self.assertEqual(len(profiles()[0]), 3)
+        self.assertNotIn(self.pop.pk, profiles()[0].tolist())
+
+    def test_refresh_reads_only_changed_profiles(self):
+        Song.objects.create(genre="Pop", title="Another", release_year=2011, artist=self.pop)
+        with mock.patch("music_app.recommendations.load_profiles", wraps=load_profiles) as loaded:
+            refresh([self.pop.pk])
+        self.assertEqual(loaded.call_count, 1)
+        self.assertIsNotNone(loaded.call_args.args[0])
+
+    def test_failed_refresh_drops_kept_profiles(self):
+        with mock.patch("music_app.recommendations.top_similar", side_effect=ValueError("shapes")):
+            with self.assertRaises(ValueError):
+                refresh([self.pop.pk])
+        self.assertNotIn("all", recommendations._profiles)
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class ArtistPageRecommendationTest(RecommendationTestCase):
+
+    def test_page_lists_similar_artists(self):
+        rebuild()
+        response = self.client.get(reverse("artist_details", args=[self.jazz.pk]))
+        self.assertContains(response, "More Like This")
+        self.assertContains(response, '<a href="%s">Jazz B</a>' % reverse("artist_details", args=[self.jazz_too.pk]))
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_rename_expires_recommending_pages(self):
+        rebuild()
+        url = reverse("artist_details", args=[self.jazz.pk])
+        self.client.get(url)
+        self.jazz_too.name = "Jazz Renamed"
+        self.jazz_too.save()
+        self.assertContains(self.client.get(url), "Jazz Renamed")
+
+    def test_no_section_without_recommendations(self):
+        response = self.client.get(reverse("artist_details", args=[self.silent.pk]))
+        self.assertNotContains(response, "More Like This")
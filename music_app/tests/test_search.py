@@ -0,0 +1,172 @@
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from music_app.models import Artist, Song
+from music_app.search import artists_by_prefix, build_match_query, search_artists, search_songs
+
+
+class MatchQueryTest(TestCase):
+
+    def test_words_become_quoted_prefixes(self):
+        self.assertEqual(build_match_query("love song"), '"love"* "song"*')
+
+    def test_operators_are_neutralised(self):
+        self.assertEqual(build_match_query('NEAR("a" OR b*) -c'), '"NEAR"* "a"* "OR"* "b"* "c"*')
+
+    def test_blank_query(self):
+        self.assertEqual(build_match_query("  ?! "), "")
+
+
+class SearchIndexTest(TestCase):
+
+    def setUp(self):
+        self.burna = Artist.objects.create(
+            name="Burna Boy",
+            nationality="Nigerian",
+            website="",
+            label="Atlantic",
+        )
+        self.adele = Artist.objects.create(
+            name="Adele",
+            nationality="British",
+            website="",
+            label="XL Recordings",
+        )
+        self.last_last = Song.objects.create(
+            genre="Afrobeats", title="Last Last", album="Love, Damini", artist=self.burna,
+        )
+        self.hello = Song.objects.create(
+            genre="Pop", title="Hello", album="25", artist=self.adele,
+        )
+
+    def test_finds_song_by_title(self):
+        self.assertEqual(search_songs("last"), [self.last_last])
+
+    def test_finds_song_by_album(self):
+        self.assertEqual(search_songs("damini"), [self.last_last])
+
+    def test_finds_song_by_artist_name(self):
+        self.assertEqual(search_songs("adele"), [self.hello])
+
+    def test_prefix_match(self):
+        self.assertEqual(search_songs("hel"), [self.hello])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(search_songs("last hello"), [])
+
+    def test_finds_artist_by_label_and_nationality(self):
+        self.assertEqual(search_artists("atlantic"), [self.burna])
+        self.assertEqual(search_artists("british"), [self.adele])
+
+    def test_title_hits_outrank_album_hits(self):
+        in_album = Song.objects.create(
+            genre="Pop", title="Skyfall", album="Hello Tour", artist=self.adele,
+        )
+        self.assertEqual(search_songs("hello"), [self.hello, in_album])
+
+    def test_limit(self):
+        for i in range(5):
+            Song.objects.create(genre="Pop", title="Echo %d" % i, artist=self.adele)
+        self.assertEqual(len(search_songs("echo", limit=3)), 3)
+
+    def test_update_reindexes_song(self):
+        self.hello.title = "Goodbye"
+        self.hello.save()
+        self.assertEqual(search_songs("hello"), [])
+        self.assertEqual(search_songs("goodbye"), [self.hello])
+
+    def test_queryset_update_reindexes_song(self):
+        Song.objects.filter(pk=self.hello.pk).update(album="Thirty")
+        self.assertEqual(search_songs("thirty"), [self.hello])
+
+    def test_delete_removes_song(self):
+        self.hello.delete()
+        self.assertEqual(search_songs("hello"), [])
+
+    def test_artist_rename_reindexes_their_songs(self):
+        self.burna.name = "Damini Ogulu"
+        self.burna.save()
+        self.assertEqual(search_songs("ogulu"), [self.last_last])
+        self.assertEqual(search_artists("burna"), [])
+
+    def test_artist_delete_removes_artist_and_songs(self):
+        self.burna.delete()
+        self.assertEqual(search_artists("burna"), [])
+        self.assertEqual(search_songs("last"), [])
+
+    def test_bulk_create_is_indexed(self):
+        Song.objects.bulk_create([
+            Song(genre="Soul", title="Bulk Loaded", artist=self.adele),
+        ])
+        self.assertEqual([s.title for s in search_songs("bulk")], ["Bulk Loaded"])
+
+    def test_match_uses_fts_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "EXPLAIN QUERY PLAN SELECT rowid FROM music_app_song_fts "
+                "WHERE music_app_song_fts MATCH %s",
+                ['"hello"*'],
+            )
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("VIRTUAL TABLE INDEX", plan)
+
+
+class SearchViewTest(TestCase):
+
+    def setUp(self):
+        artist = Artist.objects.create(
+            name="Searchable Artist",
+            nationality="Ghanaian",
+            website="",
+            label="",
+        )
+        self.song = Song.objects.create(genre="Jazz", title="Findable Tune", artist=artist)
+
+    def test_get_returns_200(self):
+        response = self.client.get(reverse("search"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_uses_correct_template(self):
+        response = self.client.get(reverse("search"))
+        self.assertTemplateUsed(response, "search.html")
+
+    def test_results_in_context(self):
+        response = self.client.get(reverse("search"), {"q": "findable"})
+        self.assertEqual(response.context["songs"], [self.song])
+        self.assertEqual(response.context["artists"], [])
+        self.assertContains(response, "Findable Tune")
+
+    def test_empty_query_has_no_results(self):
+        response = self.client.get(reverse("search"), {"q": ""})
+        self.assertNotIn("songs", response.context)
+
+    def test_query_count_is_constant(self):
+        with self.assertNumQueries(4):
+            self.client.get(reverse("search"), {"q": "searchable"})
+
+
+class ArtistPrefixTest(TestCase):
+
+    def setUp(self):
+        for name in ["Burna Boy", "burial", "Adele", "Bu%rst", "Édith Piaf"]:
+            Artist.objects.create(name=name, nationality="", website="", label="")
+
+    def names(self, prefix, limit=20):
+        return [name for _, name, _ in artists_by_prefix(prefix, limit)]
+
+    def test_case_insensitive_prefix_in_name_order(self):
+        self.assertEqual(self.names("BU"), ["Bu%rst", "burial", "Burna Boy"])
+        self.assertEqual(self.names(" burn "), ["Burna Boy"])
+
+    def test_wildcards_are_literal(self):
+        self.assertEqual(self.names("bu%"), ["Bu%rst"])
+
+    def test_non_ascii_prefix(self):
+        self.assertEqual(self.names("Éd"), ["Édith Piaf"])
+
+    def test_blank_prefix_lists_first_names(self):
+        self.assertEqual(self.names("", limit=2), ["Adele", "Bu%rst"])
+
+    def test_limit(self):
+        self.assertEqual(len(self.names("b", limit=1)), 1)
+
@@ -0,0 +1,280 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from music_app.importer import CatalogImporter
+from music_app.models import Artist, CatalogCount, Song
+from music_app.bulk import update_songs
+from music_app.deletion import delete_songs
+from music_app.stats import (
+    compute_artist_summaries, compute_counts, decade_counts, find_artist_drift, find_drift, genre_counts, rebuild,
+    rebuild_artist_summaries, top_artists,
+)
+
+
+class CatalogCountTestCase(TestCase):
+
+    def setUp(self):
+        self.artist = Artist.objects.create(name="Counted", nationality="", website="", label="")
+        self.other = Artist.objects.create(name="Other", nationality="", website="", label="")
+
+    def count(self, dimension, key):
+        row = CatalogCount.objects.filter(dimension=dimension, key=key).first()
+        return row.count if row else 0
+
+    def assertNoDrift(self):
+        self.assertEqual(find_drift(), {})
+
+
+class IncrementalCountTest(CatalogCountTestCase):
+
+    def test_create_counts_every_dimension(self):
+        Song.objects.create(genre="Jazz", title="One", release_year=1994, artist=self.artist)
+        self.assertEqual(self.count("genre", "Jazz"), 1)
+        self.assertEqual(self.count("decade", "1990"), 1)
+        self.assertFalse(CatalogCount.objects.exclude(dimension__in=["genre", "decade"]).exists())
+        self.assertNoDrift()
+
+    def test_song_without_year_counts_as_unknown_decade(self):
+        Song.objects.create(genre="Jazz", title="Undated", artist=self.artist)
+        self.assertEqual(self.count("decade", ""), 1)
+
+    def test_edit_moves_counts(self):
+        song = Song.objects.create(genre="Jazz", title="Mover", release_year=1994, artist=self.artist)
+        song = Song.objects.get(pk=song.pk)
+        song.genre = "Soul"
+        song.release_year = 2001
+        song.artist = self.other
+        song.save()
+        self.assertEqual(self.count("genre", "Jazz"), 0)
+        self.assertEqual(self.count("genre", "Soul"), 1)
+        self.assertEqual(self.count("decade", "2000"), 1)
+        counts = dict(Artist.objects.values_list("id", "song_count"))
+        self.assertEqual((counts[self.artist.pk], counts[self.other.pk]), (0, 1))
+        self.assertNoDrift()
+
+    def test_repeated_saves_of_one_instance(self):
+        song = Song.objects.create(genre="Jazz", title="Again", artist=self.artist)
+        song.genre = "Pop"
+        song.save()
+        song.genre = "Rock"
+        song.save()
+        song.save()
+        self.assertEqual(self.count("genre", "Pop"), 0)
+        self.assertEqual(self.count("genre", "Rock"), 1)
+        self.assertNoDrift()
+
+    def test_saving_unloaded_instance_with_existing_pk(self):
+        song = Song.objects.create(genre="Jazz", title="Original", artist=self.artist)
+        Song(pk=song.pk, genre="Pop", title="Replacement", artist=self.artist).save()
+        self.assertEqual(self.count("genre", "Jazz"), 0)
+        self.assertEqual(self.count("genre", "Pop"), 1)
+        self.assertNoDrift()
+
+    def test_update_fields_without_counted_fields_skips_counts(self):
+        song = Song.objects.create(genre="Jazz", title="Retitled", artist=self.artist)
+        with self.assertNumQueries(3):
+            song.title = "New title"
+            song.save(update_fields=["title"])
+
+    def test_delete_decrements(self):
+        song = Song.objects.create(genre="Jazz", title="Gone", release_year=1994, artist=self.artist)
+        Song.objects.get(pk=song.pk).delete()
+        self.assertEqual(self.count("genre", "Jazz"), 0)
+        self.assertEqual(self.count("decade", "1990"), 0)
+        self.assertNoDrift()
+
+    def test_artist_delete_cascades_to_counts(self):
+        Song.objects.create(genre="Jazz", title="A", artist=self.artist)
+        Song.objects.create(genre="Pop", title="B", artist=self.artist)
+        Song.objects.create(genre="Pop", title="C", artist=self.other)
+        self.artist.delete()
+        self.assertEqual(self.count("genre", "Pop"), 1)
+        self.assertEqual(self.count("genre", "Jazz"), 0)
+        self.assertNoDrift()
+
+    def test_importer_applies_counts(self):
+        rows = [
+            {"artist": "Imported", "title": "Song %d" % i, "genre": "House", "release_year": 1985 + i}
+            for i in range(10)
+        ]
+        CatalogImporter(batch_size=4).run(rows)
+        self.assertEqual(self.count("genre", "House"), 10)
+        self.assertEqual(self.count("decade", "1980"), 5)
+        self.assertEqual(self.count("decade", "1990"), 5)
+        self.assertNoDrift()
+
+
+class RebuildTest(CatalogCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        Song.objects.create(genre="Jazz", title="A", release_year=1961, artist=self.artist)
+        Song.objects.create(genre="Jazz", title="B", release_year=1975, artist=self.other)
+        # QuerySet.update() sends no signals, so this leaves the counts stale.
+        Song.objects.filter(title="B").update(genre="Soul")
+
+    def test_compute_counts(self):
+        counts = compute_counts()
+        self.assertEqual(counts[("genre", "Jazz")], 1)
+        self.assertEqual(counts[("decade", "1970")], 1)
+        self.assertEqual(set(dimension for dimension, _ in counts), {"genre", "decade"})
+
+    def test_find_drift(self):
+        self.assertEqual(find_drift(), {("genre", "Jazz"): (2, 1), ("genre", "Soul"): (0, 1)})
+
+    def test_rebuild_repairs_drift(self):
+        rebuild()
+        self.assertNoDrift()
+        self.assertEqual(self.count("genre", "Soul"), 1)
+
+    def test_command_check_reports_drift(self):
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("rebuild_catalog_stats", "--check", stdout=out)
+        self.assertIn("genre 'Soul': stored 0, actual 1", out.getvalue())
+
+    def test_command_rebuilds(self):
+        out = StringIO()
+        call_command("rebuild_catalog_stats", stdout=out)
+        self.assertIn("2 had drifted", out.getvalue())
+        call_command("rebuild_catalog_stats", "--check", stdout=out)
+        self.assertIn("up to date", out.getvalue())
+
+
+class ArtistSummaryTest(CatalogCountTestCase):
+
+    def summary(self, artist):
+        artist.refresh_from_db()
+        return artist.song_count, artist.latest_release_year, artist.genre_counts
+
+    def assertNoArtistDrift(self):
+        self.assertEqual(find_artist_drift(), {})
+
+    def test_create_updates_summary(self):
+        Song.objects.create(genre="Jazz", title="One", release_year=1994, artist=self.artist)
+        Song.objects.create(genre="Pop", title="Two", release_year=2001, artist=self.artist)
+        Song.objects.create(genre="Jazz", title="Three", release_year=None, artist=self.artist)
+        self.assertEqual(self.summary(self.artist), (3, 2001, {"Jazz": 2, "Pop": 1}))
+        self.assertEqual(self.summary(self.other), (0, None, {}))
+        self.assertNoArtistDrift()
+
+    def test_edit_and_reassignment(self):
+        song = Song.objects.create(genre="Jazz", title="One", release_year=1994, artist=self.artist)
+        Song.objects.create(genre="Soul", title="Two", release_year=1980, artist=self.artist)
+        song.genre = "Pop"
+        song.save()
+        self.assertEqual(self.summary(self.artist), (2, 1994, {"Pop": 1, "Soul": 1}))
+        song = Song.objects.get(pk=song.pk)
+        song.artist = self.other
+        song.save()
+        self.assertEqual(self.summary(self.artist), (1, 1980, {"Soul": 1}))
+        self.assertEqual(self.summary(self.other), (1, 1994, {"Pop": 1}))
+        self.assertNoArtistDrift()
+
+    def test_year_change_moves_latest_release(self):
+        song = Song.objects.create(genre="Jazz", title="One", release_year=1994, artist=self.artist)
+        Song.objects.create(genre="Jazz", title="Two", release_year=1980, artist=self.artist)
+        song.release_year = 1970
+        song.save()
+        self.assertEqual(self.summary(self.artist), (2, 1980, {"Jazz": 2}))
+
+    def test_unchanged_save_skips_summary(self):
+        song = Song.objects.create(genre="Jazz", title="One", release_year=1994, artist=self.artist)
+        song.title = "Renamed"
+        # savepoint, song update, release savepoint
+        with self.assertNumQueries(3):
+            song.save()
+
+    def test_delete_paths(self):
+        songs = [
+            Song.objects.create(genre="Jazz", title=str(n), release_year=1990 + n, artist=self.artist)
+            for n in range(4)
+        ]
+        songs[3].delete()
+        self.assertEqual(self.summary(self.artist), (3, 1992, {"Jazz": 3}))
+        delete_songs(Song.objects.filter(pk__in=[songs[1].pk, songs[2].pk]))
+        self.assertEqual(self.summary(self.artist), (1, 1990, {"Jazz": 1}))
+        self.assertNoArtistDrift()
+
+    def test_bulk_update(self):
+        one = Song.objects.create(genre="Jazz", title="One", release_year=1994, artist=self.artist)
+        two = Song.objects.create(genre="Jazz", title="Two", release_year=1980, artist=self.other)
+        update_songs([one.pk, two.pk], {"genre": "Soul", "release_year": 2005})
+        self.assertEqual(self.summary(self.artist), (1, 2005, {"Soul": 1}))
+        self.assertEqual(self.summary(self.other), (1, 2005, {"Soul": 1}))
+
+    def test_importer_updates_summary(self):
+        importer = CatalogImporter()
+        importer.load_artist_map()
+        importer.import_batch([
+            {"title": "Imported", "genre": "Pop", "release_year": "2010", "artist": "Counted"},
+            {"title": "New", "genre": "Pop", "release_year": "", "artist": "Newcomer"},
+        ])
+        self.assertEqual(self.summary(self.artist), (1, 2010, {"Pop": 1}))
+        self.assertEqual(self.summary(Artist.objects.get(name="Newcomer")), (1, None, {"Pop": 1}))
+        self.assertNoArtistDrift()
+
+    def test_stale_artist_save_keeps_summary(self):
+        artist = Artist.objects.get(pk=self.artist.pk)
+        Song.objects.create(genre="Jazz", title="One", release_year=1994, artist=self.artist)
+        artist.label = "New Label"
+        artist.save()
+        self.assertEqual(self.summary(artist), (1, 1994, {"Jazz": 1}))
+        self.assertEqual(artist.label, "New Label")
+
+    def test_genre_mix(self):
+        artist = Artist(genre_counts={"Pop": 1, "Jazz": 3, "Soul": 1, "Rock": 2})
+        self.assertEqual(artist.genre_mix(), ["Jazz", "Rock", "Pop"])
+
+    def test_rebuild_repairs_drift(self):
+        Song.objects.create(genre="Jazz", title="A", release_year=1961, artist=self.artist)
+        Song.objects.filter(title="A").update(genre="Soul", release_year=1999)
+        self.assertEqual(compute_artist_summaries(), {self.artist.pk: (1, 1999, {"Soul": 1})})
+        self.assertEqual(
+            find_artist_drift(),
+            {self.artist.pk: ((1, 1961, {"Jazz": 1}), (1, 1999, {"Soul": 1}))},
+        )
+        self.assertEqual(len(rebuild_artist_summaries()), 1)
+        self.assertNoArtistDrift()
+
+    def test_command(self):
+        Song.objects.create(genre="Jazz", title="A", release_year=1961, artist=self.artist)
+        Artist.objects.filter(pk=self.artist.pk).update(song_count=5)
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("reconcile_artist_summaries", "--check", stdout=out)
+        self.assertIn("artist %d: stored (5, 1961" % self.artist.pk, out.getvalue())
+        call_command("reconcile_artist_summaries", stdout=out)
+        self.assertIn("1 had drifted", out.getvalue())
+        call_command("reconcile_artist_summaries", "--check", stdout=out)
+        self.assertIn("up to date", out.getvalue())
+
+
+class StatsPageTest(CatalogCountTestCase):
+
+    def test_summaries(self):
+        Song.objects.create(genre="Jazz", title="A", release_year=1961, artist=self.artist)
+        Song.objects.create(genre="Jazz", title="B", release_year=1965, artist=self.artist)
+        Song.objects.create(genre="Pop", title="C", artist=self.other)
+        self.assertEqual(dict(genre_counts())["Jazz"], 2)
+        self.assertEqual(len(genre_counts()), len(Song.GENRE_CHOICES))
+        self.assertEqual(decade_counts(), [("1960s", 2), ("Unknown", 1)])
+        self.assertEqual(top_artists(1), [(self.artist, 2)])
+
+    def test_page_renders_counts(self):
+        Song.objects.create(genre="Gospel", title="A", release_year=1961, artist=self.artist)
+        response = self.client.get(reverse("stats"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "stats.html")
+        self.assertContains(response, "1960s")
+        self.assertEqual(response.context["total_songs"], 1)
+
+    def test_query_count_does_not_grow_with_songs(self):
+        for i in range(30):
+            Song.objects.create(genre="Pop", title="Song %d" % i, release_year=1950 + i, artist=self.artist)
+        # total, genres, decades, top artists
+        with self.assertNumQueries(4):
+            self.client.get(reverse("stats"))
@@ -0,0 +1,110 @@
+import hashlib
+import os
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from music_app.images import rendition_names
+from music_app.models import Artist
+from music_app.storage import ContentAddressedStorage, is_addressed
+from music_app.tests.test_images import ThumbnailTestCase, make_image
+
+
+class ContentAddressedStorageTest(ThumbnailTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.storage = ContentAddressedStorage()
+
+    def test_name_is_content_hash(self):
+        data = b"some bytes"
+        name = self.storage.save("images/Photo.JPG", ContentFile(data))
+        self.assertEqual(name, "images/%s.jpg" % hashlib.sha256(data).hexdigest())
+        with self.storage.open(name, "rb") as f:
+            self.assertEqual(f.read(), data)
+
+    def test_identical_uploads_share_one_file(self):
+        first = self.storage.save("images/a.png", ContentFile(b"same"))
+        second = self.storage.save("images/b.png", ContentFile(b"same"))
+        self.assertEqual(first, second)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.media_root, "images"))), [os.path.basename(first)])
+
+    def test_different_uploads_get_different_names(self):
+        first = self.storage.save("images/a.png", ContentFile(b"one"))
+        second = self.storage.save("images/a.png", ContentFile(b"two"))
+        self.assertNotEqual(first, second)
+
+    def test_save_derived_keeps_and_replaces_name(self):
+        self.storage.save_derived("images/x.96x96.webp", ContentFile(b"old"))
+        name = self.storage.save_derived("images/x.96x96.webp", ContentFile(b"new"))
+        self.assertEqual(name, "images/x.96x96.webp")
+        with self.storage.open(name, "rb") as f:
+            self.assertEqual(f.read(), b"new")
+
+    def test_no_temporary_files_left(self):
+        self.storage.save("images/a.png", ContentFile(b"same"))
+        self.storage.save("images/a.png", ContentFile(b"same"))
+        names = os.listdir(os.path.join(self.media_root, "images"))
+        self.assertFalse([name for name in names if name.startswith(".upload-")])
+
+    def test_is_addressed(self):
+        self.assertTrue(is_addressed("images/%s.png" % ("a" * 64)))
+        self.assertFalse(is_addressed("images/Ed-Sheeran_OdBOheP.jpg"))
+        self.assertFalse(is_addressed("images/%s.96x96.webp" % ("a" * 64)))
+
+
+class ArtistImageStorageTest(ThumbnailTestCase):
+
+    def test_duplicate_uploads_share_image_and_renditions(self):
+        data = make_image()
+        first = self.create_artist("First", data)
+        second = self.create_artist("Second", data)
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(is_addressed(first.image.name))
+        for name in rendition_names(first.image.name):
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)), name)
+
+
+class DedupeImagesCommandTest(ThumbnailTestCase):
+
+    def legacy_artist(self, name, filename, data):
+        path = os.path.join(self.media_root, "images", filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        artist = Artist.objects.create(name=name, nationality="", website="", label="")
+        Artist.objects.filter(pk=artist.pk).update(image="images/" + filename)
+        return artist
+
+    def test_repoints_duplicates_to_one_file(self):
+        data = make_image()
+        first = self.legacy_artist("First", "Ed-Sheeran.jpg", data)
+        second = self.legacy_artist("Second", "Ed-Sheeran_OdBOheP.jpg", data)
+        out = StringIO()
+        call_command("dedupe_images", stdout=out)
+        self.assertIn("Stored 2 image(s) by content, 2 artist(s) repointed, 0 failed.", out.getvalue())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image.name, "images/%s.jpg" % hashlib.sha256(data).hexdigest())
+        for name in rendition_names(first.image.name):
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)), name)
+
+    def test_skips_addressed_images(self):
+        Artist.objects.create(
+            name="New", nationality="", website="", label="",
+            image=SimpleUploadedFile("photo.png", make_image(), content_type="image/png"),
+        )
+        out = StringIO()
+        call_command("dedupe_images", stdout=out)
+        self.assertIn("Stored 0 image(s) by content", out.getvalue())
+
+    def test_missing_file_reported(self):
+        artist = Artist.objects.create(name="Gone", nationality="", website="", label="")
+        Artist.objects.filter(pk=artist.pk).update(image="images/gone.png")
+        out, err = StringIO(), StringIO()
+        call_command("dedupe_images", stdout=out, stderr=err)
+        self.assertIn("1 failed", out.getvalue())
+        self.assertIn("images/gone.png", err.getvalue())
@@ -0,0 +1,126 @@
+import re
+
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.shortcuts import render
+from django.template.backends.django import Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from music_app.models import Artist, Song
+from music_app.tests.test_async_views import AsyncViewTestCase
+from music_genie.middleware import ServerTimingMiddleware, add_query_timer, time_query
+
+TIMING = re.compile(r'^db;dur=[\d.]+;desc="(\d+) queries", render;dur=([\d.]+), total;dur=[\d.]+$')
+
+
+@override_settings(PAGE_CACHE_ENABLED=False, SERVER_TIMING_HEADER=True)
+class ServerTimingTest(TestCase):
+
+    def setUp(self):
+        artist = Artist.objects.create(name="Timed", nationality="", website="", label="")
+        Song.objects.create(genre="Pop", title="Timed Song", release_year=2000, artist=artist)
+
+    def timing(self, response):
+        match = TIMING.match(response["Server-Timing"])
+        self.assertIsNotNone(match, response["Server-Timing"])
+        return int(match.group(1)), float(match.group(2))
+
+    def test_header_counts_queries(self):
+        response = self.client.get(reverse("songs"))
+        queries, render_ms = self.timing(response)
+        self.assertEqual(queries, 1)
+        self.assertGreater(render_ms, 0)
+
+    def test_json_response_has_no_render_time(self):
+        response = self.client.get(reverse("api_songs"))
+        queries, render_ms = self.timing(response)
+        self.assertGreater(queries, 0)
+        self.assertEqual(render_ms, 0)
+
+    def test_log_line(self):
+        with self.assertLogs("music_genie.timing", "INFO") as logs:
+            self.client.get(reverse("songs"))
+        record = logs.records[0]
+        self.assertEqual(record.request_timing["path"], "/songs/")
+        self.assertEqual(record.request_timing["status"], 200)
+        self.assertEqual(record.request_timing["queries"], 1)
+        self.assertIn("method=GET path=/songs/ status=200", record.getMessage())
+
+    def test_queries_outside_requests_pass_through(self):
+        self.assertIn(time_query, connection.execute_wrappers)
+        with self.assertNumQueries(1):
+            Song.objects.count()
+
+    @override_settings(REQUEST_TIMING_ENABLED=False)
+    def test_disabled(self):
+        response = self.client.get(reverse("songs"))
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_off_by_default(self):
+        with self.assertLogs("music_genie.timing", "INFO"):
+            response = self.client.get(reverse("songs"))
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(SERVER_TIMING_HEADER=False, DEBUG=True)
+    def test_header_sent_in_debug(self):
+        self.assertIn("Server-Timing", self.client.get(reverse("songs")))
+
+
+@override_settings(PAGE_CACHE_ENABLED=True, SERVER_TIMING_HEADER=True)
+class PageCacheTimingTest(ServerTimingTest):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_render_timed_on_miss(self):
+        artist = Artist.objects.get(name="Timed")
+        for url in (reverse("songs"), reverse("add_artist"), reverse("artist_details", args=[artist.pk])):
+            response = self.client.get(url)
+            self.assertEqual(response["X-Page-Cache"], "miss")
+            self.assertGreater(self.timing(response)[1], 0, url)
+
+    def test_nothing_rendered_on_hit(self):
+        self.client.get(reverse("songs"))
+        response = self.client.get(reverse("songs"))
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        self.assertEqual(self.timing(response), (0, 0))
+
+
+@override_settings(PAGE_CACHE_ENABLED=False, SERVER_TIMING_HEADER=True)
+class AsyncServerTimingTest(AsyncViewTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # The test database connection was opened before the async client
+        # loaded the middleware, and on another thread.
+        add_query_timer(connection)
+
+    async def test_queries_in_worker_threads_counted(self):
+        response = await self.async_client.get(reverse("songs"))
+        self.assertRegex(response["Server-Timing"], r'desc="1 queries"')
+
+
+@override_settings(SERVER_TIMING_HEADER=True)
+class ServerTimingMiddlewareTest(TestCase):
+
+    def test_templates_not_patched(self):
+        ServerTimingMiddleware(lambda request: HttpResponse())
+        self.assertEqual(Template.render.__module__, "django.template.backends.django")
+
+    def test_render_shortcut_counts_in_total_only(self):
+        middleware = ServerTimingMiddleware(lambda request: render(request, "search.html", {}))
+        response = middleware(RequestFactory().get("/search/"))
+        self.assertRegex(response["Server-Timing"], r"render;dur=0\.0, total;dur=")
+
+    async def test_async_chain(self):
+        async def view(request):
+            return HttpResponse("view")
+
+        middleware = ServerTimingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(RequestFactory().get("/"))
+        self.assertIn("total;dur=", response["Server-Timing"])
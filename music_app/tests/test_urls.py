@@ -1,15 +1,31 @@
 from django.test import TestCase
 from django.urls import reverse, resolve
+from music_app.api import (
+    ArtistDetailApiView,
+    ArtistListApiView,
+    ArtistLookupApiView,
+    GenieApiView,
+    SongBulkApiView,
+    SongDetailApiView,
+    SongListApiView,
+)
 from music_app.views import (
     LandingPageView,
     ArtistListView,
     ArtistCreateView,
     ArtistUpdateView,
+    ArtistSongsView,
     deleteArtist,
     SongListView,
     SongCreateView,
     SongUpdateView,
     deleteSong,
+    bulkSongs,
+    SearchView,
+    StatsView,
+    DuplicatesView,
+    mergeDuplicates,
+    exportCatalog,
 )
 
 
@@ -31,6 +47,10 @@ class URLResolveTest(TestCase):
         resolver = resolve("/artist-details/1/")
         self.assertEqual(resolver.func.view_class, ArtistUpdateView)
 
+    def test_artist_songs_resolves(self):
+        resolver = resolve("/artist-details/1/songs/")
+        self.assertEqual(resolver.func.view_class, ArtistSongsView)
+
     def test_delete_artist_resolves(self):
         resolver = resolve("/artist-delete/1/")
         self.assertEqual(resolver.func, deleteArtist)
@@ -51,6 +71,35 @@ class URLResolveTest(TestCase):
         resolver = resolve("/song-delete/1/")
         self.assertEqual(resolver.func, deleteSong)
 
+    def test_search_resolves(self):
+        resolver = resolve("/search/")
+        self.assertEqual(resolver.func.view_class, SearchView)
+
+    def test_stats_resolves(self):
+        resolver = resolve("/stats/")
+        self.assertEqual(resolver.func.view_class, StatsView)
+
+    def test_duplicates_resolves(self):
+        self.assertEqual(resolve("/duplicates/").func.view_class, DuplicatesView)
+        self.assertEqual(resolve("/duplicates/merge/").func, mergeDuplicates)
+
+    def test_export_resolves(self):
+        resolver = resolve("/export/songs.csv")
+        self.assertEqual(resolver.func, exportCatalog)
+        self.assertEqual(resolver.kwargs, {"dataset": "songs", "fmt": "csv"})
+
+    def test_bulk_songs_resolves(self):
+        self.assertEqual(resolve("/songs/bulk/").func, bulkSongs)
+
+    def test_api_resolves(self):
+        self.assertEqual(resolve("/api/artists/").func.view_class, ArtistListApiView)
+        self.assertEqual(resolve("/api/artists/3/").func.view_class, ArtistDetailApiView)
+        self.assertEqual(resolve("/api/artists/lookup/").func.view_class, ArtistLookupApiView)
+        self.assertEqual(resolve("/api/songs/").func.view_class, SongListApiView)
+        self.assertEqual(resolve("/api/songs/3/").func.view_class, SongDetailApiView)
+        self.assertEqual(resolve("/api/songs/bulk/").func.view_class, SongBulkApiView)
+        self.assertEqual(resolve("/api/genie/").func.view_class, GenieApiView)
+
     def test_admin_resolves(self):
         resolver = resolve("/admin/")
         self.assertEqual(resolver.app_name, "admin")
@@ -72,6 +121,11 @@ class URLReverseTest(TestCase):
             reverse("artist_details", kwargs={"pk": 1}), "/artist-details/1/"
         )
 
+    def test_artist_songs_reverse(self):
+        self.assertEqual(
+            reverse("artist_songs", kwargs={"pk": 1}), "/artist-details/1/songs/"
+        )
+
     def test_delete_artist_reverse(self):
         self.assertEqual(
             reverse("delete_artist", kwargs={"pk": 1}), "/artist-delete/1/"
@@ -92,3 +146,25 @@ class URLReverseTest(TestCase):
         self.assertEqual(
             reverse("delete_song", kwargs={"pk": 1}), "/song-delete/1/"
         )
+
+    def test_search_reverse(self):
+        self.assertEqual(reverse("search"), "/search/")
+
+    def test_stats_reverse(self):
+        self.assertEqual(reverse("stats"), "/stats/")
+
+    def test_duplicates_reverse(self):
+        self.assertEqual(reverse("duplicates"), "/duplicates/")
+        self.assertEqual(reverse("merge_duplicates"), "/duplicates/merge/")
+
+    def test_export_reverse(self):
+        self.assertEqual(
+            reverse("export", kwargs={"dataset": "artists", "fmt": "ndjson"}),
+            "/export/artists.ndjson",
+        )
+
+    def test_api_reverse(self):
+        self.assertEqual(reverse("api_songs"), "/api/songs/")
+        self.assertEqual(reverse("api_artist", args=[4]), "/api/artists/4/")
+        self.assertEqual(reverse("api_artist_lookup"), "/api/artists/lookup/")
+        self.assertEqual(reverse("api_genie"), "/api/genie/")
@@ -1,5 +1,11 @@
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase, Client
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from music_app.models import Artist, Song
 
@@ -47,8 +53,13 @@ class ArtistListViewTest(TestCase):
         self.assertEqual(list(response.context["artists"]), [self.artist])
 
 
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
 class ArtistCreateViewTest(TestCase):
 
+    def setUp(self):
+        # The empty form page is cached and no write here expires it.
+        cache.clear()
+
     def test_get_returns_200(self):
         response = self.client.get(reverse("add_artist"))
         self.assertEqual(response.status_code, 200)
@@ -93,6 +104,7 @@ class ArtistCreateViewTest(TestCase):
         self.assertEqual(Artist.objects.count(), count_before)
 
 
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
 class ArtistUpdateViewTest(TestCase):
 
     def setUp(self):
@@ -128,7 +140,35 @@ class ArtistUpdateViewTest(TestCase):
             reverse("artist_details", kwargs={"pk": self.artist.pk})
         )
         self.assertIn("songs", response.context)
-        self.assertEqual(list(response.context["songs"]), [self.song])
+        self.assertEqual(
+            list(response.context["songs"]),
+            [{"id": self.song.pk, "title": "Artist Song", "genre": "Jazz", "album": "Album", "release_year": 2020}],
+        )
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_songs_are_paginated(self):
+        for n in range(30):
+            Song.objects.create(genre="Pop", title="Track %02d" % n, release_year=2000, artist=self.artist)
+        url = reverse("artist_details", kwargs={"pk": self.artist.pk})
+        response = self.client.get(url)
+        page = response.context["songs_page"]
+        self.assertEqual(len(response.context["songs"]), 25)
+        self.assertContains(response, 'data-fragment="%s%s"' % (
+            reverse("artist_songs", kwargs={"pk": self.artist.pk}), page.next_url))
+        second = self.client.get(url + page.next_url)
+        self.assertEqual(len(second.context["songs"]), 6)
+        self.assertEqual(second.context["songs"][-1]["title"], "Track 29")
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_query_count_does_not_grow_with_songs(self):
+        url = reverse("artist_details", kwargs={"pk": self.artist.pk})
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        for n in range(60):
+            Song.objects.create(genre="Pop", title="Track %02d" % n, release_year=2000, artist=self.artist)
+        with self.assertNumQueries(len(small)):
+            self.client.get(url)
+
 
     def test_post_valid_data_updates_artist(self):
         data = {
@@ -174,6 +214,34 @@ class ArtistUpdateViewTest(TestCase):
         self.assertEqual(response.status_code, 404)
 
 
+@override_settings(PAGE_CACHE_ENABLED=False)
+class ArtistSongsViewTest(TestCase):
+
+    def setUp(self):
+        self.artist = Artist.objects.create(name="Fragment", nationality="", website="", label="")
+        for n in range(3):
+            Song.objects.create(genre="Soul", title="Song %d" % n, release_year=1990, artist=self.artist)
+
+    def test_renders_table_only(self):
+        response = self.client.get(reverse("artist_songs", kwargs={"pk": self.artist.pk}), {"page_size": 2})
+        self.assertTemplateUsed(response, "_artist_songs.html")
+        self.assertTemplateNotUsed(response, "_base.html")
+        self.assertContains(response, "Song 1")
+        self.assertNotContains(response, "Song 2")
+        self.assertContains(response, "data-fragment=")
+
+    def test_projects_displayed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("artist_songs", kwargs={"pk": self.artist.pk}))
+        select = queries[-1]["sql"]
+        self.assertNotIn("updated_at", select)
+        self.assertIn('"music_app_song"."artist_id" = %d' % self.artist.pk, select)
+
+    def test_missing_artist_is_404(self):
+        response = self.client.get(reverse("artist_songs", kwargs={"pk": 999999}))
+        self.assertEqual(response.status_code, 404)
+
+
 class DeleteArtistViewTest(TestCase):
 
     def setUp(self):
@@ -187,29 +255,34 @@ class DeleteArtistViewTest(TestCase):
 
     def test_delete_removes_artist(self):
         pk = self.artist.pk
-        self.client.get(reverse("delete_artist", kwargs={"pk": pk}))
+        self.client.post(reverse("delete_artist", kwargs={"pk": pk}))
         self.assertFalse(Artist.objects.filter(pk=pk).exists())
 
     def test_delete_redirects_to_artists(self):
-        response = self.client.get(
+        response = self.client.post(
             reverse("delete_artist", kwargs={"pk": self.artist.pk})
         )
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, "/artists/")
 
     def test_delete_nonexistent_returns_404(self):
-        response = self.client.get(
+        response = self.client.post(
             reverse("delete_artist", kwargs={"pk": 99999})
         )
         self.assertEqual(response.status_code, 404)
 
+    def test_get_is_not_allowed(self):
+        response = self.client.get(reverse("delete_artist", kwargs={"pk": self.artist.pk}))
+        self.assertEqual(response.status_code, 405)
+        self.assertTrue(Artist.objects.filter(pk=self.artist.pk).exists())
+
     def test_cascade_deletes_songs(self):
         Song.objects.create(
             genre="Rock",
             title="Cascade Song",
             artist=self.artist,
         )
-        self.client.get(
+        self.client.post(
             reverse("delete_artist", kwargs={"pk": self.artist.pk})
         )
         self.assertEqual(Song.objects.filter(artist_id=self.artist.pk).count(), 0)
@@ -247,6 +320,7 @@ class SongListViewTest(TestCase):
 class SongCreateViewTest(TestCase):
 
     def setUp(self):
+        cache.clear()
         self.artist = Artist.objects.create(
             name="Song Create Artist",
             nationality="",
@@ -384,25 +458,88 @@ class DeleteSongViewTest(TestCase):
 
     def test_delete_removes_song(self):
         pk = self.song.pk
-        self.client.get(reverse("delete_song", kwargs={"pk": pk}))
+        self.client.post(reverse("delete_song", kwargs={"pk": pk}))
         self.assertFalse(Song.objects.filter(pk=pk).exists())
 
     def test_delete_redirects_to_songs(self):
-        response = self.client.get(
+        response = self.client.post(
             reverse("delete_song", kwargs={"pk": self.song.pk})
         )
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, "/songs/")
 
     def test_delete_nonexistent_returns_404(self):
-        response = self.client.get(
+        response = self.client.post(
             reverse("delete_song", kwargs={"pk": 99999})
         )
         self.assertEqual(response.status_code, 404)
 
+    def test_get_is_not_allowed(self):
+        response = self.client.get(reverse("delete_song", kwargs={"pk": self.song.pk}))
+        self.assertEqual(response.status_code, 405)
+        self.assertTrue(Song.objects.filter(pk=self.song.pk).exists())
+
     def test_delete_song_does_not_delete_artist(self):
         artist_pk = self.artist.pk
-        self.client.get(
+        self.client.post(
             reverse("delete_song", kwargs={"pk": self.song.pk})
         )
         self.assertTrue(Artist.objects.filter(pk=artist_pk).exists())
+
+
+class QueryCountRegressionTest(TestCase):
+    """Each page must issue the same number of queries whatever the row count."""
+
+    def setUp(self):
+        self.artist = Artist.objects.create(
+            name="Counted Artist",
+            nationality="",
+            website="",
+            label="",
+        )
+
+    def add_songs(self, count):
+        for i in range(count):
+            other = Artist.objects.create(
+                name="Other %d" % i,
+                nationality="",
+                website="",
+                label="",
+            )
+            Song.objects.create(genre="Pop", title="Other %d" % i, artist=other)
+            Song.objects.create(genre="Soul", title="Own %d" % i, artist=self.artist)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, url):
+        self.add_songs(1)
+        small = self.count_queries(url)
+        self.add_songs(10)
+        self.assertEqual(self.count_queries(url), small)
+
+    def test_song_list(self):
+        self.assertConstantQueries(reverse("songs"))
+
+    def test_song_list_renders_artist_names(self):
+        self.add_songs(3)
+        response = self.client.get(reverse("songs"))
+        self.assertContains(response, "Other 2")
+        self.assertContains(response, "Counted Artist")
+
+    def test_artist_list(self):
+        self.assertConstantQueries(reverse("artists"))
+
+    def test_artist_detail(self):
+        self.assertConstantQueries(
+            reverse("artist_details", kwargs={"pk": self.artist.pk})
+        )
+
+    def test_admin_changelists(self):
+        User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.login(username="admin", password="password")
+        self.assertConstantQueries(reverse("admin:music_app_song_changelist"))
+        self.assertConstantQueries(reverse("admin:music_app_artist_changelist"))
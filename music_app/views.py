@@ -1,68 +1,338 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.views import View
+from django.views.decorators.http import require_GET, require_POST
 from django.views.generic import TemplateView, ListView, CreateView, UpdateView
-from music_app.models import Artist, Song
-from music_app.forms import ArtistForm, SongForm
+from django.views.generic.base import ContextMixin
+from music_app.models import Artist, DuplicateGroup, Song
+from music_app.forms import ArtistForm, SongBulkForm, SongForm, artist_choice
 from django.urls import reverse_lazy
+from music_app.cache import AsyncCachedPageMixin, CachedPageMixin, artist_group, template_pack_group
+from music_app.deletion import delete_artist
+from music_app.duplicates import merge_stored
+from music_app.exports import DATASETS, FORMATS, export_stream, spool
+from music_app.pagination import KeysetPaginationMixin
+from music_app.recommendations import similar_artists
+from music_app.search import search_artists, search_songs
+from music_app.stats import decade_counts, genre_counts, top_artists, total_songs
 
 
 class LandingPageView(TemplateView):
     template_name = 'home.html'
 
 
-class ArtistListView(ListView):
+class ArtistListView(CachedPageMixin, KeysetPaginationMixin, ListView):
     model = Artist
+    cache_groups = ('artists',)
+    keyset_ordering = ('name', 'id')
+    keyset_orderings = {'songs': ('-song_count', 'name', 'id')}
     context_object_name = 'artists'
     template_name = 'list_artists.html'
 
 
-class ArtistCreateView(CreateView):
+class ArtistCreateView(CachedPageMixin, CreateView):
     model = Artist
     form_class = ArtistForm
     template_name = 'add_artist.html'
     success_url = reverse_lazy('artists')
 
+    def get_cache_groups(self):
+        return (template_pack_group(),)
 
-class ArtistUpdateView(UpdateView):
+
+class ArtistSongsMixin(KeysetPaginationMixin):
+    """
+    One page of an artist's songs for the artist page, as dicts of the
+    displayed columns in (title, id) order, read from the (artist, title,
+    id) index. The page costs the same whatever the discography size.
+    """
+    keyset_ordering = ('title', 'id')
+    paginate_by = 25
+    song_columns = ('id', 'title', 'genre', 'album', 'release_year')
+
+    def get_songs_queryset(self, artist_id):
+        return Song.objects.filter(artist_id=artist_id).values(*self.song_columns)
+
+    def _songs_context(self, artist_id, page):
+        return {'artist_id': artist_id, 'songs': page.object_list, 'songs_page': page}
+
+    def get_songs_context(self, artist_id):
+        queryset = self.get_songs_queryset(artist_id)
+        _, page, _, _ = self.paginate_queryset(queryset, self.get_paginate_by(queryset))
+        return self._songs_context(artist_id, page)
+
+    async def aget_songs_context(self, artist_id):
+        queryset = self.get_songs_queryset(artist_id)
+        _, page, _, _ = await self.apaginate_queryset(queryset, self.get_paginate_by(queryset))
+        return self._songs_context(artist_id, page)
+
+
+class ArtistUpdateView(ArtistSongsMixin, CachedPageMixin, UpdateView):
     model = Artist
     form_class = ArtistForm
     template_name = 'edit_artist.html'
     success_url = reverse_lazy('artists')
 
+    def get_cache_groups(self):
+        return (artist_group(self.kwargs['pk']), template_pack_group())
+
     def get_context_data(self, *args, **kwargs):
         context = super(ArtistUpdateView, self).get_context_data(*args, **kwargs)
-        id  = self.kwargs['pk']
-        songs = Song.objects.filter(artist_id=id)
-        context['songs'] =  songs
+        context.update(self.get_songs_context(self.object.pk))
+        context['similar_artists'] = list(similar_artists(self.object.pk))
         return context
 
 
+class ArtistSongsView(ArtistSongsMixin, CachedPageMixin, TemplateView):
+    """The artist page's song table on its own, for paging in place."""
+    template_name = '_artist_songs.html'
+
+    def get_cache_groups(self):
+        return (artist_group(self.kwargs['pk']),)
+
+    def get_context_data(self, **kwargs):
+        if not Artist.objects.filter(pk=self.kwargs['pk']).exists():
+            raise Http404('No Artist matches the given query.')
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_songs_context(self.kwargs['pk']))
+        return context
+
+
+@require_POST
 def deleteArtist(request, pk):
     data = get_object_or_404(Artist, id=pk)
-    data.delete()
+    delete_artist(data)
     return redirect('/artists/')
 
 
-class SongListView(ListView):
+class SongListView(CachedPageMixin, KeysetPaginationMixin, ListView):
     model = Song
+    cache_groups = ('songs',)
+    keyset_ordering = ('title', 'id')
     context_object_name = 'songs'
     template_name = 'list_songs.html'
+    # For the bulk edit bar.
+    extra_context = {'genre_choices': Song.GENRE_CHOICES}
+
+    def get_queryset(self):
+        return Song.objects.with_artist()
 
 
-class SongCreateView(CreateView):
+class SongCreateView(CachedPageMixin, CreateView):
     model = Song
     form_class = SongForm
     template_name = 'add_song.html'
     success_url = reverse_lazy('songs')
 
+    def get_cache_groups(self):
+        return (template_pack_group(),)
 
-class SongUpdateView(UpdateView):
+
+class SongUpdateView(CachedPageMixin, UpdateView):
     model = Song
     form_class = SongForm
     template_name = 'edit_song.html'
     success_url = reverse_lazy('songs')
 
+    def get_cache_groups(self):
+        # Artist renames expire the song group too.
+        return ('songs', template_pack_group())
+
 
+@require_POST
 def deleteSong(request, pk):
     data = get_object_or_404(Song, id=pk)
     data.delete()
     return redirect('/songs/')
+
+
+@require_POST
+def bulkSongs(request):
+    form = SongBulkForm(request.POST)
+    if not form.is_valid():
+        return render(request, 'bulk_songs.html', {'form': form}, status=400)
+    return render(request, 'bulk_songs.html', {'form': form, 'result': form.apply()})
+
+
+class AsyncKeysetListView(KeysetPaginationMixin, ContextMixin, View):
+    """
+    ListView counterpart for ASGI: the page is read with the async ORM and
+    rendered straight to an HttpResponse, so no request leaves the loop.
+    """
+    model = None
+    template_name = None
+    context_object_name = None
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+    async def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        paginator, page, object_list, is_paginated = await self.apaginate_queryset(
+            queryset, self.get_paginate_by(queryset))
+        context = self.get_context_data(
+            paginator=paginator, page_obj=page, is_paginated=is_paginated, object_list=object_list)
+        context[self.context_object_name] = object_list
+        return render(request, self.template_name, context)
+
+
+class AsyncArtistListView(AsyncCachedPageMixin, AsyncKeysetListView):
+    model = Artist
+    cache_groups = ArtistListView.cache_groups
+    keyset_ordering = ArtistListView.keyset_ordering
+    keyset_orderings = ArtistListView.keyset_orderings
+    context_object_name = 'artists'
+    template_name = 'list_artists.html'
+
+
+class AsyncSongListView(AsyncCachedPageMixin, AsyncKeysetListView):
+    model = Song
+    cache_groups = SongListView.cache_groups
+    keyset_ordering = SongListView.keyset_ordering
+    context_object_name = 'songs'
+    template_name = 'list_songs.html'
+    extra_context = SongListView.extra_context
+
+    def get_queryset(self):
+        return Song.objects.with_artist()
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404('No %s matches the given query.' % queryset.model._meta.object_name)
+
+
+class AsyncEditPageView(ContextMixin, View):
+    """
+    Async GET for a model's edit page. Form posts are handed to the sync
+    UpdateView, which owns validation and saving.
+    """
+    model = None
+    form_class = None
+    template_name = None
+    update_view = None
+
+    async def get_form(self, obj):
+        return self.form_class(instance=obj)
+
+    async def get_extra_context(self, obj):
+        return {}
+
+    async def get(self, request, pk):
+        obj = await aget_object_or_404(self.model.objects.all(), pk=pk)
+        context = self.get_context_data(object=obj, form=await self.get_form(obj), **await self.get_extra_context(obj))
+        context[self.model._meta.model_name] = obj
+        return render(request, self.template_name, context)
+
+    async def post(self, request, pk):
+        return await sync_to_async(self.update_view.as_view())(request, pk=pk)
+
+
+class AsyncArtistDetailView(AsyncCachedPageMixin, ArtistSongsMixin, AsyncEditPageView):
+    model = Artist
+    form_class = ArtistForm
+    template_name = 'edit_artist.html'
+    update_view = ArtistUpdateView
+
+    def get_cache_groups(self):
+        return (artist_group(self.kwargs['pk']), template_pack_group())
+
+    async def get_extra_context(self, artist):
+        context = await self.aget_songs_context(artist.pk)
+        context['similar_artists'] = [row async for row in similar_artists(artist.pk)]
+        return context
+
+
+class AsyncArtistSongsView(AsyncCachedPageMixin, ArtistSongsMixin, ContextMixin, View):
+    template_name = ArtistSongsView.template_name
+
+    def get_cache_groups(self):
+        return ArtistSongsView.get_cache_groups(self)
+
+    async def get(self, request, pk):
+        if not await Artist.objects.filter(pk=pk).aexists():
+            raise Http404('No Artist matches the given query.')
+        return render(request, self.template_name, self.get_context_data(**await self.aget_songs_context(pk)))
+
+
+class AsyncSongDetailView(AsyncCachedPageMixin, AsyncEditPageView):
+    model = Song
+    form_class = SongForm
+    template_name = 'edit_song.html'
+    update_view = SongUpdateView
+
+    def get_cache_groups(self):
+        return ('songs', template_pack_group())
+
+    async def get_form(self, song):
+        form = await super().get_form(song)
+        # Look the artist's name up here; rendering the field would query
+        # synchronously.
+        name, label = await Artist.objects.filter(pk=song.artist_id).values_list('name', 'label').aget()
+        form.fields['artist'].widget.names[song.artist_id] = artist_choice(song.artist_id, name, label)
+        return form
+
+
+class SearchView(TemplateView):
+    template_name = 'search.html'
+    result_limit = 50
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        if query:
+            context['artists'] = search_artists(query, self.result_limit)
+            context['songs'] = search_songs(query, self.result_limit)
+        return context
+
+
+class StatsView(TemplateView):
+    template_name = 'stats.html'
+    artist_limit = 20
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['total_songs'] = total_songs()
+        context['genres'] = genre_counts()
+        context['decades'] = decade_counts()
+        context['top_artists'] = top_artists(self.artist_limit)
+        return context
+
+
+class DuplicatesView(CachedPageMixin, KeysetPaginationMixin, ListView):
+    """
+    The duplicate groups dedupe_catalog last stored, artists first, a page
+    at a time; nothing is matched while the page renders.
+    """
+    model = DuplicateGroup
+    cache_groups = ('duplicates',)
+    keyset_ordering = ('kind', 'id')
+    context_object_name = 'groups'
+    template_name = 'duplicates.html'
+
+
+@require_POST
+def mergeDuplicates(request):
+    # Only the ticked groups are read, and their members are checked
+    # against the live rows rather than trusted from the store.
+    merge_stored([int(pk) for pk in request.POST.getlist('group') if pk.isdigit()])
+    return redirect('/duplicates/')
+
+
+@require_GET
+def exportCatalog(request, dataset, fmt):
+    if dataset not in DATASETS or fmt not in FORMATS:
+        raise Http404('Unknown export.')
+    _, content_type = FORMATS[fmt]
+    filename = '%s.%s' % (dataset, fmt)
+    if isinstance(request, ASGIRequest):
+        return FileResponse(spool(export_stream(dataset, fmt)), as_attachment=True, filename=filename,
+                            content_type=content_type)
+    response = StreamingHttpResponse(export_stream(dataset, fmt), content_type=content_type)
+    response['Content-Disposition'] = 'attachment; filename="%s"' % filename
+    return response
@@ -0,0 +1,48 @@
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMA_NAME_RE = re.compile(r'^[a-z_]+$')
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The stock SQLite backend plus two OPTIONS:
+
+    ``pragmas``: a {name: value} dict run as PRAGMA statements on every new
+    connection (journal_mode, synchronous, busy_timeout, ...).
+
+    ``transaction_mode``: how atomic blocks open their transaction. With
+    IMMEDIATE the write lock is taken up front, so concurrent writers queue
+    on busy_timeout instead of failing with "database is locked" when a
+    read transaction tries to upgrade.
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('transaction_mode', None)
+        pragmas = params.pop('pragmas', {})
+        for name in pragmas:
+            if not PRAGMA_NAME_RE.match(name):
+                raise ImproperlyConfigured('Invalid SQLite pragma name %r.' % name)
+        params['pragmas'] = pragmas
+        return params
+
+    def get_new_connection(self, conn_params):
+        pragmas = conn_params.pop('pragmas')
+        conn = super().get_new_connection(conn_params)
+        for name, value in pragmas.items():
+            conn.execute('PRAGMA %s = %s' % (name, value))
+        return conn
+
+    @property
+    def transaction_mode(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode', 'DEFERRED').upper()
+        if mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured('transaction_mode must be one of %s.' % ', '.join(TRANSACTION_MODES))
+        return mode
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN %s' % self.transaction_mode)
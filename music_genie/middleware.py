@@ -0,0 +1,169 @@
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+timing_logger = logging.getLogger('music_genie.timing')
+
+# The timings of the request being handled. Context variables follow the
+# request into sync_to_async threads, so queries made there are counted too.
+current_timing = ContextVar('current_timing', default=None)
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can also run on the event loop.
+
+    WhiteNoiseMiddleware is sync-only, so under ASGI Django would call it,
+    and every view below it, through a worker thread. Looking a path up in
+    the static file table is a dict access, which is fine to do inline.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class RequestTiming:
+    """Time spent in SQL and in template rendering during one request."""
+    __slots__ = ('started', 'db', 'queries', 'render')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.render = 0.0
+
+    def header(self, total):
+        return 'db;dur=%.1f;desc="%d queries", render;dur=%.1f, total;dur=%.1f' % (
+            self.db * 1000, self.queries, self.render * 1000, total * 1000)
+
+
+def time_query(execute, sql, params, many, context):
+    timing = current_timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db += time.perf_counter() - started
+        timing.queries += 1
+
+
+def add_query_timer(connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        # First in the list: execute_wrapper() blocks pop the last one on exit.
+        connection.execute_wrappers.insert(0, time_query)
+
+
+def install_timers():
+    """
+    Hook query timing into every connection. Outside a timed request it
+    costs a context variable lookup per query.
+    """
+    connection_created.connect(add_query_timer, dispatch_uid='music_genie.timing')
+    # Connections opened before this middleware was loaded.
+    for connection in connections.all():
+        add_query_timer(connection)
+
+
+class ServerTimingMiddleware:
+    """
+    Log SQL time and query count, template render time and total time as
+    a 'music_genie.timing' line, and with DEBUG or SERVER_TIMING_HEADER on,
+    send them in a Server-Timing header too.
+
+    Place it first so the total covers the other middleware. Render time
+    covers TemplateResponses, which Django renders after the view returns,
+    and those a view renders early and times in ``request.render_duration``,
+    as the page cache does; views that render their own HttpResponse count
+    it in the total only.
+    The db and render timings overlap when a template runs queries. For
+    streaming responses the total stops before the body is streamed.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_timers()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        return self.report(request, response, timing)
+
+    async def __acall__(self, request):
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        return self.report(request, response, timing)
+
+    def process_template_response(self, request, response):
+        timing = current_timing.get()
+        if timing is not None and not response.is_rendered:
+            started = time.perf_counter()
+
+            def rendered(response):
+                timing.render += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def report(self, request, response, timing):
+        total = time.perf_counter() - timing.started
+        timing.render += getattr(request, 'render_duration', 0.0)
+        if settings.DEBUG or settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = timing.header(total)
+        if timing_logger.isEnabledFor(logging.INFO):
+            fields = {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 1),
+                'db_ms': round(timing.db * 1000, 1),
+                'queries': timing.queries,
+                'render_ms': round(timing.render * 1000, 1),
+            }
+            timing_logger.info(
+                ' '.join('%s=%s' % item for item in fields.items()),
+                extra={'request_timing': fields},
+            )
+        return response
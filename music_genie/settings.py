@@ -21,8 +21,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'music_genie.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'music_genie.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -33,6 +34,18 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'music_genie.urls'
 
+# ServerTimingMiddleware: one 'music_genie.timing' log line per request with
+# SQL, template and total time (silence it with REQUEST_TIMING_LOG_LEVEL=WARNING).
+# The Server-Timing header carrying the same numbers is only sent with DEBUG
+# or SERVER_TIMING_HEADER on, as it tells every client how the server spends
+# its time.
+REQUEST_TIMING_ENABLED = os.getenv('REQUEST_TIMING_ENABLED', 'True') == 'True'
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'False') == 'True'
+
+# asgi.py turns this on so the catalog pages and the JSON API are served by
+# their async views; under WSGI the sync views avoid a per-request event loop.
+ASYNC_VIEWS = os.getenv('DJANGO_ASYNC_VIEWS', 'False') == 'True'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -55,11 +68,92 @@ WSGI_APPLICATION = 'music_genie.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
-DATABASES = {
+# Pick the profile with DJANGO_DB_PROFILE: "default" (stock SQLite settings)
+# or "production" (WAL, tuned pragmas, persistent connections) for running
+# several gunicorn workers against one database file.
+
+DATABASE_NAME = os.getenv('DJANGO_DB_NAME', str(BASE_DIR / 'db.sqlite3'))
+
+DATABASE_PROFILES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'NAME': DATABASE_NAME,
+    },
+    'production': {
+        'ENGINE': 'music_genie.backends.sqlite3',
+        'NAME': DATABASE_NAME,
+        'CONN_MAX_AGE': int(os.getenv('DJANGO_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                # Readers keep reading the last commit while a writer works.
+                'journal_mode': 'WAL',
+                # Safe with WAL: a power loss can only drop the last commits.
+                'synchronous': 'NORMAL',
+                'busy_timeout': 5000,
+                'cache_size': -64000,  # KiB, i.e. 64 MB per connection
+                'mmap_size': 256 * 1024 * 1024,
+                'temp_store': 'MEMORY',
+            },
+        },
+    },
+}
+
+DATABASES = {
+    'default': DATABASE_PROFILES[os.getenv('DJANGO_DB_PROFILE', 'default')],
+}
+
+# Cache
+# Pick the backend with DJANGO_CACHE_BACKEND: "file" (shared by all workers
+# on a host, the default), "redis" (shared by all hosts, needs the redis
+# package), "locmem" (per process) or "dummy" (disabled). Page cache
+# invalidation only reaches the workers that share the backend, so with
+# locmem the page cache stays off unless PAGE_CACHE_ENABLED asks for it.
+
+CACHE_BACKEND = os.getenv('DJANGO_CACHE_BACKEND', 'file')
+
+CACHE_BACKENDS = {
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'music-genie',
+    },
+    'dummy': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
+}
+
+PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', str(CACHE_BACKEND != 'locmem')) == 'True'
+PAGE_CACHE_ALIAS = 'default'
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', 60 * 60))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'music_genie.timing': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_TIMING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -91,3 +185,15 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MEDIA_ROOT =  os.path.join(BASE_DIR, 'images')
 MEDIA_URL = '/images/'
+
+# Delete an artist's old image once a delete or image change commits, if no
+# other artist shares it. `manage.py gc_media` sweeps up anything left.
+MEDIA_CLEANUP_ON_COMMIT = os.getenv('MEDIA_CLEANUP_ON_COMMIT', 'False') == 'True'
+# Files written more recently than this many seconds are never removed, as
+# their upload may not be committed yet.
+MEDIA_GC_MIN_AGE = int(os.getenv('MEDIA_GC_MIN_AGE', 60 * 60))
+
+# Refresh "more like this" recommendations as soon as song changes commit.
+# Each process keeps the artist profiles in memory and reads back only the
+# changed ones. Turn it off to rely on `manage.py build_recommendations`.
+RECOMMENDATIONS_LIVE = os.getenv('RECOMMENDATIONS_LIVE', 'True') == 'True'
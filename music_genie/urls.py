@@ -2,8 +2,25 @@ from django.contrib import admin
 from django.urls import path
 from django.conf import settings
 from django.conf.urls.static import static
-from music_app.views import (LandingPageView, ArtistCreateView, ArtistListView, ArtistUpdateView,
-                             deleteArtist, SongCreateView, SongListView, SongUpdateView, deleteSong)
+from music_app import api, views
+from music_app.views import (LandingPageView, ArtistCreateView, deleteArtist, SongCreateView, deleteSong,
+                             bulkSongs, SearchView, StatsView, DuplicatesView, mergeDuplicates,
+                             exportCatalog)
+
+# The read-heavy catalog views come in sync and async variants; asgi.py
+# selects the async ones through settings.ASYNC_VIEWS.
+if settings.ASYNC_VIEWS:
+    ArtistListView, ArtistUpdateView = views.AsyncArtistListView, views.AsyncArtistDetailView
+    ArtistSongsView = views.AsyncArtistSongsView
+    SongListView, SongUpdateView = views.AsyncSongListView, views.AsyncSongDetailView
+    ArtistListApiView, ArtistDetailApiView = api.AsyncArtistListApiView, api.AsyncArtistDetailApiView
+    SongListApiView, SongDetailApiView = api.AsyncSongListApiView, api.AsyncSongDetailApiView
+else:
+    ArtistListView, ArtistUpdateView = views.ArtistListView, views.ArtistUpdateView
+    ArtistSongsView = views.ArtistSongsView
+    SongListView, SongUpdateView = views.SongListView, views.SongUpdateView
+    ArtistListApiView, ArtistDetailApiView = api.ArtistListApiView, api.ArtistDetailApiView
+    SongListApiView, SongDetailApiView = api.SongListApiView, api.SongDetailApiView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -11,11 +28,25 @@ urlpatterns = [
     path('artists/', ArtistListView.as_view(), name='artists'),
     path('add_artist/', ArtistCreateView.as_view(), name='add_artist'),
     path('artist-details/<int:pk>/', ArtistUpdateView.as_view(), name='artist_details'),
+    path('artist-details/<int:pk>/songs/', ArtistSongsView.as_view(), name='artist_songs'),
     path('artist-delete/<int:pk>/', deleteArtist, name='delete_artist'),
     path('songs/', SongListView.as_view(), name='songs'),
     path('add_song/', SongCreateView.as_view(), name='add_song'),
     path('song-details/<int:pk>/', SongUpdateView.as_view(), name='song_details'),
     path('song-delete/<int:pk>/', deleteSong, name='delete_song'),
+    path('songs/bulk/', bulkSongs, name='bulk_songs'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('stats/', StatsView.as_view(), name='stats'),
+    path('duplicates/', DuplicatesView.as_view(), name='duplicates'),
+    path('duplicates/merge/', mergeDuplicates, name='merge_duplicates'),
+    path('export/<slug:dataset>.<slug:fmt>', exportCatalog, name='export'),
+    path('api/artists/', ArtistListApiView.as_view(), name='api_artists'),
+    path('api/artists/lookup/', api.ArtistLookupApiView.as_view(), name='api_artist_lookup'),
+    path('api/artists/<int:pk>/', ArtistDetailApiView.as_view(), name='api_artist'),
+    path('api/songs/', SongListApiView.as_view(), name='api_songs'),
+    path('api/songs/bulk/', api.SongBulkApiView.as_view(), name='api_songs_bulk'),
+    path('api/genie/', api.GenieApiView.as_view(), name='api_genie'),
+    path('api/songs/<int:pk>/', SongDetailApiView.as_view(), name='api_song'),
 ]
 
 